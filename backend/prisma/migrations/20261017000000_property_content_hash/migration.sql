@@ -0,0 +1,2 @@
+-- AlterTable
+ALTER TABLE "properties" ADD COLUMN     "content_hash" TEXT;
@@ -0,0 +1,43 @@
+-- AlterTable
+ALTER TABLE "scraper_jobs" ADD COLUMN     "run_id" TEXT;
+
+-- CreateTable
+CREATE TABLE "scraper_runs" (
+    "id" TEXT NOT NULL,
+    "status" TEXT NOT NULL,
+    "started_at" TIMESTAMP(3) NOT NULL DEFAULT CURRENT_TIMESTAMP,
+    "completed_at" TIMESTAMP(3),
+
+    CONSTRAINT "scraper_runs_pkey" PRIMARY KEY ("id")
+);
+
+-- CreateTable
+CREATE TABLE "crawl_checkpoints" (
+    "id" TEXT NOT NULL,
+    "run_id" TEXT NOT NULL,
+    "source" TEXT NOT NULL,
+    "city_id" TEXT NOT NULL,
+    "last_page" INTEGER NOT NULL DEFAULT 0,
+    "status" TEXT NOT NULL,
+    "updated_at" TIMESTAMP(3) NOT NULL,
+
+    CONSTRAINT "crawl_checkpoints_pkey" PRIMARY KEY ("id")
+);
+
+-- CreateIndex
+CREATE INDEX "scraper_runs_status_started_at_idx" ON "scraper_runs"("status", "started_at");
+
+-- CreateIndex
+CREATE INDEX "crawl_checkpoints_source_city_id_updated_at_idx" ON "crawl_checkpoints"("source", "city_id", "updated_at");
+
+-- CreateIndex
+CREATE UNIQUE INDEX "crawl_checkpoints_run_id_source_city_id_key" ON "crawl_checkpoints"("run_id", "source", "city_id");
+
+-- AddForeignKey
+ALTER TABLE "scraper_jobs" ADD CONSTRAINT "scraper_jobs_run_id_fkey" FOREIGN KEY ("run_id") REFERENCES "scraper_runs"("id") ON DELETE SET NULL ON UPDATE CASCADE;
+
+-- AddForeignKey
+ALTER TABLE "crawl_checkpoints" ADD CONSTRAINT "crawl_checkpoints_run_id_fkey" FOREIGN KEY ("run_id") REFERENCES "scraper_runs"("id") ON DELETE CASCADE ON UPDATE CASCADE;
+
+-- AddForeignKey
+ALTER TABLE "crawl_checkpoints" ADD CONSTRAINT "crawl_checkpoints_city_id_fkey" FOREIGN KEY ("city_id") REFERENCES "cities"("id") ON DELETE CASCADE ON UPDATE CASCADE;
@@ -0,0 +1,28 @@
+-- CreateTable
+CREATE TABLE "scrape_tasks" (
+    "id" TEXT NOT NULL,
+    "run_id" TEXT NOT NULL,
+    "source" TEXT NOT NULL,
+    "city" TEXT NOT NULL DEFAULT '',
+    "start_page" INTEGER NOT NULL,
+    "end_page" INTEGER NOT NULL,
+    "max_pages" INTEGER NOT NULL,
+    "last_page" INTEGER NOT NULL DEFAULT 0,
+    "status" TEXT NOT NULL DEFAULT 'pending',
+    "worker_id" TEXT,
+    "lease_expires_at" TIMESTAMP(3),
+    "attempts" INTEGER NOT NULL DEFAULT 0,
+    "created_at" TIMESTAMP(3) NOT NULL DEFAULT CURRENT_TIMESTAMP,
+    "updated_at" TIMESTAMP(3) NOT NULL,
+
+    CONSTRAINT "scrape_tasks_pkey" PRIMARY KEY ("id")
+);
+
+-- CreateIndex
+CREATE INDEX "scrape_tasks_run_id_status_start_page_idx" ON "scrape_tasks"("run_id", "status", "start_page");
+
+-- CreateIndex
+CREATE UNIQUE INDEX "scrape_tasks_run_id_source_city_start_page_key" ON "scrape_tasks"("run_id", "source", "city", "start_page");
+
+-- AddForeignKey
+ALTER TABLE "scrape_tasks" ADD CONSTRAINT "scrape_tasks_run_id_fkey" FOREIGN KEY ("run_id") REFERENCES "scraper_runs"("id") ON DELETE CASCADE ON UPDATE CASCADE;
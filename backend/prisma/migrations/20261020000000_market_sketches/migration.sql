@@ -0,0 +1,21 @@
+-- CreateTable
+CREATE TABLE "market_sketches" (
+    "id" TEXT NOT NULL,
+    "city_id" TEXT NOT NULL,
+    "district_id" TEXT NOT NULL DEFAULT '',
+    "property_type_id" TEXT NOT NULL DEFAULT '',
+    "sketch" BYTEA NOT NULL,
+    "sample_size" INTEGER NOT NULL DEFAULT 0,
+    "p10_price_per_sqm" DECIMAL(12,2),
+    "p50_price_per_sqm" DECIMAL(12,2),
+    "p90_price_per_sqm" DECIMAL(12,2),
+    "updated_at" TIMESTAMP(3) NOT NULL,
+
+    CONSTRAINT "market_sketches_pkey" PRIMARY KEY ("id")
+);
+
+-- CreateIndex
+CREATE UNIQUE INDEX "market_sketches_city_id_district_id_property_type_id_key" ON "market_sketches"("city_id", "district_id", "property_type_id");
+
+-- AddForeignKey
+ALTER TABLE "market_sketches" ADD CONSTRAINT "market_sketches_city_id_fkey" FOREIGN KEY ("city_id") REFERENCES "cities"("id") ON DELETE CASCADE ON UPDATE CASCADE;
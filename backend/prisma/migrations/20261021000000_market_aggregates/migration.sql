@@ -0,0 +1,6 @@
+-- AlterTable
+ALTER TABLE "market_sketches" ADD COLUMN     "price_sum" DECIMAL(65,30) NOT NULL DEFAULT 0,
+ADD COLUMN     "rebuilt_at" TIMESTAMP(3);
+
+-- CreateIndex
+CREATE INDEX "market_sketches_updated_at_idx" ON "market_sketches"("updated_at");
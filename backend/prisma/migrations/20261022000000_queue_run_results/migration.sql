@@ -0,0 +1,5 @@
+-- AlterTable
+ALTER TABLE "scraper_runs" ADD COLUMN     "queue" BOOLEAN NOT NULL DEFAULT false;
+
+-- AlterTable
+ALTER TABLE "scrape_tasks" ADD COLUMN     "results" JSONB;
@@ -0,0 +1,2 @@
+-- AlterTable
+ALTER TABLE "properties" ADD COLUMN     "comps_avg_price_per_sqm" DECIMAL(65,30);
@@ -106,6 +106,7 @@ CREATE TABLE properties (
     -- Pricing analysis
     price_per_sqm DECIMAL(12, 2),
     district_avg_price_per_sqm DECIMAL(12, 2),
+    comps_avg_price_per_sqm DECIMAL(12, 2), -- nearest comparables, when the listing was scored against them
     price_vs_market_percent DECIMAL(5, 2), -- negative means below market
     
     -- Deal scoring
@@ -131,6 +132,7 @@ CREATE TABLE properties (
     scraped_at TIMESTAMP DEFAULT CURRENT_TIMESTAMP,
     last_seen_at TIMESTAMP DEFAULT CURRENT_TIMESTAMP,
     updated_at TIMESTAMP DEFAULT CURRENT_TIMESTAMP,
+    content_hash VARCHAR(32), -- fingerprint of the scraped listing, set by the scraper
     
     -- Admin
     admin_notes TEXT,
@@ -227,6 +229,66 @@ CREATE TABLE activity_logs (
     created_at TIMESTAMP DEFAULT CURRENT_TIMESTAMP
 );
 
+-- Scraper runs (one per run_all_cities), resumed after a crash within the interval
+CREATE TABLE scraper_runs (
+    id UUID PRIMARY KEY DEFAULT uuid_generate_v4(),
+    status VARCHAR(20) NOT NULL, -- running, completed, abandoned
+    queue BOOLEAN NOT NULL DEFAULT false, -- shared by --queue nodes
+    started_at TIMESTAMP DEFAULT CURRENT_TIMESTAMP,
+    completed_at TIMESTAMP
+);
+
+-- Crawl frontier: last page written per run, source and city
+CREATE TABLE crawl_checkpoints (
+    id UUID PRIMARY KEY DEFAULT uuid_generate_v4(),
+    run_id UUID REFERENCES scraper_runs(id) ON DELETE CASCADE,
+    source VARCHAR(50) NOT NULL,
+    city_id UUID REFERENCES cities(id) ON DELETE CASCADE,
+    last_page INTEGER DEFAULT 0,
+    status VARCHAR(20) NOT NULL, -- running, done
+    updated_at TIMESTAMP DEFAULT CURRENT_TIMESTAMP,
+    UNIQUE(run_id, source, city_id)
+);
+
+-- Work queue for multi-node runs: pages start_page..end_page of a source/city
+-- (city '' = a source-wide feed), claimed with FOR UPDATE SKIP LOCKED under a lease
+CREATE TABLE scrape_tasks (
+    id UUID PRIMARY KEY DEFAULT uuid_generate_v4(),
+    run_id UUID REFERENCES scraper_runs(id) ON DELETE CASCADE,
+    source VARCHAR(50) NOT NULL,
+    city VARCHAR(100) NOT NULL DEFAULT '',
+    start_page INTEGER NOT NULL,
+    end_page INTEGER NOT NULL,
+    max_pages INTEGER NOT NULL,
+    last_page INTEGER DEFAULT 0,
+    status VARCHAR(20) DEFAULT 'pending', -- pending, claimed, done, failed
+    worker_id VARCHAR(255),
+    lease_expires_at TIMESTAMP,
+    attempts INTEGER DEFAULT 0,
+    results JSONB, -- per-city found/created/updated/unchanged/errors written by this task
+    created_at TIMESTAMP DEFAULT CURRENT_TIMESTAMP,
+    updated_at TIMESTAMP DEFAULT CURRENT_TIMESTAMP,
+    UNIQUE(run_id, source, city, start_page)
+);
+
+-- Price-per-sqm quantile sketch of the active listings per city, district and type
+-- ('' = no district / type), kept up to date as listings are saved
+CREATE TABLE market_sketches (
+    id UUID PRIMARY KEY DEFAULT uuid_generate_v4(),
+    city_id UUID NOT NULL REFERENCES cities(id) ON DELETE CASCADE,
+    district_id VARCHAR(36) NOT NULL DEFAULT '', -- districts.id as text ('' = no district); join on districts.id::text
+    property_type_id VARCHAR(36) NOT NULL DEFAULT '', -- property_types.id as text ('' = no type)
+    sketch BYTEA NOT NULL,
+    sample_size INTEGER DEFAULT 0,
+    p10_price_per_sqm DECIMAL(12, 2),
+    p50_price_per_sqm DECIMAL(12, 2),
+    p90_price_per_sqm DECIMAL(12, 2),
+    price_sum DECIMAL NOT NULL DEFAULT 0, -- running sum behind city / district averages
+    rebuilt_at TIMESTAMP, -- last full reconciliation
+    updated_at TIMESTAMP DEFAULT CURRENT_TIMESTAMP,
+    UNIQUE(city_id, district_id, property_type_id)
+);
+
 -- Scraper jobs log
 CREATE TABLE scraper_jobs (
     id UUID PRIMARY KEY DEFAULT uuid_generate_v4(),
@@ -240,7 +302,8 @@ CREATE TABLE scraper_jobs (
     properties_updated INTEGER DEFAULT 0,
     properties_sold INTEGER DEFAULT 0,
     error_message TEXT,
-    metadata JSONB
+    metadata JSONB,
+    run_id UUID REFERENCES scraper_runs(id)
 );
 
 -- Admin notes/comments on properties
@@ -288,6 +351,8 @@ CREATE INDEX idx_user_favorites_user ON user_favorites(user_id);
 CREATE INDEX idx_saved_searches_user ON saved_searches(user_id);
 CREATE INDEX idx_activity_logs_user ON activity_logs(user_id);
 CREATE INDEX idx_activity_logs_created ON activity_logs(created_at DESC);
+CREATE INDEX idx_scrape_tasks_claim ON scrape_tasks(run_id, status, start_page);
+CREATE INDEX idx_market_sketches_updated ON market_sketches(updated_at);
 
 -- Full-text search index
 CREATE INDEX idx_properties_search ON properties USING gin(to_tsvector('english', title || ' ' || COALESCE(description, '')));
@@ -0,0 +1,120 @@
+#!/usr/bin/env python3
+"""Benchmark AqarScraper page-data extraction against the old regex/BeautifulSoup path.
+
+Usage:
+    python scripts/bench_aqar_extract.py [saved_page.html ...]
+
+With no arguments a set of synthetic pages (inline __APOLLO_STATE__ and
+<script id="__NEXT_DATA__">) is generated. Every page is checked for
+identical output before timing.
+"""
+import os
+import re
+import sys
+import json
+import time
+import random
+
+sys.path.insert(0, os.path.join(os.path.dirname(os.path.abspath(__file__)), '..', 'src'))
+
+from bs4 import BeautifulSoup
+
+from scraper import AqarScraper
+
+
+def legacy_extract_page_data(html):
+    """AqarScraper._extract_page_data as it was before the marker-scan fast path"""
+    try:
+        match = re.search(r'__APOLLO_STATE__\s*=\s*({.*?});?\s*</script>', html, re.DOTALL)
+        if match:
+            return json.loads(match.group(1))
+
+        def _extract_from_next_data(next_data):
+            apollo = next_data.get('props', {}).get('apolloState', {})
+            if apollo:
+                return apollo
+            page_props = next_data.get('props', {}).get('pageProps', {})
+            apollo2 = page_props.get('__APOLLO_STATE__', {})
+            if apollo2:
+                return apollo2
+            return page_props or None
+
+        match2 = re.search(r'__NEXT_DATA__\s*=\s*({.*?})\s*</script>', html, re.DOTALL)
+        if match2:
+            return _extract_from_next_data(json.loads(match2.group(1)))
+
+        soup = BeautifulSoup(html, 'html.parser')
+        script = soup.find('script', id='__NEXT_DATA__')
+        if script and script.string:
+            return _extract_from_next_data(json.loads(script.string))
+        return None
+    except (json.JSONDecodeError, AttributeError):
+        return None
+
+
+def synthetic_pages(count=6, listings_per_page=30):
+    rng = random.Random(42)
+    filler = ''.join(
+        f'<div class="card c{i}"><a href="/listing/{i}">عقار رقم {i}</a><span>{rng.randint(1, 9)} غرف</span></div>'
+        for i in range(1500)
+    )
+    styles = '<style>' + '.x{color:red}' * 4000 + '</style>'
+    pages = []
+    for n in range(count):
+        state = {}
+        for i in range(listings_per_page):
+            lid = n * 1000 + i
+            state[f'ElasticWebListing:{lid}'] = {
+                '__typename': 'ElasticWebListing', 'id': lid, 'price': rng.randint(300000, 3000000),
+                'title': 'شقة للبيع في حي النرجس', 'area': rng.randint(80, 600), 'beds': rng.randint(1, 6),
+                'content': 'وصف العقار ' * 40, 'imgs': [f'img{lid}_{k}.jpg' for k in range(8)],
+                'location': {'lat': 24.7 + rng.random(), 'lng': 46.6 + rng.random()},
+                'user': {'name': 'مالك', 'phone': ''}, 'path': f'/listing/{lid}',
+            }
+        state['ROOT_QUERY'] = {'__typename': 'Query', 'ads': [{'__ref': k} for k in state]}
+        payload = json.dumps(state, ensure_ascii=False)
+        if n % 2 == 0:
+            script = f'<script>window.__APOLLO_STATE__ = {payload};</script>'
+        else:
+            next_data = json.dumps({'props': {'pageProps': {'__APOLLO_STATE__': state}}}, ensure_ascii=False)
+            script = f'<script id="__NEXT_DATA__" type="application/json">{next_data}</script>'
+        pages.append(f'<html><head>{styles}</head><body>{filler}{script}</body></html>')
+    return pages
+
+
+def bench(fn, pages, min_seconds=2.0):
+    runs = 0
+    start = time.perf_counter()
+    while time.perf_counter() - start < min_seconds:
+        for html in pages:
+            fn(html)
+        runs += len(pages)
+    return runs / (time.perf_counter() - start)
+
+
+def main():
+    if len(sys.argv) > 1:
+        pages = []
+        for path in sys.argv[1:]:
+            with open(path, encoding='utf-8') as f:
+                pages.append(f.read())
+    else:
+        pages = synthetic_pages()
+
+    scraper = AqarScraper()
+    for i, html in enumerate(pages):
+        if scraper._extract_page_data(html) != legacy_extract_page_data(html):
+            print(f"Output mismatch on page {i}")
+            sys.exit(1)
+
+    avg_kb = sum(len(p) for p in pages) / len(pages) / 1024
+    print(f"{len(pages)} pages, {avg_kb:.0f} KB average")
+    legacy = bench(legacy_extract_page_data, pages)
+    fast = bench(scraper._extract_page_data, pages)
+    print(f"legacy regex/soup : {legacy:8.1f} pages/s")
+    print(f"marker scan       : {fast:8.1f} pages/s")
+    print(f"speedup           : {fast / legacy:8.1f}x")
+
+
+if __name__ == '__main__':
+    main()
@@ -0,0 +1,82 @@
+#!/usr/bin/env python3
+"""Benchmark building and querying the comparables index.
+
+Usage:
+    python scripts/bench_comps_index.py [listings]
+
+Indexes a synthetic set of active listings (default 100000) spread around
+the covered cities, checks a sample of lookups against a brute-force scan
+of every listing, then times the build and a lookup for every listing. No
+database is needed.
+"""
+import os
+import sys
+import time
+import random
+
+import numpy as np
+
+sys.path.insert(0, os.path.join(os.path.dirname(os.path.abspath(__file__)), '..', 'src'))
+
+from comps_index import CompsIndex, haversine_km
+
+# Approximate city centres (lat, lon)
+CENTRES = [(24.71, 46.68), (21.49, 39.19), (21.39, 39.86), (24.47, 39.61), (26.42, 50.09),
+           (26.28, 50.21), (21.27, 40.42), (18.22, 42.51), (28.38, 36.57), (26.33, 43.97)]
+TYPES = [f"type-{i}" for i in range(6)]
+
+
+def synthetic_rows(count):
+    rng = random.Random(7)
+    rows = []
+    for i in range(count):
+        lat, lon = rng.choice(CENTRES)
+        size = rng.randint(60, 900)
+        rows.append((str(i), rng.choice(TYPES), lat + rng.gauss(0, 0.08), lon + rng.gauss(0, 0.08),
+                     float(size), float(rng.randint(1500, 9000))))
+    return rows
+
+
+def brute_force(index, rows, row):
+    external_id, type_id, lat, lon, size, _ = row
+    low, high = size / (1 + index.size_tolerance), size * (1 + index.size_tolerance)
+    pool = [r for r in rows if r[1] == type_id and r[0] != external_id and low <= r[4] <= high]
+    if not pool:
+        return None
+    distance = haversine_km(lat, lon, np.array([r[2] for r in pool]), np.array([r[3] for r in pool]))
+    near = sorted((d, r[5]) for d, r in zip(distance.tolist(), pool) if d <= index.radius_km)
+    if len(near) < index.min_count:
+        return None
+    return sorted(price for _, price in near[:index.k])
+
+
+def main():
+    count = int(sys.argv[1]) if len(sys.argv) > 1 else 100000
+    rows = synthetic_rows(count)
+    index = CompsIndex(radius_km=2.0, k=10, size_tolerance=0.3, min_count=3)
+    index.build(rows)
+
+    rng = random.Random(11)
+    for row in rng.sample(rows, 200):
+        metrics = index.lookup(row[2], row[3], row[1], row[4], exclude_external_id=row[0])
+        expected = brute_force(index, rows, row)
+        if (metrics is None) != (expected is None) or (
+                expected and (metrics.sample_size != len(expected)
+                              or float(metrics.min_price_per_sqm) != expected[0]
+                              or float(metrics.max_price_per_sqm) != expected[-1])):
+            print(f"Mismatch for listing {row[0]}: {metrics} vs {expected}")
+            sys.exit(1)
+    print(f"{count} listings, 200 lookups match a brute-force scan")
+
+    start = time.perf_counter()
+    index.build(rows)
+    build = time.perf_counter() - start
+    start = time.perf_counter()
+    found = sum(1 for row in rows if index.lookup(row[2], row[3], row[1], row[4], exclude_external_id=row[0]))
+    lookups = time.perf_counter() - start
+    print(f"build: {build * 1000:8.1f} ms   lookup: {lookups / count * 1e6:6.1f} us/listing   "
+          f"comps found for {found / count:.0%} of listings")
+
+
+if __name__ == '__main__':
+    main()
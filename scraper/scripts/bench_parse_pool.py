@@ -0,0 +1,64 @@
+#!/usr/bin/env python3
+"""Benchmark page parsing in the fetching threads against the parse pool.
+
+Usage:
+    python scripts/bench_parse_pool.py [processes] [threads]
+
+Parses the synthetic aqar.fm pages of bench_aqar_extract.py from a number
+of threads (default 6, like parallel source lanes), first in-process and
+then through a PARSE_PROCESSES-style pool (default: one process per CPU).
+Outputs are checked for equality before timing. The pool can only help on
+a machine with more than one core.
+"""
+import os
+import sys
+import time
+from concurrent.futures import ThreadPoolExecutor
+
+sys.path.insert(0, os.path.join(os.path.dirname(os.path.abspath(__file__)), '..', 'src'))
+sys.path.insert(0, os.path.dirname(os.path.abspath(__file__)))
+
+from bench_aqar_extract import synthetic_pages
+from parse_pool import ParsePool
+from scraper import AqarScraper, _parse_page_in_worker
+
+
+def bench(parse, pages, threads, min_seconds=3.0):
+    parsed = 0
+    start = time.perf_counter()
+    with ThreadPoolExecutor(max_workers=threads) as lanes:
+        while time.perf_counter() - start < min_seconds:
+            list(lanes.map(parse, pages))
+            parsed += len(pages)
+    return parsed / (time.perf_counter() - start)
+
+
+def main():
+    processes = int(sys.argv[1]) if len(sys.argv) > 1 else os.cpu_count()
+    threads = int(sys.argv[2]) if len(sys.argv) > 2 else 6
+    pages = synthetic_pages(count=24)
+    scraper = AqarScraper()
+    pool = ParsePool(processes)
+    executor = pool.executor()
+
+    in_process = lambda html: scraper._parse_page(html, 'riyadh', None)
+    in_pool = lambda html: executor.submit(_parse_page_in_worker, AqarScraper, html, 'riyadh', None).result()
+    # scraped_at is the parse time, so it differs between runs
+    strip = lambda parsed: (parsed[0], [{k: v for k, v in listing.items() if k != 'scraped_at'}
+                                        for listing in parsed[1] or []])
+    if [strip(in_process(html)) for html in pages] != [strip(in_pool(html)) for html in pages]:
+        print("Pool output mismatch")
+        pool.shutdown()
+        sys.exit(1)
+
+    print(f"{len(pages)} pages, {threads} threads, {os.cpu_count()} CPUs, outputs identical")
+    threaded = bench(in_process, pages, threads)
+    pooled = bench(in_pool, pages, threads)
+    pool.shutdown()
+    print(f"in-process        : {threaded:8.1f} pages/s")
+    print(f"pool ({processes} processes): {pooled:8.1f} pages/s")
+    print(f"speedup           : {pooled / threaded:8.2f}x")
+
+
+if __name__ == '__main__':
+    main()
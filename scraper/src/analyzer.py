@@ -1,49 +1,62 @@
 from datetime import datetime, timedelta
 from decimal import Decimal
 from typing import Optional, List, Dict
-from dataclasses import dataclass
 from statistics import mean
 
 from config import settings, logger
+from database import db_manager
+from market_index import MarketIndex, MarketMetrics, market_index
+from comps_index import CompsIndex, comps_index
+from batch_scoring import DEAL_TYPES, analyze_columns, column
 from models import PropertyListing, PropertyAnalysis, DealType
 
-@dataclass
-class MarketMetrics:
-    avg_price_per_sqm: Decimal
-    median_price_per_sqm: Decimal
-    min_price_per_sqm: Decimal
-    max_price_per_sqm: Decimal
-    sample_size: int
+# Rental yield adjustment per property type
+TYPE_YIELD_MULTIPLIERS = {
+    "apartment": 1.0,
+    "villa": 0.9,
+    "building": 1.2,
+    "commercial": 1.3,
+    "office": 1.1,
+    "shop": 1.25,
+}
+
+
+def _decimal(value: float, digits: int = 2) -> Decimal:
+    return Decimal(f"{value:.{digits}f}")
+
 
 class DealAnalyzer:
-    def __init__(self, db_connection=None):
+    def __init__(self, db_connection=None, index: MarketIndex = None, comps: CompsIndex = None):
         self.db = db_connection
-        self.market_data_cache: Dict[str, MarketMetrics] = {}
+        self.market_index = index or market_index
+        self.comps_index = comps or comps_index
     
     def calculate_market_metrics(self, city: str, district: Optional[str], 
-                                  property_type: str, 
-                                  exclude_property_id: Optional[str] = None) -> MarketMetrics:
-        """Calculate market averages for a specific area and property type"""
-        cache_key = f"{city}:{district}:{property_type}"
-        
-        if cache_key in self.market_data_cache:
-            return self.market_data_cache[cache_key]
-        
-        # In production, query database for recent sales/listings
-        # For now, return placeholder metrics
-        # This would be populated from historical data
-        
-        metrics = MarketMetrics(
-            avg_price_per_sqm=Decimal('4500'),  # Placeholder
-            median_price_per_sqm=Decimal('4200'),
-            min_price_per_sqm=Decimal('3000'),
-            max_price_per_sqm=Decimal('8000'),
-            sample_size=100
-        )
+                                  property_type: str) -> MarketMetrics:
+        """Market metrics for an area and property type, from the narrowest group with enough samples"""
+        city_id, district_id, type_id = db_manager.dimensions.lookup_ids(city, district, property_type)
+        metrics = self.market_index.lookup(city_id, district_id, type_id)
+        if metrics:
+            return metrics
         
-        self.market_data_cache[cache_key] = metrics
-        return metrics
+        # Nothing stored yet anywhere: score against the configured fallback
+        fallback = Decimal(str(settings.MARKET_FALLBACK_PRICE_PER_SQM))
+        return MarketMetrics(
+            avg_price_per_sqm=fallback,
+            median_price_per_sqm=fallback,
+            min_price_per_sqm=fallback,
+            max_price_per_sqm=fallback,
+            sample_size=0
+        )
     
+    def comparable_metrics(self, listing: PropertyListing) -> Optional[MarketMetrics]:
+        """Metrics of the listing's nearest comparables, None without coordinates or enough of them"""
+        if not self.comps_index or listing.latitude is None or listing.longitude is None:
+            return None
+        type_id = db_manager.dimensions.lookup_ids(listing.city, listing.district, listing.property_type.value)[2]
+        return self.comps_index.lookup(listing.latitude, listing.longitude, type_id, listing.size_sqm,
+                                       exclude_external_id=listing.external_id)
+
     def calculate_price_per_sqm(self, price: Decimal, size_sqm: Optional[Decimal]) -> Optional[Decimal]:
         """Calculate price per square meter"""
         if size_sqm and size_sqm > 0:
@@ -57,28 +70,20 @@ class DealAnalyzer:
             return None
         return round(((price_per_sqm - market_avg) / market_avg) * 100, 2)
     
+    def city_base_yield(self, city: str) -> float:
+        if city == "Riyadh":
+            return settings.AVG_RENTAL_YIELD_RIYADH
+        elif city == "Jeddah":
+            return settings.AVG_RENTAL_YIELD_JEDDAH
+        return settings.AVG_RENTAL_YIELD_OTHER
+    
     def estimate_rental_yield(self, property_type: str, city: str, 
                               price: Decimal, size_sqm: Optional[Decimal]) -> tuple[Optional[Decimal], Optional[Decimal]]:
         """Estimate monthly rent and annual yield based on property characteristics"""
         
-        # Get base yield for city
-        if city == "Riyadh":
-            base_yield = settings.AVG_RENTAL_YIELD_RIYADH
-        elif city == "Jeddah":
-            base_yield = settings.AVG_RENTAL_YIELD_JEDDAH
-        else:
-            base_yield = settings.AVG_RENTAL_YIELD_OTHER
-        
-        # Adjust for property type
-        type_multipliers = {
-            "apartment": 1.0,
-            "villa": 0.9,
-            "building": 1.2,
-            "commercial": 1.3,
-            "office": 1.1,
-            "shop": 1.25,
-        }
-        multiplier = type_multipliers.get(property_type, 1.0)
+        # Get base yield for city, adjusted for property type
+        base_yield = self.city_base_yield(city)
+        multiplier = TYPE_YIELD_MULTIPLIERS.get(property_type, 1.0)
         adjusted_yield = base_yield * multiplier
         
         # Calculate annual rent and monthly rent
@@ -160,12 +165,14 @@ class DealAnalyzer:
     def analyze_property(self, listing: PropertyListing) -> PropertyAnalysis:
         """Perform full analysis on a property listing"""
         
-        # Get market metrics
-        market_metrics = self.calculate_market_metrics(
+        # Get market metrics: nearest comparables, else the listing's area
+        comps_metrics = self.comparable_metrics(listing)
+        area_metrics = self.calculate_market_metrics(
             listing.city,
             listing.district,
             listing.property_type.value
         )
+        market_metrics = comps_metrics or area_metrics
         
         # Calculate price metrics
         price_per_sqm = self.calculate_price_per_sqm(listing.price, listing.size_sqm)
@@ -188,7 +195,8 @@ class DealAnalyzer:
         analysis = PropertyAnalysis(
             property_id=listing.external_id,
             price_per_sqm=price_per_sqm,
-            district_avg_price_per_sqm=market_metrics.avg_price_per_sqm,
+            district_avg_price_per_sqm=area_metrics.avg_price_per_sqm,
+            comps_avg_price_per_sqm=comps_metrics.avg_price_per_sqm if comps_metrics else None,
             price_vs_market_percent=price_vs_market,
             investment_score=investment_score,
             deal_type=deal_type,
@@ -205,12 +213,61 @@ class DealAnalyzer:
         return analysis
     
     def analyze_batch(self, listings: List[PropertyListing]) -> List[PropertyAnalysis]:
-        """Analyze multiple properties"""
-        analyses = []
+        """Analyze multiple properties with the vectorized engine; same results as analyze_property"""
+        if not listings:
+            return []
+        metrics, comps_metrics, area_metrics, by_group = [], [], [], {}
         for listing in listings:
             try:
-                analysis = self.analyze_property(listing)
-                analyses.append(analysis)
+                comps = self.comparable_metrics(listing)
+            except Exception as e:
+                logger.error(f"Error getting comparables for {listing.external_id}: {e}")
+                comps = None
+            group = (listing.city, listing.district, listing.property_type.value)
+            if group not in by_group:
+                try:
+                    by_group[group] = self.calculate_market_metrics(*group)
+                except Exception as e:
+                    logger.error(f"Error getting market metrics for {listing.external_id}: {e}")
+                    by_group[group] = None
+            comps_metrics.append(comps)
+            area_metrics.append(by_group[group])
+            metrics.append(comps or by_group[group])
+        result = analyze_columns(
+            column(listing.price for listing in listings),
+            column(listing.size_sqm for listing in listings),
+            column(m.avg_price_per_sqm if m else None for m in metrics),
+            column(self.city_base_yield(listing.city) for listing in listings),
+            column(TYPE_YIELD_MULTIPLIERS.get(listing.property_type.value, 1.0) for listing in listings),
+        )
+        columns = {key: values.tolist() for key, values in result.items()}
+        analyzed_at = datetime.utcnow()
+        
+        analyses = []
+        for i, listing in enumerate(listings):
+            try:
+                if columns['exact'][i] or area_metrics[i] is None:
+                    # Within float error of a rounding tie or threshold: let Decimal decide
+                    analyses.append(self.analyze_property(listing))
+                    continue
+                price_per_sqm = columns['price_per_sqm'][i]
+                vs_market = columns['price_vs_market_percent'][i]
+                yield_percent = columns['estimated_annual_yield_percent'][i]
+                analyses.append(PropertyAnalysis(
+                    property_id=listing.external_id,
+                    price_per_sqm=_decimal(price_per_sqm) if price_per_sqm == price_per_sqm else None,
+                    district_avg_price_per_sqm=area_metrics[i].avg_price_per_sqm,
+                    comps_avg_price_per_sqm=comps_metrics[i].avg_price_per_sqm if comps_metrics[i] else None,
+                    price_vs_market_percent=_decimal(vs_market) if vs_market == vs_market else None,
+                    investment_score=columns['investment_score'][i],
+                    deal_type=DealType(DEAL_TYPES[columns['deal_type'][i]]),
+                    estimated_monthly_rent=_decimal(columns['estimated_monthly_rent'][i]),
+                    estimated_annual_yield_percent=Decimal(str(yield_percent)) if yield_percent else None,
+                    analysis_timestamp=analyzed_at,
+                ))
             except Exception as e:
                 logger.error(f"Error analyzing property {listing.external_id}: {e}")
+        
+        hot = sum(1 for analysis in analyses if analysis.deal_type == DealType.HOT_DEAL)
+        logger.info(f"Analyzed {len(analyses)}/{len(listings)} properties ({hot} hot deals)")
         return analyses
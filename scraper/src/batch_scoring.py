@@ -0,0 +1,112 @@
+from decimal import Decimal
+from typing import Dict, Iterable, Any, Callable
+
+import numpy as np
+
+# Deal types in code order; the engine returns indexes into this tuple
+DEAL_TYPES = ('hot_deal', 'good_deal', 'fair_price', 'overpriced')
+HOT, GOOD, FAIR, OVERPRICED = range(4)
+
+# Relative distance from a rounding tie or threshold within which float64 might disagree with the scalar path
+_TOLERANCE = 1e-12
+
+
+def column(values: Iterable[Any]) -> np.ndarray:
+    """float64 column from numbers, Decimals or strings; None and unparseable values become NaN"""
+    values = list(values)
+    try:
+        return np.array(values, dtype=np.float64)
+    except (TypeError, ValueError):
+        pass
+    out = []
+    for value in values:
+        try:
+            out.append(float(value) if value is not None else np.nan)
+        except (TypeError, ValueError):
+            out.append(np.nan)
+    return np.array(out, dtype=np.float64)
+
+
+def _near_tie(values: np.ndarray, digits: int) -> np.ndarray:
+    """Elements whose rounding to `digits` decimals depends on error below the float64 resolution"""
+    scaled = np.abs(values) * 10 ** digits
+    return np.abs(scaled - np.floor(scaled) - 0.5) <= _TOLERANCE * np.maximum(scaled, 1.0)
+
+
+def _near(values: np.ndarray, points: Iterable[float]) -> np.ndarray:
+    near = np.zeros(values.shape, dtype=bool)
+    for point in points:
+        near |= np.abs(values - point) <= _TOLERANCE * max(abs(point), 1.0)
+    return near
+
+
+def round_half_even(values: np.ndarray, digits: int,
+                    exact: Callable[[int], float] = None) -> np.ndarray:
+    """np.round that agrees with the scalar path on values within float error of a tie.
+    Those few elements are rounded by exact(i), by default Python's round() of the float."""
+    rounded = np.round(values, digits)
+    for i in np.flatnonzero(_near_tie(values, digits) & np.isfinite(values)):
+        rounded[i] = exact(i) if exact else round(float(values[i]), digits)
+    return rounded
+
+
+def _decimal(value: float) -> Decimal:
+    """The decimal a float column value was converted from (prices and sizes have few digits)"""
+    return Decimal(repr(float(value)))
+
+
+def analyze_columns(price: np.ndarray, size: np.ndarray, market_avg: np.ndarray,
+                    base_yield: np.ndarray, type_multiplier: np.ndarray) -> Dict[str, np.ndarray]:
+    """DealAnalyzer.analyze_property over whole columns, in float64 instead of Decimal.
+
+    NaN in price_per_sqm / price_vs_market_percent stands for None. Values
+    within float error of a rounding tie are recomputed with Decimal. Rows in
+    the 'exact' mask sit that close to a tie or threshold further down the
+    calculation; callers rescore those with the scalar path.
+    """
+    with np.errstate(divide='ignore', invalid='ignore'):
+        raw_price_per_sqm = price / size
+        price_per_sqm = np.where(size > 0, round_half_even(
+            raw_price_per_sqm, 2, lambda i: float(round(_decimal(price[i]) / _decimal(size[i]), 2))), np.nan)
+        has_price_per_sqm = (price_per_sqm != 0) & ~np.isnan(price_per_sqm)
+        has_market = (market_avg != 0) & ~np.isnan(market_avg)
+
+        raw_vs_market = (price_per_sqm - market_avg) / market_avg * 100
+        vs_market = np.where(has_price_per_sqm & has_market, np.round(raw_vs_market, 2), np.nan)
+        deal_type = np.select(
+            [np.isnan(vs_market) | (vs_market == 0), vs_market <= -15, vs_market <= -10, vs_market > 10],
+            [FAIR, HOT, GOOD, OVERPRICED], FAIR,
+        )
+
+        discount = (market_avg - price_per_sqm) / market_avg * 100
+        scored = (price != 0) & ~np.isnan(price) & has_price_per_sqm & has_market
+        price_points = np.select(
+            [discount >= 20, discount >= 15, discount >= 10, discount >= 5, discount < -10, discount < 0],
+            [40, 30, 20, 10, -20, -10], 0,
+        )
+        # Few distinct yields (city x type), so round those with Python's round() as the scalar path does
+        adjusted_yield = base_yield * type_multiplier
+        distinct, inverse = np.unique(adjusted_yield, return_inverse=True)
+        yield_percent = np.array([round(float(value), 2) for value in distinct], dtype=np.float64)[inverse]
+        yield_points = np.select(
+            [yield_percent >= 10, yield_percent >= 8, yield_percent >= 6, yield_percent >= 4],
+            [20, 15, 10, 5], 0,
+        )
+        score = np.clip(50 + np.where(scored, price_points, 0) + 15 + yield_points + 5, 0, 100)
+
+        rent = round_half_even(price * (adjusted_yield / 100) / 12, 2, lambda i: float(
+            round(_decimal(price[i]) * Decimal(str(adjusted_yield[i] / 100)) / 12, 2)))
+        exact = (
+            (_near_tie(raw_vs_market, 2) & ~np.isnan(vs_market))
+            | (_near(discount, (20, 15, 10, 5, 0, -10)) & scored)
+        )
+
+        return {
+            'price_per_sqm': price_per_sqm,
+            'price_vs_market_percent': vs_market,
+            'deal_type': deal_type,
+            'investment_score': score.astype(np.int64),
+            'estimated_monthly_rent': rent,
+            'estimated_annual_yield_percent': yield_percent,
+            'exact': exact,
+        }
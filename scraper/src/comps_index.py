@@ -0,0 +1,170 @@
+import math
+from decimal import Decimal
+from typing import Optional, Dict, Any, List, Tuple
+
+import numpy as np
+
+from config import settings, logger
+from database import db_manager
+from market_index import MarketMetrics
+
+EARTH_RADIUS_KM = 6371.0
+_KM_PER_DEGREE = math.pi * EARTH_RADIUS_KM / 180
+# Cell columns are offset by this much so (row, column) packs into one int64 key, row in the high bits
+_COLUMN_OFFSET = 1 << 20
+
+
+def _price(value: float) -> Decimal:
+    return round(Decimal(str(value)), 2)
+
+
+def _percentile(ordered: List[float], q: float) -> float:
+    """Linearly interpolated percentile of a sorted list (numpy's default method)"""
+    position = (len(ordered) - 1) * q
+    low = int(position)
+    high = min(low + 1, len(ordered) - 1)
+    return ordered[low] + (ordered[high] - ordered[low]) * (position - low)
+
+
+def haversine_km(lat: float, lon: float, lats: np.ndarray, lons: np.ndarray) -> np.ndarray:
+    """Great-circle distance in km from one point to many"""
+    lat, lon = math.radians(lat), math.radians(lon)
+    lats, lons = np.radians(lats), np.radians(lons)
+    a = np.sin((lats - lat) / 2) ** 2 + math.cos(lat) * np.cos(lats) * np.sin((lons - lon) / 2) ** 2
+    return 2 * EARTH_RADIUS_KM * np.arcsin(np.sqrt(np.minimum(a, 1.0)))
+
+
+class _Grid:
+    """Listings of one property type bucketed into lat/lon cells at least cell_km across.
+
+    Points are sorted by (row, column), so the three cells of a row that
+    surround a query point are one contiguous slice of the arrays.
+    """
+
+    __slots__ = ('lat_step', 'lon_step', 'cells', 'ids', 'lat', 'lon', 'size', 'price_per_sqm')
+
+    def __init__(self, ids: np.ndarray, lat: np.ndarray, lon: np.ndarray, size: np.ndarray,
+                 price_per_sqm: np.ndarray, cell_km: float):
+        self.lat_step = cell_km / _KM_PER_DEGREE
+        # A degree of longitude is shortest at the highest latitude; size columns for that
+        widest = min(float(np.abs(lat).max()), 89.0)
+        self.lon_step = self.lat_step / math.cos(math.radians(widest))
+        keys = self._keys(lat, lon)
+        order = np.argsort(keys, kind='stable')
+        keys = keys[order]
+        self.ids, self.lat, self.lon = ids[order], lat[order], lon[order]
+        self.size, self.price_per_sqm = size[order], price_per_sqm[order]
+        unique, starts, counts = np.unique(keys, return_index=True, return_counts=True)
+        self.cells: Dict[int, Tuple[int, int]] = dict(zip(
+            unique.tolist(), zip(starts.tolist(), (starts + counts).tolist())))
+
+    def _keys(self, lat, lon):
+        rows = np.floor(np.asarray(lat) / self.lat_step).astype(np.int64)
+        columns = np.floor(np.asarray(lon) / self.lon_step).astype(np.int64) + _COLUMN_OFFSET
+        return (rows << 21) | columns
+
+    def candidates(self, lat: float, lon: float) -> np.ndarray:
+        """Indexes of the points in the 3x3 cells around (lat, lon)"""
+        key = int(self._keys(lat, lon))
+        slices = []
+        for row in (key - (1 << 21), key, key + (1 << 21)):
+            spans = [self.cells[cell] for cell in (row - 1, row, row + 1) if cell in self.cells]
+            if spans:
+                slices.append(np.arange(spans[0][0], spans[-1][1]))
+        if not slices:
+            return np.empty(0, dtype=np.int64)
+        return np.concatenate(slices) if len(slices) > 1 else slices[0]
+
+
+class CompsIndex:
+    """Nearest comparable listings by location, for a comps-based price per sqm.
+
+    load() reads the active listings that have coordinates, a size and a price
+    per sqm once per run and buckets each property type into a grid of cells
+    radius_km across. A lookup scans the 3x3 cells around a listing, keeps
+    those within radius_km whose size is within size_tolerance (either way),
+    and summarizes the k nearest. Fewer than min_count comparables yields
+    None, so callers fall back to the market index.
+    """
+
+    def __init__(self, radius_km: float, k: int, size_tolerance: float, min_count: int):
+        self.radius_km = radius_km
+        self.k = k
+        self.size_tolerance = size_tolerance
+        self.min_count = min_count
+        self._grids: Dict[str, _Grid] = {}
+        self._count = 0
+
+    def __len__(self) -> int:
+        return self._count
+
+    def load(self) -> int:
+        """Rebuild the index from the database. Returns the number of listings indexed."""
+        if not settings.COMPS_ENABLED:
+            return 0
+        try:
+            rows = db_manager.load_comparables()
+        except Exception as e:
+            logger.error(f"Error loading comparables: {e}")
+            return 0
+        count = self.build(rows)
+        logger.info(f"Indexed {count} listings with coordinates for comparables")
+        return count
+
+    def build(self, rows: List[Tuple[str, Optional[str], float, float, float, float]]) -> int:
+        """Replace the index with (external_id, property_type_id, latitude, longitude, size_sqm, price_per_sqm) rows"""
+        grids = {}
+        if rows:
+            ids, types, lat, lon, size, price_per_sqm = zip(*rows)
+            codes: Dict[str, int] = {}
+            inverse = np.fromiter((codes.setdefault(t or '', len(codes)) for t in types),
+                                  dtype=np.int64, count=len(rows))
+            ids = np.array(ids, dtype=object)
+            lat, lon = np.array(lat, dtype=np.float64), np.array(lon, dtype=np.float64)
+            size, price_per_sqm = np.array(size, dtype=np.float64), np.array(price_per_sqm, dtype=np.float64)
+            for property_type_id, code in codes.items():
+                mask = inverse == code
+                grids[property_type_id] = _Grid(ids[mask], lat[mask], lon[mask], size[mask],
+                                                price_per_sqm[mask], self.radius_km)
+        self._grids, self._count = grids, len(rows)
+        return len(rows)
+
+    def lookup(self, latitude: Any, longitude: Any, property_type_id: Optional[str], size_sqm: Any,
+               exclude_external_id: Optional[str] = None) -> Optional[MarketMetrics]:
+        """Price-per-sqm metrics of the k nearest comparables, or None if there are fewer than min_count"""
+        grid = self._grids.get(property_type_id or '')
+        if grid is None or not latitude or not longitude or not size_sqm:
+            return None
+        lat, lon, size = float(latitude), float(longitude), float(size_sqm)
+        if size <= 0:
+            return None
+
+        found = grid.candidates(lat, lon)
+        low, high = size / (1 + self.size_tolerance), size * (1 + self.size_tolerance)
+        found = found[(grid.size[found] >= low) & (grid.size[found] <= high)]
+        distance = haversine_km(lat, lon, grid.lat[found], grid.lon[found])
+        near = distance <= self.radius_km
+        found, distance = found[near], distance[near]
+        if exclude_external_id is not None:
+            keep = grid.ids[found] != exclude_external_id
+            found, distance = found[keep], distance[keep]
+        if len(found) < self.min_count:
+            return None
+        if len(found) > self.k:
+            found = found[np.argpartition(distance, self.k - 1)[:self.k]]
+
+        # At most k values: plain Python beats numpy's per-call overhead here
+        prices = sorted(grid.price_per_sqm[found].tolist())
+        return MarketMetrics(
+            avg_price_per_sqm=_price(sum(prices) / len(prices)),
+            median_price_per_sqm=_price(_percentile(prices, 0.5)),
+            min_price_per_sqm=_price(prices[0]),
+            max_price_per_sqm=_price(prices[-1]),
+            sample_size=len(prices),
+            p10_price_per_sqm=_price(_percentile(prices, 0.1)),
+            p90_price_per_sqm=_price(_percentile(prices, 0.9)),
+        )
+
+
+comps_index = CompsIndex(settings.COMPS_RADIUS_KM, settings.COMPS_K, settings.COMPS_SIZE_TOLERANCE,
+                         settings.COMPS_MIN_COUNT)
@@ -1,30 +1,539 @@
 import os
-from typing import Optional, List, Dict, Any
+import time
+import hashlib
+import threading
+from typing import Optional, List, Dict, Any, Tuple
 from datetime import datetime
 from decimal import Decimal
 import json
 
 import psycopg2
-from psycopg2.extras import RealDictCursor
+from psycopg2 import extensions
+from psycopg2.extras import RealDictCursor, execute_values
+from psycopg2.pool import ThreadedConnectionPool, PoolError
 
 from config import settings, logger
+from quantile_sketch import QuantileSketch
+
+
+class ConnectionPool:
+    """Thread-safe psycopg2 pool that health-checks and recycles connections.
+
+    `min_size` connections stay open between uses; more are opened under
+    load up to `max_size` and closed again when returned. Callers block (up
+    to `timeout` seconds) when all `max_size` connections are checked out
+    instead of failing immediately. A connection that has
+    been idle longer than `health_check_after` is pinged before it is handed
+    out, and one older than `max_lifetime` is closed and replaced.
+    """
+
+    def __init__(self, dsn: str, min_size: int, max_size: int, max_lifetime: float,
+                 health_check_after: float, timeout: float):
+        self.max_lifetime = max_lifetime
+        self.health_check_after = health_check_after
+        self.timeout = timeout
+        self._pool = ThreadedConnectionPool(min_size, max_size, dsn, cursor_factory=RealDictCursor)
+        self._slots = threading.BoundedSemaphore(max_size)
+        self._max_size = max_size
+        self._lock = threading.Lock()
+        self._created_at: Dict[int, float] = {}
+        self._returned_at: Dict[int, float] = {}
+
+    def _discard(self, conn) -> None:
+        with self._lock:
+            self._created_at.pop(id(conn), None)
+            self._returned_at.pop(id(conn), None)
+        self._pool.putconn(conn, close=True)
+
+    def _is_healthy(self, conn) -> bool:
+        if conn.closed:
+            return False
+        now = time.monotonic()
+        with self._lock:
+            created = self._created_at.setdefault(id(conn), now)
+            returned = self._returned_at.get(id(conn), now)
+        if now - created > self.max_lifetime:
+            return False
+        if now - returned > self.health_check_after:
+            try:
+                with conn.cursor() as cursor:
+                    cursor.execute("SELECT 1")
+                conn.rollback()
+            except psycopg2.Error:
+                return False
+        return True
+
+    def getconn(self):
+        if not self._slots.acquire(timeout=self.timeout):
+            raise PoolError(f"No database connection available after {self.timeout}s")
+        try:
+            # Every pooled connection may be stale; one more try gets a fresh one
+            for _ in range(self._max_size + 1):
+                conn = self._pool.getconn()
+                if self._is_healthy(conn):
+                    return conn
+                self._discard(conn)
+            raise PoolError("Could not obtain a healthy database connection")
+        except Exception:
+            self._slots.release()
+            raise
+
+    def putconn(self, conn) -> None:
+        try:
+            broken = conn.closed != 0
+            if not broken and conn.info.transaction_status != extensions.TRANSACTION_STATUS_IDLE:
+                try:
+                    conn.rollback()
+                except psycopg2.Error:
+                    broken = True
+            if broken:
+                self._discard(conn)
+            else:
+                self._pool.putconn(conn)
+                with self._lock:
+                    if conn.closed:
+                        # Only min_size idle connections are kept; extras are closed
+                        self._created_at.pop(id(conn), None)
+                        self._returned_at.pop(id(conn), None)
+                    else:
+                        self._returned_at[id(conn)] = time.monotonic()
+        finally:
+            self._slots.release()
+
+    def closeall(self) -> None:
+        self._pool.closeall()
+        with self._lock:
+            self._created_at.clear()
+            self._returned_at.clear()
+
+
+# Columns written when a listing is inserted / refreshed when it is seen again
+PROPERTY_INSERT_FIELDS = [
+    'external_id', 'source_url', 'title', 'description', 'price', 'size_sqm',
+    'bedrooms', 'bathrooms', 'floor', 'building_age_years', 'furnished',
+    'full_address', 'latitude', 'longitude', 'price_per_sqm',
+    'district_avg_price_per_sqm', 'comps_avg_price_per_sqm', 'price_vs_market_percent', 'investment_score',
+    'deal_type', 'estimated_monthly_rent', 'estimated_annual_yield_percent',
+    'main_image_url', 'image_urls', 'contact_name', 'contact_phone',
+    'city_id', 'district_id', 'property_type_id', 'status', 'scraped_at', 'content_hash'
+]
+PROPERTY_UPDATE_FIELDS = [
+    'title', 'description', 'price', 'size_sqm', 'bedrooms', 'bathrooms',
+    'floor', 'building_age_years', 'furnished', 'full_address', 'latitude', 'longitude',
+    'price_per_sqm', 'district_avg_price_per_sqm', 'comps_avg_price_per_sqm', 'price_vs_market_percent',
+    'investment_score', 'deal_type', 'estimated_monthly_rent', 'estimated_annual_yield_percent',
+    'main_image_url', 'image_urls', 'contact_name', 'contact_phone',
+    'city_id', 'district_id', 'property_type_id', 'status', 'content_hash'
+]
+# Scraped fields that make up a listing's fingerprint. Analysis output is
+# left out: it drifts with market averages even when the listing is the same.
+FINGERPRINT_FIELDS = [
+    'source_url', 'title', 'description', 'price', 'size_sqm', 'bedrooms', 'bathrooms',
+    'floor', 'building_age_years', 'furnished', 'full_address', 'latitude', 'longitude',
+    'main_image_url', 'image_urls', 'contact_name', 'contact_phone',
+    'city_id', 'district', 'property_type',
+]
+
+
+def _fingerprint_value(value: Any) -> str:
+    if isinstance(value, Decimal):
+        return format(value.normalize(), 'f')
+    if isinstance(value, float):
+        return format(Decimal(str(value)).normalize(), 'f')
+    if isinstance(value, (list, tuple)):
+        return '\x1f'.join(_fingerprint_value(v) for v in value)
+    if isinstance(value, str):
+        return value.strip()
+    return str(value)
+
+
+def listing_fingerprint(listing: Dict[str, Any]) -> str:
+    """Stable hash of a listing's scraped content; empty and missing values hash alike"""
+    digest = hashlib.blake2b(digest_size=16)
+    for field in FINGERPRINT_FIELDS:
+        value = listing.get(field)
+        if value is None or value == '' or value == []:
+            continue
+        digest.update(field.encode())
+        digest.update(b'\x1e')
+        digest.update(_fingerprint_value(value).encode())
+        digest.update(b'\x1d')
+    return digest.hexdigest()
+
+
+# Property columns that place a listing in a market sketch
+MARKET_COLUMNS = "city_id, district_id, property_type_id, price_per_sqm, status"
+
+MarketSketchKey = Tuple[str, str, str]
+
+
+def _market_entry(row: Optional[Dict[str, Any]]) -> Optional[Tuple[MarketSketchKey, Decimal]]:
+    """Sketch key and price per sqm a stored property counts towards, None if it counts towards none.
+    A missing district or type is keyed as ''."""
+    if not row or row.get('status') != 'active' or not row.get('city_id'):
+        return None
+    price_per_sqm = row.get('price_per_sqm')
+    if not price_per_sqm or price_per_sqm <= 0:
+        return None
+    return (row['city_id'], row.get('district_id') or '', row.get('property_type_id') or ''), Decimal(price_per_sqm)
+
+
+def _sketch_row(key: MarketSketchKey, sketch: QuantileSketch, price_sum: Decimal) -> tuple:
+    quantiles = [sketch.quantile(q) for q in (0.1, 0.5, 0.9)]
+    return key + (psycopg2.Binary(sketch.to_bytes()), sketch.count, price_sum) + tuple(
+        round(value, 2) if value is not None else None for value in quantiles)
+
+
+def _slugify(name: str) -> str:
+    return name.lower().replace(' ', '-')
+
+
+class DimensionCache:
+    """In-process id lookup for cities, districts and property types.
+
+    Each dimension is loaded with one query (districts per city) and then
+    answered from memory. Names missing from the database are created with
+    one bulk insert per batch in resolve_listings().
+    """
+
+    def __init__(self, db: 'DatabaseManager'):
+        self.db = db
+        self._lock = threading.Lock()
+        self._cities: Optional[Dict[str, str]] = None
+        self._districts: Dict[str, Dict[str, str]] = {}
+        self._property_types: Optional[Dict[str, str]] = None
+        self._unresolved: set = set()
+
+    def clear(self) -> None:
+        with self._lock:
+            self._cities = None
+            self._districts = {}
+            self._property_types = None
+            self._unresolved = set()
+
+    def _load(self, sql: str, params: tuple = ()) -> Dict[str, str]:
+        """Map both slug and name_ar of every row to its id"""
+        conn = self.db.get_connection()
+        try:
+            cursor = conn.cursor()
+            cursor.execute(sql, params)
+            lookup = {}
+            for row in cursor.fetchall():
+                lookup[row['name_ar']] = row['id']
+                lookup[row['slug']] = row['id']
+            return lookup
+        finally:
+            self.db.release_connection(conn)
+
+    def preload_cities(self) -> None:
+        lookup = self._load("SELECT id, slug, name_ar FROM cities")
+        with self._lock:
+            self._cities = lookup
+
+    def preload_city(self, city_id: str) -> None:
+        lookup = self._load("SELECT id, slug, name_ar FROM districts WHERE city_id = %s", (city_id,))
+        with self._lock:
+            self._districts[city_id] = lookup
+
+    def preload_property_types(self) -> None:
+        lookup = self._load("SELECT id, slug, name_ar FROM property_types")
+        with self._lock:
+            self._property_types = lookup
+
+    def city_id(self, name: str, slug: str) -> Optional[str]:
+        with self._lock:
+            if self._cities is None:
+                return None
+            return self._cities.get(slug) or self._cities.get(name)
+
+    def district_id(self, city_id: str, name: str, slug: str) -> Optional[str]:
+        with self._lock:
+            lookup = self._districts.get(city_id)
+            if lookup is None:
+                return None
+            return lookup.get(slug) or lookup.get(name)
+
+    def property_type_id(self, slug: str) -> Optional[str]:
+        with self._lock:
+            if self._property_types is None:
+                return None
+            return self._property_types.get(slug)
+
+    def ids_for(self, city: str, district: Optional[str], property_type: Optional[str]) -> Tuple[Optional[str], ...]:
+        """Known (city_id, district_id, property_type_id) for names; unknown ones are None"""
+        city_id = self.city_id(city, _slugify(city)) if city else None
+        district_id = self.district_id(city_id, district, _slugify(district)) if city_id and district else None
+        type_id = self.property_type_id(_slugify(property_type)) if property_type else None
+        return city_id, district_id, type_id
+
+    def lookup_ids(self, city: str, district: Optional[str],
+                   property_type: Optional[str]) -> Tuple[Optional[str], ...]:
+        """ids_for, going to the database for anything the cache does not hold.
+
+        Dimensions not loaded yet are preloaded; names still missing are looked
+        up directly and remembered. A name the database does not know either
+        stays None, and is only looked up (and warned about) once per run.
+        """
+        try:
+            if city and self._cities is None:
+                self.preload_cities()
+            if property_type and self._property_types is None:
+                self.preload_property_types()
+            city_id, district_id, type_id = self.ids_for(city, district, property_type)
+            if city_id and district and district_id is None and city_id not in self._districts:
+                self.preload_city(city_id)
+                district_id = self.district_id(city_id, district, _slugify(district))
+            if (city and not city_id) or (district and not district_id) or (property_type and not type_id):
+                key = (city, district, property_type)
+                with self._lock:
+                    if key in self._unresolved:
+                        return city_id, district_id, type_id
+                    self._unresolved.add(key)
+                city_id, district_id, type_id = self._find_ids(city, district, property_type)
+                if (city and not city_id) or (district and not district_id) or (property_type and not type_id):
+                    logger.warning(f"No stored ids for city={city!r} district={district!r} "
+                                   f"type={property_type!r}; market metrics fall back to a broader group")
+            return city_id, district_id, type_id
+        except Exception as e:
+            logger.error(f"Error looking up dimension ids: {e}")
+            return self.ids_for(city, district, property_type)
+
+    def _find_ids(self, city: str, district: Optional[str],
+                  property_type: Optional[str]) -> Tuple[Optional[str], ...]:
+        """Look (city_id, district_id, property_type_id) up in the database and remember what is found"""
+        conn = self.db.get_connection()
+        try:
+            cursor = conn.cursor()
+            cursor.execute(
+                """
+                WITH c AS (SELECT id FROM cities WHERE slug = %s OR name_ar = %s LIMIT 1)
+                SELECT (SELECT id FROM c) AS city_id,
+                       (SELECT d.id FROM districts d JOIN c ON d.city_id = c.id
+                        WHERE d.slug = %s OR d.name_ar = %s LIMIT 1) AS district_id,
+                       (SELECT id FROM property_types WHERE slug = %s OR name_ar = %s LIMIT 1) AS type_id
+                """,
+                (_slugify(city) if city else None, city, _slugify(district) if district else None, district,
+                 _slugify(property_type) if property_type else None, property_type)
+            )
+            row = cursor.fetchone()
+        finally:
+            self.db.release_connection(conn)
+        if row['city_id']:
+            self.remember_city(city, _slugify(city), row['city_id'])
+        if row['district_id']:
+            self.remember_district(row['city_id'], district, _slugify(district), row['district_id'])
+        if row['type_id']:
+            self.remember_property_type(_slugify(property_type), row['type_id'])
+        return row['city_id'], row['district_id'], row['type_id']
+
+    def remember_city(self, name: str, slug: str, city_id: str) -> None:
+        with self._lock:
+            if self._cities is not None:
+                self._cities[name] = self._cities[slug] = city_id
+
+    def remember_district(self, city_id: str, name: str, slug: str, district_id: str) -> None:
+        with self._lock:
+            lookup = self._districts.get(city_id)
+            if lookup is not None:
+                lookup[name] = lookup[slug] = district_id
+
+    def remember_property_type(self, slug: str, type_id: str) -> None:
+        with self._lock:
+            if self._property_types is not None:
+                self._property_types[slug] = type_id
+
+    def _bulk_create(self, insert_sql: str, rows: List[tuple], template: str,
+                     select_sql: str, select_params: tuple) -> List[Dict[str, Any]]:
+        """Insert missing rows (ON CONFLICT DO NOTHING) and read back all of them"""
+        conn = self.db.get_connection()
+        try:
+            cursor = conn.cursor()
+            execute_values(cursor, insert_sql, rows, template=template)
+            cursor.execute(select_sql, select_params)
+            created = cursor.fetchall()
+            conn.commit()
+            return created
+        except Exception:
+            conn.rollback()
+            raise
+        finally:
+            self.db.release_connection(conn)
+
+    def resolve_listings(self, city_id: str, listings: List[Dict[str, Any]]) -> None:
+        """Set district_id / property_type_id on listings, creating missing rows in bulk"""
+        if city_id not in self._districts:
+            self.preload_city(city_id)
+        if self._property_types is None:
+            self.preload_property_types()
+
+        missing_districts: Dict[str, str] = {}
+        missing_types: Dict[str, str] = {}
+        for listing in listings:
+            name = listing.get('district')
+            if name and not self.district_id(city_id, name, _slugify(name)):
+                missing_districts.setdefault(_slugify(name), name)
+            ptype = listing.get('property_type')
+            if ptype and not self.property_type_id(_slugify(ptype)):
+                missing_types.setdefault(_slugify(ptype), ptype)
+
+        try:
+            if missing_districts:
+                rows = self._bulk_create(
+                    "INSERT INTO districts (id, city_id, name_ar, name_en, slug) VALUES %s "
+                    "ON CONFLICT (city_id, slug) DO NOTHING",
+                    [(city_id, name, name, slug) for slug, name in missing_districts.items()],
+                    "(gen_random_uuid(), %s, %s, %s, %s)",
+                    "SELECT id, slug, name_ar FROM districts WHERE city_id = %s AND slug = ANY(%s)",
+                    (city_id, list(missing_districts.keys())),
+                )
+                for row in rows:
+                    self.remember_district(city_id, row['name_ar'], row['slug'], row['id'])
+                    name = missing_districts.get(row['slug'])
+                    if name:
+                        self.remember_district(city_id, name, row['slug'], row['id'])
+            if missing_types:
+                rows = self._bulk_create(
+                    "INSERT INTO property_types (id, name_ar, name_en, slug) VALUES %s "
+                    "ON CONFLICT (slug) DO NOTHING",
+                    [(name, name, slug) for slug, name in missing_types.items()],
+                    "(gen_random_uuid(), %s, %s, %s)",
+                    "SELECT id, slug, name_ar FROM property_types WHERE slug = ANY(%s)",
+                    (list(missing_types.keys()),),
+                )
+                for row in rows:
+                    self.remember_property_type(row['slug'], row['id'])
+        except Exception as e:
+            logger.error(f"Error creating districts/property types: {e}")
+
+        for listing in listings:
+            name = listing.get('district')
+            if name:
+                district_id = self.district_id(city_id, name, _slugify(name))
+                if district_id:
+                    listing['district_id'] = district_id
+            ptype = listing.get('property_type')
+            if ptype:
+                type_id = self.property_type_id(_slugify(ptype))
+                if type_id:
+                    listing['property_type_id'] = type_id
 
 
 class DatabaseManager:
     def __init__(self):
         self.database_url = settings.DATABASE_URL
+        self._pool: Optional[ConnectionPool] = None
+        self._pool_lock = threading.Lock()
+        self.dimensions = DimensionCache(self)
+        # external_id -> fingerprint digest of stored listings; None until loaded
+        self.fingerprints: Optional[Dict[str, bytes]] = None
+        self._fingerprints_lock = threading.Lock()
+
+    @property
+    def pool(self) -> ConnectionPool:
+        # Created lazily so importing this module never opens a connection
+        if self._pool is None:
+            with self._pool_lock:
+                if self._pool is None:
+                    self._pool = ConnectionPool(
+                        self.database_url,
+                        min_size=settings.DB_POOL_MIN_SIZE,
+                        max_size=settings.DB_POOL_MAX_SIZE,
+                        max_lifetime=settings.DB_POOL_MAX_LIFETIME_SECONDS,
+                        health_check_after=settings.DB_POOL_HEALTH_CHECK_SECONDS,
+                        timeout=settings.DB_POOL_TIMEOUT_SECONDS,
+                    )
+        return self._pool
 
     def get_connection(self):
-        return psycopg2.connect(self.database_url, cursor_factory=RealDictCursor)
+        """Check out a pooled connection; hand it back with release_connection()"""
+        return self.pool.getconn()
+
+    def release_connection(self, conn) -> None:
+        self.pool.putconn(conn)
+
+    def close(self) -> None:
+        with self._pool_lock:
+            if self._pool is not None:
+                self._pool.closeall()
+                self._pool = None
+
+    def load_fingerprints(self) -> int:
+        """Load external_id -> fingerprint digest for every fingerprinted row"""
+        conn = self.get_connection()
+        try:
+            fingerprints: Dict[str, bytes] = {}
+            # Server-side cursor so the whole table is never materialised at once
+            with conn.cursor(name='load_fingerprints', cursor_factory=psycopg2.extensions.cursor) as cursor:
+                cursor.itersize = 10000
+                cursor.execute(
+                    "SELECT external_id, content_hash FROM properties "
+                    "WHERE external_id IS NOT NULL AND content_hash IS NOT NULL"
+                )
+                for external_id, content_hash in cursor:
+                    fingerprints[external_id] = bytes.fromhex(content_hash)
+            conn.commit()
+            with self._fingerprints_lock:
+                self.fingerprints = fingerprints
+            logger.info(f"Loaded {len(fingerprints)} listing fingerprints")
+            return len(fingerprints)
+        except Exception as e:
+            conn.rollback()
+            logger.error(f"Error loading listing fingerprints: {e}")
+            return 0
+        finally:
+            self.release_connection(conn)
+
+    def load_comparables(self) -> List[Tuple[str, Optional[str], float, float, float, float]]:
+        """(external_id, property_type_id, latitude, longitude, size_sqm, price_per_sqm) of every
+        active listing with coordinates, a size and a price per sqm"""
+        conn = self.get_connection()
+        try:
+            with conn.cursor(name='load_comparables', cursor_factory=psycopg2.extensions.cursor) as cursor:
+                cursor.itersize = 10000
+                cursor.execute(
+                    """
+                    SELECT external_id, property_type_id, latitude::float8, longitude::float8,
+                           size_sqm::float8, price_per_sqm::float8
+                    FROM properties
+                    WHERE status = 'active' AND latitude IS NOT NULL AND longitude IS NOT NULL
+                      AND size_sqm > 0 AND price_per_sqm > 0
+                    """
+                )
+                rows = list(cursor)
+            conn.commit()
+            return rows
+        finally:
+            self.release_connection(conn)
+
+    def touch_properties(self, external_ids: List[str]) -> int:
+        """Mark listings as seen without rewriting them"""
+        if not external_ids:
+            return 0
+        conn = self.get_connection()
+        try:
+            cursor = conn.cursor()
+            cursor.execute(
+                "UPDATE properties SET last_seen_at = NOW() WHERE external_id = ANY(%s)",
+                (list(external_ids),)
+            )
+            conn.commit()
+            return cursor.rowcount
+        except Exception as e:
+            conn.rollback()
+            logger.error(f"Error touching {len(external_ids)} properties: {e}")
+            return 0
+        finally:
+            self.release_connection(conn)
 
     def save_property(self, listing: Dict[str, Any]) -> tuple:
         """Save or update a property. Returns (success, action)"""
+        listing['content_hash'] = listing_fingerprint(listing)
         conn = self.get_connection()
         try:
             cursor = conn.cursor()
 
             cursor.execute(
-                "SELECT id, price FROM properties WHERE external_id = %s",
+                f"SELECT id, price, {MARKET_COLUMNS} FROM properties WHERE external_id = %s FOR UPDATE",
                 (listing.get('external_id'),)
             )
             existing = cursor.fetchone()
@@ -33,16 +542,7 @@ class DatabaseManager:
                 update_fields = []
                 values = []
 
-                updatable = [
-                    'title', 'description', 'price', 'size_sqm', 'bedrooms', 'bathrooms',
-                    'floor', 'building_age_years', 'furnished', 'full_address', 'latitude', 'longitude',
-                    'price_per_sqm', 'district_avg_price_per_sqm', 'price_vs_market_percent',
-                    'investment_score', 'deal_type', 'estimated_monthly_rent', 'estimated_annual_yield_percent',
-                    'main_image_url', 'image_urls', 'contact_name', 'contact_phone',
-                    'city_id', 'district_id', 'property_type_id', 'status'
-                ]
-
-                for field in updatable:
+                for field in PROPERTY_UPDATE_FIELDS:
                     if field in listing and listing[field] is not None:
                         update_fields.append(f"{field} = %s")
                         val = listing[field]
@@ -59,10 +559,11 @@ class DatabaseManager:
                     UPDATE properties
                     SET {', '.join(update_fields)}
                     WHERE external_id = %s
-                    RETURNING id
+                    RETURNING id, {MARKET_COLUMNS}
                 """
                 cursor.execute(sql, values)
                 result = cursor.fetchone()
+                self._apply_market_deltas(cursor, [(existing, result)])
 
                 old_price = existing.get('price')
                 new_price = listing.get('price')
@@ -75,17 +576,7 @@ class DatabaseManager:
                 conn.commit()
                 return True, 'updated'
             else:
-                fields = [
-                    'external_id', 'source_url', 'title', 'description', 'price', 'size_sqm',
-                    'bedrooms', 'bathrooms', 'floor', 'building_age_years', 'furnished',
-                    'full_address', 'latitude', 'longitude', 'price_per_sqm',
-                    'district_avg_price_per_sqm', 'price_vs_market_percent', 'investment_score',
-                    'deal_type', 'estimated_monthly_rent', 'estimated_annual_yield_percent',
-                    'main_image_url', 'image_urls', 'contact_name', 'contact_phone',
-                    'city_id', 'district_id', 'property_type_id', 'status', 'scraped_at'
-                ]
-
-                present_fields = ['id'] + [f for f in fields if f in listing and listing[f] is not None]
+                present_fields = ['id'] + [f for f in PROPERTY_INSERT_FIELDS if f in listing and listing[f] is not None]
                 present_fields.append('updated_at')
 
                 placeholders = ['gen_random_uuid()'] + ['%s'] * (len(present_fields) - 2) + ['NOW()']
@@ -102,10 +593,11 @@ class DatabaseManager:
                 sql = f"""
                     INSERT INTO properties ({', '.join(present_fields)})
                     VALUES ({', '.join(placeholders)})
-                    RETURNING id
+                    RETURNING id, {MARKET_COLUMNS}
                 """
                 cursor.execute(sql, values)
                 result = cursor.fetchone()
+                self._apply_market_deltas(cursor, [(None, result)])
 
                 if result and listing.get('price'):
                     cursor.execute(
@@ -121,17 +613,160 @@ class DatabaseManager:
             logger.error(f"Error saving property {listing.get('external_id')}: {e}")
             return False, 'error'
         finally:
-            conn.close()
+            self.release_connection(conn)
+
+    def save_properties_batch(self, listings: List[Dict[str, Any]]) -> List[Tuple[bool, str]]:
+        """Upsert many properties in a few round trips.
+
+        Returns one (success, action) tuple per input listing, where action is
+        'created', 'updated', 'unchanged' or 'error'. Like save_property,
+        None values never overwrite stored data. Status is only written when a
+        row is inserted ('active' unless the listing sets one), so rows marked
+        sold or hidden stay that way. A listing whose fingerprint
+        matches the stored one is 'unchanged' and only gets last_seen_at
+        refreshed; once load_fingerprints() has run that check happens in
+        memory and those rows never reach the upsert. Market sketches are
+        adjusted in the same transaction for every row written.
+        """
+        results: List[Tuple[bool, str]] = [(False, 'error')] * len(listings)
+        # ON CONFLICT cannot touch the same row twice in one statement: last copy wins
+        batch: Dict[str, Dict[str, Any]] = {}
+        for listing in listings:
+            if listing.get('external_id'):
+                listing['content_hash'] = listing_fingerprint(listing)
+                batch[listing['external_id']] = listing
+        if not batch:
+            return results
+
+        known = self.fingerprints
+        actions: Optional[Dict[str, str]] = {}
+        changed: Dict[str, Dict[str, Any]] = {}
+        for ext_id, listing in batch.items():
+            stored = known.get(ext_id) if known is not None else None
+            if stored and stored == bytes.fromhex(listing['content_hash']):
+                actions[ext_id] = 'unchanged'
+            else:
+                changed[ext_id] = listing
+
+        def _value(listing: Dict[str, Any], field: str):
+            value = listing.get(field)
+            if field == 'furnished' and value is not None and not isinstance(value, bool):
+                value = bool(value)
+            return value
+
+        # Insert-only defaults: EXCLUDED carries the defaulted value, so these columns are left out of the update
+        defaults = {'status': "'active'", 'scraped_at': 'NOW()'}
+        template = '(gen_random_uuid(), ' + ', '.join(
+            f"COALESCE(%s, {defaults[f]})" if f in defaults else '%s' for f in PROPERTY_INSERT_FIELDS
+        ) + ', NOW())'
+        update_fields = [f for f in PROPERTY_UPDATE_FIELDS if f not in defaults]
+        upsert_sql = f"""
+            INSERT INTO properties (id, {', '.join(PROPERTY_INSERT_FIELDS)}, updated_at)
+            VALUES %s
+            ON CONFLICT (external_id) DO UPDATE
+            SET {', '.join(f"{f} = COALESCE(EXCLUDED.{f}, properties.{f})" for f in update_fields)},
+                last_seen_at = NOW(), updated_at = NOW()
+            WHERE properties.content_hash IS DISTINCT FROM EXCLUDED.content_hash
+            RETURNING id, external_id, (xmax = 0) AS inserted, {MARKET_COLUMNS}
+        """
+
+        conn = self.get_connection()
+        try:
+            cursor = conn.cursor()
+            existing = {}
+            if changed:
+                # Stored rows are locked (in a fixed order) so concurrent savers adjust sketches from the same values
+                cursor.execute(
+                    f"""
+                    SELECT external_id, price, {MARKET_COLUMNS} FROM properties
+                    WHERE external_id = ANY(%s) ORDER BY external_id FOR UPDATE
+                    """,
+                    (list(changed),)
+                )
+                existing = {row['external_id']: row for row in cursor.fetchall()}
+
+                # Same key order as the SELECT above, so overlapping batches take unique-index locks in one order
+                rows = [tuple(_value(changed[ext_id], f) for f in PROPERTY_INSERT_FIELDS) for ext_id in sorted(changed)]
+                written = execute_values(cursor, upsert_sql, rows, template=template,
+                                         page_size=len(rows), fetch=True)
+            else:
+                written = []
+
+            history = []
+            market_changes = []
+            for row in written:
+                listing = batch[row['external_id']]
+                new_price = listing.get('price')
+                old = existing.get(row['external_id'])
+                if row['inserted']:
+                    actions[row['external_id']] = 'created'
+                    market_changes.append((None, row))
+                    if new_price:
+                        history.append((row['id'], new_price, listing.get('price_per_sqm'), 'initial_scrape'))
+                else:
+                    actions[row['external_id']] = 'updated'
+                    # Without the old values (inserted concurrently since the SELECT) the next rebuild catches up
+                    if old is not None:
+                        market_changes.append((old, row))
+                    old_price = old['price'] if old else None
+                    if old_price and new_price and old_price != new_price:
+                        history.append((row['id'], new_price, listing.get('price_per_sqm'), 'scraper_update'))
+            self._apply_market_deltas(cursor, market_changes)
+
+            unchanged = [ext_id for ext_id in batch if actions.get(ext_id, 'unchanged') == 'unchanged']
+            if unchanged:
+                cursor.execute(
+                    "UPDATE properties SET last_seen_at = NOW() WHERE external_id = ANY(%s)",
+                    (unchanged,)
+                )
+                for ext_id in unchanged:
+                    actions[ext_id] = 'unchanged'
+
+            if history:
+                execute_values(
+                    cursor,
+                    "INSERT INTO price_history (id, property_id, price, price_per_sqm, source) VALUES %s",
+                    history,
+                    template="(gen_random_uuid(), %s, %s, %s, %s)",
+                )
+
+            conn.commit()
+        except Exception as e:
+            conn.rollback()
+            logger.error(f"Batch save of {len(batch)} properties failed, saving one by one: {e}")
+            actions = None
+        finally:
+            self.release_connection(conn)
+
+        if actions is None:
+            return [self.save_property(listing) if listing.get('external_id') else (False, 'error')
+                    for listing in listings]
+
+        if known is not None:
+            with self._fingerprints_lock:
+                for ext_id, action in actions.items():
+                    if action in ('created', 'updated'):
+                        listing = batch[ext_id]
+                        known[ext_id] = bytes.fromhex(listing['content_hash'])
+
+        for i, listing in enumerate(listings):
+            action = actions.get(listing.get('external_id'))
+            if action:
+                results[i] = (True, action)
+        return results
 
     def get_or_create_city(self, city_name: str, city_slug: str = None,
                            name_en: str = None, region: str = None,
                            priority: int = 0) -> Optional[str]:
+        slug = city_slug or _slugify(city_name)
+        cached = self.dimensions.city_id(city_name, slug)
+        if cached:
+            return cached
+
         conn = self.get_connection()
         try:
             cursor = conn.cursor()
 
-            slug = city_slug or city_name.lower().replace(' ', '-')
-
             cursor.execute(
                 "SELECT id FROM cities WHERE slug = %s OR name_ar = %s",
                 (slug, city_name)
@@ -139,6 +774,7 @@ class DatabaseManager:
             result = cursor.fetchone()
 
             if result:
+                self.dimensions.remember_city(city_name, slug, result['id'])
                 return result['id']
 
             cursor.execute(
@@ -154,6 +790,7 @@ class DatabaseManager:
             conn.commit()
 
             if result:
+                self.dimensions.remember_city(city_name, slug, result['id'])
                 return result['id']
 
             cursor.execute("SELECT id FROM cities WHERE slug = %s", (slug,))
@@ -165,15 +802,18 @@ class DatabaseManager:
             logger.error(f"Error getting/creating city {city_name}: {e}")
             return None
         finally:
-            conn.close()
+            self.release_connection(conn)
 
     def get_or_create_district(self, city_id: str, district_name: str, district_slug: str = None) -> Optional[str]:
+        slug = district_slug or _slugify(district_name)
+        cached = self.dimensions.district_id(city_id, district_name, slug)
+        if cached:
+            return cached
+
         conn = self.get_connection()
         try:
             cursor = conn.cursor()
 
-            slug = district_slug or district_name.lower().replace(' ', '-')
-
             cursor.execute(
                 "SELECT id FROM districts WHERE city_id = %s AND (slug = %s OR name_ar = %s)",
                 (city_id, slug, district_name)
@@ -181,6 +821,7 @@ class DatabaseManager:
             result = cursor.fetchone()
 
             if result:
+                self.dimensions.remember_district(city_id, district_name, slug, result['id'])
                 return result['id']
 
             cursor.execute(
@@ -196,6 +837,7 @@ class DatabaseManager:
             conn.commit()
 
             if result:
+                self.dimensions.remember_district(city_id, district_name, slug, result['id'])
                 return result['id']
 
             cursor.execute(
@@ -210,17 +852,22 @@ class DatabaseManager:
             logger.error(f"Error getting/creating district {district_name}: {e}")
             return None
         finally:
-            conn.close()
+            self.release_connection(conn)
 
     def get_or_create_property_type(self, type_name: str, type_slug: str = None) -> Optional[str]:
+        slug = type_slug or _slugify(type_name)
+        cached = self.dimensions.property_type_id(slug)
+        if cached:
+            return cached
+
         conn = self.get_connection()
         try:
             cursor = conn.cursor()
-            slug = type_slug or type_name.lower().replace(' ', '-')
 
             cursor.execute("SELECT id FROM property_types WHERE slug = %s", (slug,))
             result = cursor.fetchone()
             if result:
+                self.dimensions.remember_property_type(slug, result['id'])
                 return result['id']
 
             cursor.execute(
@@ -236,6 +883,7 @@ class DatabaseManager:
             conn.commit()
 
             if result:
+                self.dimensions.remember_property_type(slug, result['id'])
                 return result['id']
 
             cursor.execute("SELECT id FROM property_types WHERE slug = %s", (slug,))
@@ -247,38 +895,405 @@ class DatabaseManager:
             logger.error(f"Error getting/creating property type {type_name}: {e}")
             return None
         finally:
-            conn.close()
+            self.release_connection(conn)
 
     def log_scraper_job(self, city_id: str, status: str, properties_found: int = 0,
                         properties_new: int = 0, properties_updated: int = 0,
-                        error_message: str = None) -> None:
+                        error_message: str = None, run_id: str = None) -> None:
         conn = self.get_connection()
         try:
             cursor = conn.cursor()
             cursor.execute(
                 """
-                INSERT INTO scraper_jobs (id, city_id, status, properties_found, properties_new, properties_updated, error_message, completed_at)
-                VALUES (gen_random_uuid(), %s, %s, %s, %s, %s, %s, NOW())
+                INSERT INTO scraper_jobs (id, city_id, status, properties_found, properties_new, properties_updated, error_message, run_id, completed_at)
+                VALUES (gen_random_uuid(), %s, %s, %s, %s, %s, %s, %s, NOW())
                 """,
-                (city_id, status, properties_found, properties_new, properties_updated, error_message)
+                (city_id, status, properties_found, properties_new, properties_updated, error_message, run_id)
             )
             conn.commit()
         except Exception as e:
             conn.rollback()
             logger.error(f"Error logging scraper job: {e}")
         finally:
-            conn.close()
+            self.release_connection(conn)
+
+    def start_scraper_run(self, resume_window_hours: float) -> Tuple[Optional[str], bool]:
+        """Resume the latest unfinished run started within the window, or start a new one.
+        Returns (run_id, resumed)."""
+        conn = self.get_connection()
+        try:
+            cursor = conn.cursor()
+            cursor.execute(
+                """
+                SELECT id FROM scraper_runs
+                WHERE status = 'running' AND NOT queue AND started_at > NOW() - make_interval(secs => %s)
+                ORDER BY started_at DESC LIMIT 1
+                """,
+                (resume_window_hours * 3600,)
+            )
+            row = cursor.fetchone()
+            if row:
+                conn.commit()
+                return row['id'], True
+            # Older unfinished runs are never resumed once a newer run exists. Queue runs are
+            # left to their nodes, which may still be working them
+            cursor.execute("UPDATE scraper_runs SET status = 'abandoned' WHERE status = 'running' AND NOT queue")
+            cursor.execute(
+                "INSERT INTO scraper_runs (id, status) VALUES (gen_random_uuid(), 'running') RETURNING id"
+            )
+            run_id = cursor.fetchone()['id']
+            conn.commit()
+            return run_id, False
+        except Exception as e:
+            conn.rollback()
+            logger.error(f"Error starting scraper run: {e}")
+            return None, False
+        finally:
+            self.release_connection(conn)
+
+    def complete_scraper_run(self, run_id: str) -> None:
+        conn = self.get_connection()
+        try:
+            cursor = conn.cursor()
+            cursor.execute(
+                "UPDATE scraper_runs SET status = 'completed', completed_at = NOW() WHERE id = %s",
+                (run_id,)
+            )
+            conn.commit()
+        except Exception as e:
+            conn.rollback()
+            logger.error(f"Error completing scraper run: {e}")
+        finally:
+            self.release_connection(conn)
+
+    def load_checkpoints(self, run_id: str, window_hours: float) -> Dict[Tuple[str, str], Tuple[str, int]]:
+        """(source, city_id) -> (status, last_page) for this run's frontier, plus
+        every pair finished by a run that started within the window"""
+        conn = self.get_connection()
+        try:
+            cursor = conn.cursor()
+            cursor.execute(
+                """
+                SELECT DISTINCT ON (cp.source, cp.city_id) cp.source, cp.city_id, cp.status, cp.last_page
+                FROM crawl_checkpoints cp
+                JOIN scraper_runs r ON r.id = cp.run_id
+                WHERE cp.run_id = %s
+                   OR (cp.status = 'done' AND r.started_at > NOW() - make_interval(secs => %s))
+                ORDER BY cp.source, cp.city_id, (cp.status = 'done') DESC, cp.updated_at DESC
+                """,
+                (run_id, window_hours * 3600)
+            )
+            return {(row['source'], row['city_id']): (row['status'], row['last_page'])
+                    for row in cursor.fetchall()}
+        except Exception as e:
+            logger.error(f"Error loading crawl checkpoints: {e}")
+            return {}
+        finally:
+            self.release_connection(conn)
+
+    def save_checkpoint(self, run_id: str, source: str, city_id: str, last_page: int,
+                        status: str = 'running') -> None:
+        """Record that `last_page` of (source, city) has been written in this run"""
+        conn = self.get_connection()
+        try:
+            cursor = conn.cursor()
+            cursor.execute(
+                """
+                INSERT INTO crawl_checkpoints (id, run_id, source, city_id, last_page, status, updated_at)
+                VALUES (gen_random_uuid(), %s, %s, %s, %s, %s, NOW())
+                ON CONFLICT (run_id, source, city_id) DO UPDATE SET
+                    last_page = GREATEST(crawl_checkpoints.last_page, EXCLUDED.last_page),
+                    status = EXCLUDED.status,
+                    updated_at = NOW()
+                """,
+                (run_id, source, city_id, last_page, status)
+            )
+            conn.commit()
+        except Exception as e:
+            conn.rollback()
+            logger.error(f"Error saving checkpoint for {source}/{city_id}: {e}")
+        finally:
+            self.release_connection(conn)
+
+    def join_queue_run(self, window_hours: float) -> Tuple[Optional[str], bool]:
+        """Run that work-queue nodes share: the running one from this interval, or a new one.
+        Returns (run_id, created); run_id is None when this interval's run already completed."""
+        conn = self.get_connection()
+        try:
+            cursor = conn.cursor()
+            # Serialise nodes starting together so they all join the same run
+            cursor.execute("SELECT pg_advisory_xact_lock(hashtext('scraper_runs'))")
+            cursor.execute(
+                """
+                SELECT id, status FROM scraper_runs
+                WHERE status IN ('running', 'completed') AND queue AND started_at > NOW() - make_interval(secs => %s)
+                ORDER BY started_at DESC LIMIT 1
+                """,
+                (window_hours * 3600,)
+            )
+            row = cursor.fetchone()
+            if row:
+                conn.commit()
+                return (row['id'] if row['status'] == 'running' else None), False
+            cursor.execute("UPDATE scraper_runs SET status = 'abandoned' WHERE status = 'running' AND queue")
+            cursor.execute(
+                "INSERT INTO scraper_runs (id, status, queue) VALUES (gen_random_uuid(), 'running', true) RETURNING id"
+            )
+            run_id = cursor.fetchone()['id']
+            conn.commit()
+            return run_id, True
+        except Exception as e:
+            conn.rollback()
+            logger.error(f"Error joining queue run: {e}")
+            return None, False
+        finally:
+            self.release_connection(conn)
+
+    def enqueue_scrape_tasks(self, run_id: str, tasks: List[Tuple[str, str, int, int, int]]) -> int:
+        """Queue (source, city, start_page, end_page, max_pages) tasks; existing ones are left alone"""
+        conn = self.get_connection()
+        try:
+            cursor = conn.cursor()
+            execute_values(
+                cursor,
+                """
+                INSERT INTO scrape_tasks (id, run_id, source, city, start_page, end_page, max_pages, updated_at)
+                VALUES %s
+                ON CONFLICT (run_id, source, city, start_page) DO NOTHING
+                """,
+                [(run_id,) + tuple(task) for task in tasks],
+                template="(gen_random_uuid(), %s, %s, %s, %s, %s, %s, NOW())"
+            )
+            conn.commit()
+            return cursor.rowcount
+        except Exception as e:
+            conn.rollback()
+            logger.error(f"Error enqueuing scrape tasks: {e}")
+            return 0
+        finally:
+            self.release_connection(conn)
+
+    def claim_scrape_task(self, run_id: str, worker_id: str, sources: List[str], lease_seconds: float,
+                          max_attempts: int) -> Optional[Dict[str, Any]]:
+        """Lease the next pending task for one of `sources`, or one whose holder's lease ran out.
+        SKIP LOCKED lets any number of workers claim concurrently without blocking."""
+        conn = self.get_connection()
+        try:
+            cursor = conn.cursor()
+            cursor.execute(
+                """
+                UPDATE scrape_tasks SET
+                    status = 'claimed', worker_id = %s, attempts = attempts + 1,
+                    lease_expires_at = NOW() + make_interval(secs => %s), updated_at = NOW()
+                WHERE id = (
+                    SELECT id FROM scrape_tasks
+                    WHERE run_id = %s AND source = ANY(%s) AND attempts < %s
+                      AND (status = 'pending' OR (status = 'claimed' AND lease_expires_at < NOW()))
+                    ORDER BY start_page, created_at
+                    LIMIT 1
+                    FOR UPDATE SKIP LOCKED
+                )
+                RETURNING id, source, city, start_page, end_page, max_pages, last_page, attempts, results
+                """,
+                (worker_id, lease_seconds, run_id, list(sources), max_attempts)
+            )
+            task = cursor.fetchone()
+            conn.commit()
+            return dict(task) if task else None
+        except Exception as e:
+            conn.rollback()
+            logger.error(f"Error claiming scrape task: {e}")
+            return None
+        finally:
+            self.release_connection(conn)
+
+    def renew_scrape_leases(self, worker_ids: List[str], lease_seconds: float) -> int:
+        """Heartbeat: extend the leases of every task these workers hold"""
+        conn = self.get_connection()
+        try:
+            cursor = conn.cursor()
+            cursor.execute(
+                """
+                UPDATE scrape_tasks SET lease_expires_at = NOW() + make_interval(secs => %s)
+                WHERE status = 'claimed' AND worker_id = ANY(%s)
+                """,
+                (lease_seconds, list(worker_ids))
+            )
+            conn.commit()
+            return cursor.rowcount
+        except Exception as e:
+            conn.rollback()
+            logger.error(f"Error renewing scrape leases: {e}")
+            return 0
+        finally:
+            self.release_connection(conn)
+
+    def record_task_progress(self, task_id: str, worker_id: str, last_page: int, lease_seconds: float,
+                             results: Dict[str, Dict[str, int]]) -> bool:
+        """Store the last page written and the task's per-city counts so far, and renew the lease.
+        False if the task was taken over."""
+        conn = self.get_connection()
+        try:
+            cursor = conn.cursor()
+            cursor.execute(
+                """
+                UPDATE scrape_tasks SET
+                    last_page = %s, results = %s::jsonb,
+                    lease_expires_at = NOW() + make_interval(secs => %s), updated_at = NOW()
+                WHERE id = %s AND worker_id = %s AND status = 'claimed'
+                """,
+                (last_page, json.dumps(results), lease_seconds, task_id, worker_id)
+            )
+            conn.commit()
+            return cursor.rowcount == 1
+        except Exception as e:
+            conn.rollback()
+            logger.error(f"Error recording progress for task {task_id}: {e}")
+            return False
+        finally:
+            self.release_connection(conn)
+
+    def complete_scrape_task(self, task_id: str, worker_id: str, results: Dict[str, Dict[str, int]],
+                             next_task: Optional[Tuple[str, str, int, int, int]] = None) -> bool:
+        """Mark a task done with its per-city counts and queue its follow-on page range in the same transaction"""
+        conn = self.get_connection()
+        try:
+            cursor = conn.cursor()
+            cursor.execute(
+                """
+                UPDATE scrape_tasks SET
+                    status = 'done', results = %s::jsonb, lease_expires_at = NULL, updated_at = NOW()
+                WHERE id = %s AND worker_id = %s AND status = 'claimed'
+                RETURNING run_id
+                """,
+                (json.dumps(results), task_id, worker_id)
+            )
+            row = cursor.fetchone()
+            if row and next_task:
+                cursor.execute(
+                    """
+                    INSERT INTO scrape_tasks (id, run_id, source, city, start_page, end_page, max_pages, updated_at)
+                    VALUES (gen_random_uuid(), %s, %s, %s, %s, %s, %s, NOW())
+                    ON CONFLICT (run_id, source, city, start_page) DO NOTHING
+                    """,
+                    (row['run_id'],) + tuple(next_task)
+                )
+            conn.commit()
+            return row is not None
+        except Exception as e:
+            conn.rollback()
+            logger.error(f"Error completing task {task_id}: {e}")
+            return False
+        finally:
+            self.release_connection(conn)
+
+    def release_scrape_task(self, task_id: str, worker_id: str, max_attempts: int,
+                            results: Dict[str, Dict[str, int]]) -> None:
+        """Hand a failed task back to the queue, or fail it once it is out of attempts"""
+        conn = self.get_connection()
+        try:
+            cursor = conn.cursor()
+            cursor.execute(
+                """
+                UPDATE scrape_tasks SET
+                    status = CASE WHEN attempts >= %s THEN 'failed' ELSE 'pending' END,
+                    results = %s::jsonb, worker_id = NULL, lease_expires_at = NULL, updated_at = NOW()
+                WHERE id = %s AND worker_id = %s AND status = 'claimed'
+                """,
+                (max_attempts, json.dumps(results), task_id, worker_id)
+            )
+            conn.commit()
+        except Exception as e:
+            conn.rollback()
+            logger.error(f"Error releasing task {task_id}: {e}")
+        finally:
+            self.release_connection(conn)
+
+    def finish_queue_run(self, run_id: str, max_attempts: int) -> Tuple[Optional[str], bool]:
+        """Complete the run once no task is pending or leased.
+        Returns (run status, whether this call completed it)."""
+        conn = self.get_connection()
+        try:
+            cursor = conn.cursor()
+            # Tasks whose lease lapsed on their last attempt will never be claimed again
+            cursor.execute(
+                """
+                UPDATE scrape_tasks SET status = 'failed', updated_at = NOW()
+                WHERE run_id = %s AND status = 'claimed' AND lease_expires_at < NOW() AND attempts >= %s
+                """,
+                (run_id, max_attempts)
+            )
+            cursor.execute(
+                """
+                UPDATE scraper_runs SET status = 'completed', completed_at = NOW()
+                WHERE id = %s AND status = 'running' AND NOT EXISTS (
+                    SELECT 1 FROM scrape_tasks WHERE run_id = %s AND status IN ('pending', 'claimed')
+                )
+                RETURNING status
+                """,
+                (run_id, run_id)
+            )
+            completed = cursor.fetchone() is not None
+            cursor.execute("SELECT status FROM scraper_runs WHERE id = %s", (run_id,))
+            row = cursor.fetchone()
+            conn.commit()
+            return (row['status'] if row else None), completed
+        except Exception as e:
+            conn.rollback()
+            logger.error(f"Error finishing queue run {run_id}: {e}")
+            return None, False
+        finally:
+            self.release_connection(conn)
+
+    def load_run_results(self, run_id: str) -> Dict[str, Dict[str, int]]:
+        """Per-city counts of a queue run summed over every node's tasks. A failed task
+        adds an error to its city, or to its source for a source-wide feed."""
+        conn = self.get_connection()
+        try:
+            cursor = conn.cursor()
+            cursor.execute(
+                """
+                SELECT c.key AS city,
+                       SUM((c.value->>'found')::int) AS found, SUM((c.value->>'created')::int) AS created,
+                       SUM((c.value->>'updated')::int) AS updated, SUM((c.value->>'unchanged')::int) AS unchanged,
+                       SUM((c.value->>'errors')::int) AS errors
+                FROM scrape_tasks t, jsonb_each(t.results) c
+                WHERE t.run_id = %s
+                GROUP BY c.key
+                """,
+                (run_id,)
+            )
+            keys = ('found', 'created', 'updated', 'unchanged', 'errors')
+            results = {row['city']: {key: int(row[key]) for key in keys} for row in cursor.fetchall()}
+            cursor.execute(
+                """
+                SELECT CASE WHEN city = '' THEN source ELSE city END AS city, COUNT(*) AS failed
+                FROM scrape_tasks
+                WHERE run_id = %s AND status = 'failed'
+                GROUP BY 1
+                """,
+                (run_id,)
+            )
+            for row in cursor.fetchall():
+                counts = results.setdefault(row['city'], dict.fromkeys(keys, 0))
+                counts['errors'] += row['failed']
+            return results
+        except Exception as e:
+            logger.error(f"Error loading results of run {run_id}: {e}")
+            return {}
+        finally:
+            self.release_connection(conn)
 
     def get_city_avg_price(self, city_id: str) -> Optional[float]:
-        """Get the average price per sqm for a city from existing data"""
+        """Average price per sqm of a city's active listings, from the running sums of its market sketches"""
         conn = self.get_connection()
         try:
             cursor = conn.cursor()
             cursor.execute(
                 """
-                SELECT AVG(price_per_sqm) as avg_price
-                FROM properties
-                WHERE city_id = %s AND price_per_sqm > 0 AND status = 'active'
+                SELECT SUM(price_sum) / NULLIF(SUM(sample_size), 0) AS avg_price
+                FROM market_sketches
+                WHERE city_id = %s
                 """,
                 (city_id,)
             )
@@ -290,26 +1305,178 @@ class DatabaseManager:
             logger.error(f"Error getting city avg price: {e}")
             return None
         finally:
-            conn.close()
+            self.release_connection(conn)
+
+    def _apply_market_deltas(self, cursor, changes: List[Tuple[Optional[Dict[str, Any]], Optional[Dict[str, Any]]]]) -> int:
+        """Move properties between market sketches and their running sums, given (stored row before,
+        stored row after) pairs. Runs in the caller's transaction. Returns the number of sketches written."""
+        deltas: Dict[MarketSketchKey, Tuple[List[Decimal], List[Decimal]]] = {}
+        for before, after in changes:
+            old, new = _market_entry(before), _market_entry(after)
+            if old == new:
+                continue
+            if old:
+                deltas.setdefault(old[0], ([], []))[1].append(old[1])
+            if new:
+                deltas.setdefault(new[0], ([], []))[0].append(new[1])
+        if not deltas:
+            return 0
+
+        # Sketch rows are created and locked in key order, so concurrent savers never deadlock on them
+        keys = sorted(deltas)
+        execute_values(
+            cursor,
+            """
+            INSERT INTO market_sketches (id, city_id, district_id, property_type_id, sketch, updated_at)
+            VALUES %s
+            ON CONFLICT (city_id, district_id, property_type_id) DO NOTHING
+            """,
+            keys,
+            template="(gen_random_uuid(), %s, %s, %s, ''::bytea, NOW())",
+        )
+        cursor.execute(
+            """
+            SELECT city_id, district_id, property_type_id, sketch, price_sum FROM market_sketches
+            WHERE (city_id, district_id, property_type_id) IN %s
+            ORDER BY city_id, district_id, property_type_id
+            FOR UPDATE
+            """,
+            (tuple(keys),)
+        )
+        sketches, sums = {}, {}
+        for row in cursor.fetchall():
+            key = (row['city_id'], row['district_id'], row['property_type_id'])
+            sketches[key] = QuantileSketch.from_bytes(row['sketch'])
+            sums[key] = row['price_sum']
+
+        drifted = 0
+        for key, (added, removed) in deltas.items():
+            sketch = sketches[key]
+            for value in removed:
+                if not sketch.remove(float(value)):
+                    drifted += 1
+            for value in added:
+                sketch.add(float(value))
+            sums[key] += sum(added) - sum(removed)
+        if drifted:
+            logger.warning(f"{drifted} prices missing from market sketches; reconcile_market_aggregates() will correct them")
+
+        execute_values(
+            cursor,
+            """
+            UPDATE market_sketches m
+            SET sketch = v.sketch, sample_size = v.sample_size, price_sum = v.price_sum, p10_price_per_sqm = v.p10,
+                p50_price_per_sqm = v.p50, p90_price_per_sqm = v.p90, updated_at = NOW()
+            FROM (VALUES %s) AS v (city_id, district_id, property_type_id, sketch, sample_size, price_sum, p10, p50, p90)
+            WHERE m.city_id = v.city_id AND m.district_id = v.district_id AND m.property_type_id = v.property_type_id
+            """,
+            [_sketch_row(key, sketches[key], sums[key]) for key in keys],
+            template="(%s, %s, %s, %s::bytea, %s::integer, %s::numeric, %s::numeric, %s::numeric, %s::numeric)",
+        )
+        return len(keys)
+
+    def load_market_sketches(self, city_id: Optional[str] = None, district_id: Optional[str] = None,
+                             property_type_id: Optional[str] = None) -> List[Dict[str, Any]]:
+        """Non-empty market sketches, optionally filtered. None matches anything; '' matches
+        the sketch of listings without a district / type."""
+        conditions, params = ["sample_size > 0"], []
+        for column, value in (('city_id', city_id), ('district_id', district_id),
+                              ('property_type_id', property_type_id)):
+            if value is not None:
+                conditions.append(f"{column} = %s")
+                params.append(value)
+        conn = self.get_connection()
+        try:
+            cursor = conn.cursor()
+            cursor.execute(
+                f"""
+                SELECT city_id, district_id, property_type_id, sketch FROM market_sketches
+                WHERE {' AND '.join(conditions)}
+                """,
+                params
+            )
+            return [dict(row) for row in cursor.fetchall()]
+        finally:
+            self.release_connection(conn)
+
+    def rebuild_market_sketches(self) -> int:
+        """Recompute every market sketch and running sum from the active listings. Returns the number of sketches.
+
+        Backfills the table the first time and corrects drift afterwards; savers
+        wait on the table lock, so no delta is lost or applied twice.
+        """
+        conn = self.get_connection()
+        try:
+            cursor = conn.cursor()
+            cursor.execute("LOCK TABLE market_sketches IN EXCLUSIVE MODE")
+            sketches: Dict[MarketSketchKey, QuantileSketch] = {}
+            sums: Dict[MarketSketchKey, Decimal] = {}
+            with conn.cursor(name='rebuild_market_sketches') as listings:
+                listings.itersize = 10000
+                listings.execute(
+                    f"SELECT {MARKET_COLUMNS} FROM properties WHERE price_per_sqm > 0 AND status = 'active'"
+                )
+                for row in listings:
+                    entry = _market_entry(row)
+                    if entry:
+                        key, value = entry
+                        sketches.setdefault(key, QuantileSketch()).add(float(value))
+                        sums[key] = sums.get(key, 0) + value
+            cursor.execute("DELETE FROM market_sketches")
+            if sketches:
+                execute_values(
+                    cursor,
+                    """
+                    INSERT INTO market_sketches (id, city_id, district_id, property_type_id, sketch, sample_size, price_sum,
+                                                 p10_price_per_sqm, p50_price_per_sqm, p90_price_per_sqm,
+                                                 rebuilt_at, updated_at)
+                    VALUES %s
+                    """,
+                    [_sketch_row(key, sketch, sums[key]) for key, sketch in sorted(sketches.items())],
+                    template="(gen_random_uuid(), %s, %s, %s, %s, %s, %s, %s, %s, %s, NOW(), NOW())",
+                )
+            # Districts left without active listings have no average any more
+            cursor.execute(
+                """
+                UPDATE districts d SET avg_price_per_sqm = NULL, price_data_updated_at = NOW()
+                WHERE d.avg_price_per_sqm IS NOT NULL
+                  AND NOT EXISTS (SELECT 1 FROM market_sketches m WHERE m.district_id = d.id::text)
+                """
+            )
+            conn.commit()
+            logger.info(f"Rebuilt {len(sketches)} market sketches, cleared {cursor.rowcount} stale district averages")
+            return len(sketches)
+        except Exception as e:
+            conn.rollback()
+            logger.error(f"Error rebuilding market sketches: {e}")
+            return 0
+        finally:
+            self.release_connection(conn)
 
     def update_district_averages(self) -> None:
-        """Update average price per sqm for all districts"""
+        """Refresh the average price per sqm of districts whose market sketches changed since their last refresh.
+        Reads the running sums, so the cost follows the listings saved since then rather than the table size."""
         conn = self.get_connection()
         try:
             cursor = conn.cursor()
             cursor.execute(
                 """
                 UPDATE districts d
-                SET avg_price_per_sqm = sub.avg_price,
+                SET avg_price_per_sqm = sub.price_sum / sub.sample_size,
                     price_data_updated_at = NOW()
                 FROM (
-                    SELECT district_id, AVG(price_per_sqm) as avg_price
-                    FROM properties
-                    WHERE district_id IS NOT NULL AND price_per_sqm > 0 AND status = 'active'
+                    SELECT district_id, SUM(price_sum) AS price_sum, SUM(sample_size) AS sample_size
+                    FROM market_sketches
+                    WHERE district_id IN (
+                        SELECT m.district_id
+                        FROM market_sketches m
+                        JOIN districts changed ON changed.id::text = m.district_id
+                        WHERE m.updated_at > COALESCE(changed.price_data_updated_at, '-infinity')
+                    )
                     GROUP BY district_id
-                    HAVING COUNT(*) >= 3
+                    HAVING SUM(sample_size) >= 3
                 ) sub
-                WHERE d.id = sub.district_id
+                WHERE d.id::text = sub.district_id
                 """
             )
             conn.commit()
@@ -318,7 +1485,35 @@ class DatabaseManager:
             conn.rollback()
             logger.error(f"Error updating district averages: {e}")
         finally:
-            conn.close()
+            self.release_connection(conn)
+
+    def reconcile_market_aggregates(self, max_age_hours: float) -> bool:
+        """Rebuild market sketches and sums from the properties table if the last rebuild is older
+        than max_age_hours, correcting any drift of the incremental updates. Returns True if rebuilt."""
+        conn = self.get_connection()
+        try:
+            cursor = conn.cursor()
+            cursor.execute(
+                """
+                SELECT COALESCE(MAX(rebuilt_at) > NOW() - make_interval(secs => %s), FALSE) AS fresh
+                FROM market_sketches
+                """,
+                (max_age_hours * 3600,)
+            )
+            fresh = cursor.fetchone()['fresh']
+            conn.commit()
+        except Exception as e:
+            conn.rollback()
+            logger.error(f"Error checking market aggregates: {e}")
+            return False
+        finally:
+            self.release_connection(conn)
+        if fresh:
+            return False
+        logger.info(f"Reconciling market aggregates (last rebuild over {max_age_hours}h ago)")
+        # Rebuilt sketches all count as changed, so the next update_district_averages() refreshes every district
+        self.rebuild_market_sketches()
+        return True
 
     def get_properties_for_alerts(self, since: datetime) -> List[Dict[str, Any]]:
         conn = self.get_connection()
@@ -341,7 +1536,7 @@ class DatabaseManager:
             logger.error(f"Error getting properties for alerts: {e}")
             return []
         finally:
-            conn.close()
+            self.release_connection(conn)
 
     def get_active_saved_searches(self) -> List[Dict[str, Any]]:
         conn = self.get_connection()
@@ -360,7 +1555,7 @@ class DatabaseManager:
             logger.error(f"Error getting saved searches: {e}")
             return []
         finally:
-            conn.close()
+            self.release_connection(conn)
 
 
 db_manager = DatabaseManager()
@@ -0,0 +1,168 @@
+import os
+import time
+import pickle
+import hashlib
+import threading
+from collections import OrderedDict
+from dataclasses import dataclass, field
+from typing import Optional, List, Dict, Any, Mapping
+from urllib.parse import urlparse
+
+from config import settings, logger
+
+
+@dataclass
+class CachedPage:
+    """Validators and parse result of a previously fetched listings page"""
+    url: str
+    etag: Optional[str] = None
+    last_modified: Optional[str] = None
+    stored_at: float = 0.0
+    listings: List[Dict[str, Any]] = field(default_factory=list)
+
+    def conditional_headers(self) -> Dict[str, str]:
+        headers = {}
+        if self.etag:
+            headers['If-None-Match'] = self.etag
+        if self.last_modified:
+            headers['If-Modified-Since'] = self.last_modified
+        return headers
+
+
+class ResponseCache:
+    """Size-bounded on-disk LRU cache of listings pages, keyed by URL.
+
+    Each entry keeps the ETag/Last-Modified validators and the listings parsed
+    from the page. Entries younger than the domain's TTL are served without a
+    request; older ones are revalidated with a conditional request and reused
+    on 304. Access time is tracked through the file mtime, so LRU order
+    survives restarts.
+    """
+
+    def __init__(self, directory: str, max_bytes: int, default_ttl: int,
+                 ttls: Optional[Dict[str, int]] = None):
+        self.directory = directory
+        self.max_bytes = max_bytes
+        self.default_ttl = default_ttl
+        self.ttls = ttls or {}
+        self._index: Optional['OrderedDict[str, int]'] = None
+        self._total_bytes = 0
+        self._lock = threading.Lock()
+
+    @staticmethod
+    def _key(url: str) -> str:
+        return hashlib.sha256(url.encode('utf-8')).hexdigest()
+
+    def _path(self, key: str) -> str:
+        return os.path.join(self.directory, f"{key}.pkl")
+
+    def _ensure_index(self) -> None:
+        """Build the LRU index from the cache directory, oldest access first"""
+        if self._index is not None:
+            return
+        os.makedirs(self.directory, exist_ok=True)
+        entries = []
+        with os.scandir(self.directory) as it:
+            for entry in it:
+                if entry.name.endswith('.pkl'):
+                    stat = entry.stat()
+                    entries.append((stat.st_mtime, entry.name[:-4], stat.st_size))
+        entries.sort()
+        self._index = OrderedDict((key, size) for _, key, size in entries)
+        self._total_bytes = sum(self._index.values())
+
+    def ttl(self, url: str) -> int:
+        return self.ttls.get(urlparse(url).netloc, self.default_ttl)
+
+    def is_fresh(self, page: CachedPage) -> bool:
+        return time.time() - page.stored_at < self.ttl(page.url)
+
+    def get(self, url: str) -> Optional[CachedPage]:
+        key = self._key(url)
+        try:
+            with self._lock:
+                self._ensure_index()
+                if key not in self._index:
+                    return None
+                path = self._path(key)
+                with open(path, 'rb') as f:
+                    page = pickle.load(f)
+                os.utime(path)
+                self._index.move_to_end(key)
+            return page
+        except Exception as e:
+            logger.warning(f"HTTP cache read failed for {url}: {e}")
+            self._discard(key)
+            return None
+
+    def put(self, url: str, headers: Mapping[str, str], listings: List[Dict[str, Any]]) -> None:
+        """Store validators from `headers` with the page's parse result"""
+        headers = {k.lower(): v for k, v in headers.items()}
+        page = CachedPage(
+            url=url,
+            etag=headers.get('etag'),
+            last_modified=headers.get('last-modified'),
+            stored_at=time.time(),
+            listings=listings,
+        )
+        if not page.etag and not page.last_modified and self.ttl(url) <= 0:
+            return
+        self._write(page)
+
+    def revalidated(self, url: str, page: CachedPage, headers: Mapping[str, str]) -> None:
+        """Restart the TTL of an entry after a 304, picking up any new validators"""
+        headers = {k.lower(): v for k, v in headers.items()}
+        page.etag = headers.get('etag', page.etag)
+        page.last_modified = headers.get('last-modified', page.last_modified)
+        page.stored_at = time.time()
+        self._write(page)
+
+    def _write(self, page: CachedPage) -> None:
+        key = self._key(page.url)
+        try:
+            data = pickle.dumps(page, protocol=pickle.HIGHEST_PROTOCOL)
+            with self._lock:
+                self._ensure_index()
+                path = self._path(key)
+                tmp_path = f"{path}.{threading.get_ident()}.tmp"
+                with open(tmp_path, 'wb') as f:
+                    f.write(data)
+                os.replace(tmp_path, path)
+                self._total_bytes += len(data) - self._index.pop(key, 0)
+                self._index[key] = len(data)
+                self._evict()
+        except Exception as e:
+            logger.warning(f"HTTP cache write failed for {page.url}: {e}")
+
+    def _evict(self) -> None:
+        while self._total_bytes > self.max_bytes and len(self._index) > 1:
+            key, size = self._index.popitem(last=False)
+            self._total_bytes -= size
+            try:
+                os.remove(self._path(key))
+            except FileNotFoundError:
+                pass
+
+    def _discard(self, key: str) -> None:
+        with self._lock:
+            if self._index is not None and key in self._index:
+                self._total_bytes -= self._index.pop(key)
+            try:
+                os.remove(self._path(key))
+            except FileNotFoundError:
+                pass
+
+
+response_cache = ResponseCache(
+    directory=settings.HTTP_CACHE_DIR,
+    max_bytes=settings.HTTP_CACHE_MAX_MB * 1024 * 1024,
+    default_ttl=settings.HTTP_CACHE_TTL_SECONDS,
+    ttls=settings.HTTP_CACHE_TTLS,
+) if settings.HTTP_CACHE_ENABLED else None
+
+# Parsed detail pages, kept much longer than listings pages
+detail_cache = ResponseCache(
+    directory=os.path.join(settings.HTTP_CACHE_DIR, 'details'),
+    max_bytes=settings.DETAIL_CACHE_MAX_MB * 1024 * 1024,
+    default_ttl=settings.DETAIL_CACHE_TTL_SECONDS,
+) if settings.DETAIL_CACHE_TTL_SECONDS > 0 else None
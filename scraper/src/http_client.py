@@ -0,0 +1,110 @@
+import os
+import pickle
+import threading
+from email.message import Message
+from typing import Dict, Optional, Iterable
+
+import aiohttp
+import requests
+from requests.adapters import HTTPAdapter
+from requests.cookies import RequestsCookieJar, MockRequest, MockResponse, get_cookie_header
+
+from config import settings, logger
+
+
+class HttpClients:
+    """Shared HTTP layer for the scrapers and notifications.
+
+    All requests sessions mount one tuned adapter, so every host gets a single
+    keep-alive connection pool however many sessions talk to it. Each source
+    (and Telegram) still gets its own session and cookie jar; jars are saved
+    under HTTP_CACHE_DIR between runs, so consent and anti-bot cookies a site
+    hands out survive restarts. The aiohttp sessions of the async engine are
+    tuned the same way and read and write the same per-source jars.
+
+    Compression needs no setup here: requests/urllib3 and aiohttp advertise and
+    decode br as soon as the Brotli package is installed, gzip/deflate always.
+    """
+
+    def __init__(self, cookie_dir: Optional[str]):
+        self.cookie_dir = cookie_dir
+        self._adapter = HTTPAdapter(pool_connections=settings.HTTP_POOL_HOSTS,
+                                    pool_maxsize=settings.HTTP_POOL_MAXSIZE)
+        self._sessions: Dict[str, requests.Session] = {}
+        self._lock = threading.Lock()
+
+    def _cookie_path(self, name: str) -> str:
+        return os.path.join(self.cookie_dir, f"{name}.pkl")
+
+    def _load_cookies(self, name: str) -> RequestsCookieJar:
+        if self.cookie_dir:
+            try:
+                with open(self._cookie_path(name), 'rb') as f:
+                    jar = pickle.load(f)
+                if isinstance(jar, RequestsCookieJar):
+                    jar.clear_expired_cookies()
+                    return jar
+            except FileNotFoundError:
+                pass
+            except Exception as e:
+                logger.warning(f"Dropping unreadable cookie jar for {name}: {e}")
+        return RequestsCookieJar()
+
+    def session(self, name: str) -> requests.Session:
+        """The session of one source (or other client), created on first use"""
+        with self._lock:
+            session = self._sessions.get(name)
+            if session is None:
+                session = requests.Session()
+                session.mount('https://', self._adapter)
+                session.mount('http://', self._adapter)
+                session.cookies = self._load_cookies(name)
+                self._sessions[name] = session
+            return session
+
+    def async_session(self, per_host_limit: int) -> aiohttp.ClientSession:
+        """A tuned aiohttp session; cookies come from the per-source jars, see cookie_header()"""
+        connector = aiohttp.TCPConnector(
+            limit=settings.HTTP_ASYNC_POOL_LIMIT,
+            limit_per_host=per_host_limit,
+            keepalive_timeout=settings.HTTP_KEEPALIVE_SECONDS,
+            ttl_dns_cache=settings.HTTP_DNS_CACHE_SECONDS,
+        )
+        return aiohttp.ClientSession(connector=connector, cookie_jar=aiohttp.DummyCookieJar())
+
+    def cookie_header(self, name: str, url: str) -> Optional[str]:
+        """Cookie header the source's jar holds for url"""
+        return get_cookie_header(self.session(name).cookies, requests.Request('GET', url))
+
+    def extract_cookies(self, name: str, url: str, set_cookies: Iterable[str]) -> None:
+        """Store Set-Cookie headers of an async response in the source's jar"""
+        message = Message()
+        for value in set_cookies:
+            message['Set-Cookie'] = value
+        if not message.get_all('Set-Cookie'):
+            return
+        self.session(name).cookies.extract_cookies(MockResponse(message), MockRequest(requests.Request('GET', url)))
+
+    def save_cookies(self) -> None:
+        """Persist every session's cookie jar"""
+        if not self.cookie_dir:
+            return
+        with self._lock:
+            jars = {name: session.cookies for name, session in self._sessions.items()}
+        try:
+            os.makedirs(self.cookie_dir, exist_ok=True)
+            for name, jar in jars.items():
+                jar.clear_expired_cookies()
+                tmp_path = f"{self._cookie_path(name)}.tmp"
+                with open(tmp_path, 'wb') as f:
+                    pickle.dump(jar, f)
+                os.replace(tmp_path, self._cookie_path(name))
+        except Exception as e:
+            logger.warning(f"Could not save cookies: {e}")
+
+    def close(self) -> None:
+        self.save_cookies()
+        self._adapter.close()
+
+
+http_clients = HttpClients(os.path.join(settings.HTTP_CACHE_DIR, 'cookies') if settings.HTTP_PERSIST_COOKIES else None)
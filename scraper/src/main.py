@@ -2,9 +2,14 @@
 import os
 import sys
 import time
+import asyncio
+import queue
 import argparse
+import threading
+from collections import deque
+from concurrent.futures import ThreadPoolExecutor
 from datetime import datetime
-from typing import List, Dict, Any
+from typing import List, Dict, Any, Optional, Tuple
 
 sys.path.insert(0, os.path.dirname(os.path.abspath(__file__)))
 
@@ -12,6 +17,10 @@ from config import settings, logger
 from scraper import MultiSourceScraper
 from database import db_manager
 from notifications import NotificationManager
+from work_queue import QueueWorker
+from http_client import http_clients
+from market_index import market_index
+from comps_index import comps_index
 
 SAUDI_CITIES = {
     'الرياض': {'en': 'Riyadh', 'slug': 'riyadh', 'region': 'Riyadh Region', 'priority': 1},
@@ -42,9 +51,31 @@ class ScraperRunner:
         self.multi_scraper = MultiSourceScraper()
         self.notifier = NotificationManager()
         self.cities = SAUDI_CITIES
+        # Crawl frontier of the current run: (source, city_id) -> (status, last page written)
+        self.run_id: Optional[str] = None
+        self.checkpoints: Dict[Tuple[str, str], Tuple[str, int]] = {}
+        self.resume_window_hours: float = settings.SCRAPE_INTERVAL_HOURS
+
+    def _comps_avg(self, listing: Dict[str, Any]) -> Optional[float]:
+        if not comps_index:
+            return None
+        metrics = comps_index.lookup(listing.get('latitude'), listing.get('longitude'),
+                                     listing.get('property_type_id'), listing.get('size_sqm'),
+                                     exclude_external_id=listing.get('external_id'))
+        return float(metrics.avg_price_per_sqm) if metrics else None
+
+    def _area_avg(self, listing: Dict[str, Any], city_avg_price: float = None) -> float:
+        metrics = None
+        if listing.get('city_id'):
+            metrics = market_index.lookup(listing['city_id'], listing.get('district_id'),
+                                          listing.get('property_type_id'))
+        if metrics:
+            return float(metrics.avg_price_per_sqm)
+        return city_avg_price or settings.MARKET_FALLBACK_PRICE_PER_SQM
 
     def analyze_property(self, listing: Dict[str, Any], city_avg_price: float = None) -> Dict[str, Any]:
-        """Analyze a property using real market data when available"""
+        """Analyze a property against its nearest comparables, else its district/city/national market
+        (city_avg_price if none is known)"""
         analysis = {}
         try:
             price = listing.get('price')
@@ -54,8 +85,9 @@ class ScraperRunner:
                 price_per_sqm = float(price) / float(size)
                 analysis['price_per_sqm'] = price_per_sqm
 
-                avg = city_avg_price or 5000
-                ratio = price_per_sqm / avg
+                comps = self._comps_avg(listing)
+                area = self._area_avg(listing, city_avg_price)
+                ratio = price_per_sqm / (comps or area)
 
                 if ratio < 0.70:
                     analysis['deal_type'] = 'hot_deal'
@@ -71,7 +103,8 @@ class ScraperRunner:
                     analysis['investment_score'] = max(20, int(50 - (ratio - 1) * 40))
 
                 analysis['price_vs_market_percent'] = round((ratio - 1) * 100, 1)
-                analysis['district_avg_price_per_sqm'] = avg
+                analysis['district_avg_price_per_sqm'] = area
+                analysis['comps_avg_price_per_sqm'] = comps
 
                 yield_rate = 0.055
                 analysis['estimated_annual_yield_percent'] = yield_rate * 100
@@ -87,25 +120,33 @@ class ScraperRunner:
 
         return analysis
 
-    def process_listing(self, listing: Dict[str, Any], city_id: str, city_avg_price: float = None) -> bool:
-        try:
-            listing['city_id'] = city_id
+    def prepare_listing(self, listing: Dict[str, Any], city_id: str, city_avg_price: float = None,
+                        analyze: bool = True) -> bool:
+        """Resolve foreign keys and attach analysis (unless analyze is False).
+        Returns False if the listing can't be saved."""
+        listing['city_id'] = city_id
 
-            if not listing.get('price'):
-                return False
+        if not listing.get('price'):
+            return False
 
-            if listing.get('district'):
-                district_id = db_manager.get_or_create_district(city_id, listing['district'])
-                if district_id:
-                    listing['district_id'] = district_id
+        if listing.get('district'):
+            district_id = db_manager.get_or_create_district(city_id, listing['district'])
+            if district_id:
+                listing['district_id'] = district_id
 
-            if listing.get('property_type'):
-                type_id = db_manager.get_or_create_property_type(listing['property_type'], listing['property_type'])
-                if type_id:
-                    listing['property_type_id'] = type_id
+        if listing.get('property_type'):
+            type_id = db_manager.get_or_create_property_type(listing['property_type'], listing['property_type'])
+            if type_id:
+                listing['property_type_id'] = type_id
 
-            analysis = self.analyze_property(listing, city_avg_price)
-            listing.update(analysis)
+        if analyze:
+            listing.update(self.analyze_property(listing, city_avg_price))
+        return True
+
+    def process_listing(self, listing: Dict[str, Any], city_id: str, city_avg_price: float = None) -> bool:
+        try:
+            if not self.prepare_listing(listing, city_id, city_avg_price):
+                return False
 
             success, action = db_manager.save_property(listing)
             return success
@@ -114,56 +155,309 @@ class ScraperRunner:
             logger.error(f"Error processing listing {listing.get('external_id')}: {e}")
             return False
 
-    def scrape_city(self, city_ar: str, city_info: Dict, max_pages: int = 3) -> Dict[str, Any]:
-        result = {
+    def analyze_listings(self, listings: List[Dict[str, Any]], city_id: str, city_avg_price: float,
+                         counts: Dict[str, int]) -> List[Dict[str, Any]]:
+        """Touch listings from unchanged pages, resolve foreign keys and attach analysis.
+        Returns the listings that still need to be written."""
+        # Listings reused from an unchanged page only need last_seen_at bumped,
+        # as long as they were actually stored on an earlier run
+        known = db_manager.fingerprints
+        if known is not None:
+            unchanged_ids = [listing['external_id'] for listing in listings
+                             if listing.get('page_unchanged') and listing['external_id'] in known]
+            if unchanged_ids:
+                skip = set(unchanged_ids)
+                listings = [listing for listing in listings if listing['external_id'] not in skip]
+                db_manager.touch_properties(unchanged_ids)
+                counts['unchanged'] += len(unchanged_ids)
+
+        if settings.SCRAPE_DETAILS and listings:
+            # Resolve ids first, so candidates get the preliminary score the final analysis would give them
+            self.prepare_listings(listings, city_id, city_avg_price, {'errors': 0})
+            try:
+                self.multi_scraper.enrich(
+                    listings, score=lambda listing: self.analyze_property(listing, city_avg_price)['investment_score']
+                )
+            except Exception as e:
+                logger.error(f"Error enriching listings from detail pages: {e}")
+
+        # Detail pages can fill in a price, district or property type, so this runs after enrichment
+        ready = self.prepare_listings(listings, city_id, city_avg_price, counts)
+        for listing in ready:
+            listing.update(self.analyze_property(listing, city_avg_price))
+        return ready
+
+    def prepare_listings(self, listings: List[Dict[str, Any]], city_id: str, city_avg_price: float,
+                         counts: Dict[str, int]) -> List[Dict[str, Any]]:
+        """Resolve foreign keys in bulk. Returns the listings that can be saved; the rest count as errors."""
+        priced = [listing for listing in listings if listing.get('price')]
+        try:
+            db_manager.dimensions.resolve_listings(city_id, priced)
+        except Exception as e:
+            logger.error(f"Error resolving districts/property types: {e}")
+
+        ready = []
+        for listing in listings:
+            try:
+                if self.prepare_listing(listing, city_id, city_avg_price, analyze=False):
+                    ready.append(listing)
+                else:
+                    counts['errors'] += 1
+            except Exception as e:
+                logger.error(f"Error processing listing {listing.get('external_id')}: {e}")
+                counts['errors'] += 1
+        return ready
+
+    def write_listings(self, ready: List[Dict[str, Any]], counts: Dict[str, int]) -> None:
+        """Batch-upsert prepared listings, adding per-action counts"""
+        for start in range(0, len(ready), settings.DB_BATCH_SIZE):
+            for success, action in db_manager.save_properties_batch(ready[start:start + settings.DB_BATCH_SIZE]):
+                counts[action if success else 'errors'] += 1
+
+    def save_listings(self, listings: List[Dict[str, Any]], city_id: str,
+                      city_avg_price: float = None) -> Dict[str, int]:
+        """Prepare and batch-save listings. Returns counts per action."""
+        counts = {'created': 0, 'updated': 0, 'unchanged': 0, 'errors': 0}
+        ready = self.analyze_listings(listings, city_id, city_avg_price, counts)
+        self.write_listings(ready, counts)
+        return counts
+
+    def _new_result(self, city_ar: str, city_info: Dict) -> Dict[str, Any]:
+        return {
             'city': city_ar, 'city_en': city_info['en'],
-            'found': 0, 'created': 0, 'updated': 0, 'errors': 0,
+            'found': 0, 'created': 0, 'updated': 0, 'unchanged': 0, 'errors': 0,
             'start_time': datetime.now(),
         }
 
+    def _open_city(self, city_ar: str, city_info: Dict) -> Optional[Tuple[str, float]]:
+        """Get or create the city row and warm its caches. Returns (city_id, avg price per sqm)."""
+        city_id = db_manager.get_or_create_city(
+            city_ar, city_info['slug'],
+            name_en=city_info['en'],
+            region=city_info.get('region'),
+            priority=city_info.get('priority', 0)
+        )
+        if not city_id:
+            return None
+        db_manager.dimensions.preload_city(city_id)
+        return city_id, db_manager.get_city_avg_price(city_id)
+
+    def _start_pages(self, city_id: str) -> Dict[str, int]:
+        """First page to fetch per source for a city; sources already done this interval are left out"""
+        start_pages = {}
+        for source in self.multi_scraper.scrapers:
+            status, last_page = self.checkpoints.get((source, city_id), (None, 0))
+            if status != 'done':
+                start_pages[source] = last_page + 1
+        return start_pages
+
+    def _checkpoint(self, source: str, city_id: str, page: int, done: bool = False) -> None:
+        if self.run_id:
+            db_manager.save_checkpoint(self.run_id, source, city_id, page, 'done' if done else 'running')
+
+    def _skip_city(self, result: Dict[str, Any], start_pages: Dict[str, int]) -> bool:
+        """Log and flag a city whose sources were all finished earlier in this interval"""
+        if start_pages:
+            resumed = {source: page for source, page in start_pages.items() if page > 1}
+            if resumed:
+                logger.info(f"Resuming {result['city_en']} from checkpoint: {resumed}")
+            return False
+        logger.info(f"Skipping {result['city_en']}: already scraped this interval")
+        result['skipped'] = True
+        return True
+
+    def _close_city(self, result: Dict[str, Any], city_id: str) -> None:
+        """Record the scraper job for a finished city"""
+        db_manager.log_scraper_job(
+            city_id,
+            'completed' if result['errors'] == 0 else 'partial',
+            result['found'], result['created'], result['updated'],
+            f"{result['errors']} errors" if result['errors'] > 0 else None,
+            run_id=self.run_id,
+        )
+        logger.info(
+            f"Done {result['city_en']}: {result['found']} found, {result['created']} new, "
+            f"{result['updated']} updated, {result['unchanged']} unchanged, {result['errors']} errors"
+        )
+
+    def scrape_city(self, city_ar: str, city_info: Dict, max_pages: int = 3) -> Dict[str, Any]:
+        if settings.STREAMING_PIPELINE:
+            return self.stream_city(city_ar, city_info, max_pages=max_pages)
+        result = self._new_result(city_ar, city_info)
+
         try:
             logger.info(f"=== Scraping {city_info['en']} ({city_ar}) ===")
 
-            city_id = db_manager.get_or_create_city(
-                city_ar, city_info['slug'],
-                name_en=city_info['en'],
-                region=city_info.get('region'),
-                priority=city_info.get('priority', 0)
-            )
-            if not city_id:
+            context = self._open_city(city_ar, city_info)
+            if not context:
                 result['errors'] += 1
                 return result
+            city_id, city_avg = context
+            start_pages = self._start_pages(city_id)
+            if self._skip_city(result, start_pages):
+                return result
 
-            city_avg = db_manager.get_city_avg_price(city_id)
-
-            listings = self.multi_scraper.scrape_city(city_ar, max_pages=max_pages)
+            known_ids = db_manager.fingerprints if settings.INCREMENTAL_CRAWL else None
+            failed: set = set()
+            last_pages = {source: page - 1 for source, page in start_pages.items()}
+            if settings.ASYNC_FETCH:
+                listings = asyncio.run(
+                    self.multi_scraper.scrape_city_async(city_ar, max_pages=max_pages, known_ids=known_ids,
+                                                         start_pages=start_pages, failed=failed,
+                                                         last_pages=last_pages)
+                )
+            else:
+                listings = self.multi_scraper.scrape_city(city_ar, max_pages=max_pages, known_ids=known_ids,
+                                                          start_pages=start_pages, failed=failed,
+                                                          last_pages=last_pages)
             result['found'] = len(listings)
 
-            if not listings:
-                db_manager.log_scraper_job(city_id, 'completed', 0, 0, 0)
-                return result
+            if listings:
+                result.update(self.save_listings(listings, city_id, city_avg))
+            # Checkpointed once the city is saved; stream_city tracks individual pages as they are written
+            for source in start_pages:
+                self._checkpoint(source, city_id, last_pages[source], done=source not in failed)
+            self._close_city(result, city_id)
 
-            processed = 0
-            for listing in listings:
-                try:
-                    if self.process_listing(listing, city_id, city_avg):
-                        processed += 1
-                    else:
-                        result['errors'] += 1
-                except Exception as e:
-                    logger.error(f"Error processing: {e}")
-                    result['errors'] += 1
+        except Exception as e:
+            logger.error(f"Critical error scraping {city_ar}: {e}")
+            result['errors'] += 1
+
+        return result
 
-            result['created'] = processed
+    def _fetch_stage(self, city_ar: str, max_pages: int, known_ids, start_pages: Dict[str, int],
+                     failed: set, pages: queue.Queue) -> None:
+        """Pipeline producer: put (source, page, listings) on `pages`, then None"""
+        try:
+            if settings.ASYNC_FETCH:
+                asyncio.run(self._fetch_stage_async(city_ar, max_pages, known_ids, start_pages, failed, pages))
+            else:
+                for item in self.multi_scraper.iter_city_pages(city_ar, max_pages=max_pages, known_ids=known_ids,
+                                                               start_pages=start_pages, failed=failed):
+                    pages.put(item)
+        except Exception as e:
+            logger.error(f"Fetch stage failed for {city_ar}: {e}")
+            failed.update(start_pages)
+        finally:
+            pages.put(None)
+
+    async def _fetch_stage_async(self, city_ar: str, max_pages: int, known_ids, start_pages: Dict[str, int],
+                                 failed: set, pages: queue.Queue) -> None:
+        loop = asyncio.get_running_loop()
+        async for item in self.multi_scraper.iter_city_pages_async(city_ar, max_pages=max_pages, known_ids=known_ids,
+                                                                   start_pages=start_pages, failed=failed):
+            # Blocks (off the event loop) while the queue is full
+            await loop.run_in_executor(None, pages.put, item)
+
+    def _write_stage(self, batches: queue.Queue, counts: Dict[str, int], on_written=None,
+                     failed: Optional[set] = None) -> None:
+        """Pipeline consumer: upsert batches from `batches` until None.
+        on_written(n) is called after each batch that is written, with the running
+        total of listings taken from the queue. The sources of a batch that fails
+        are added to `failed`."""
+        taken = 0
+        while True:
+            batch = batches.get()
+            if batch is None:
+                return
+            taken += len(batch)
+            try:
+                self.write_listings(batch, counts)
+            except Exception as e:
+                logger.error(f"Error writing batch of {len(batch)} listings: {e}")
+                counts['errors'] += len(batch)
+                if failed is not None:
+                    failed.update(listing['source'] for listing in batch)
+                continue
+            if on_written:
+                on_written(taken)
+
+    def stream_city(self, city_ar: str, city_info: Dict, max_pages: int = 3) -> Dict[str, Any]:
+        """scrape_city as a staged pipeline: fetch/parse -> analyze -> batched write.
+
+        Each stage runs in its own thread and hands work on through queues of
+        PIPELINE_QUEUE_SIZE, so DB writes overlap with network waits and memory
+        stays bounded by the queue sizes however deep the crawl goes.
+        """
+        result = self._new_result(city_ar, city_info)
+
+        try:
+            logger.info(f"=== Streaming {city_info['en']} ({city_ar}) ===")
 
-            db_manager.log_scraper_job(
-                city_id,
-                'completed' if result['errors'] == 0 else 'partial',
-                result['found'], processed, 0,
-                f"{result['errors']} errors" if result['errors'] > 0 else None
-            )
+            context = self._open_city(city_ar, city_info)
+            if not context:
+                result['errors'] += 1
+                return result
+            city_id, city_avg = context
+            start_pages = self._start_pages(city_id)
+            if self._skip_city(result, start_pages):
+                return result
 
-            logger.info(f"Done {city_info['en']}: {result['found']} found, {processed} saved, {result['errors']} errors")
+            known_ids = db_manager.fingerprints if settings.INCREMENTAL_CRAWL else None
+            pages: queue.Queue = queue.Queue(maxsize=settings.PIPELINE_QUEUE_SIZE)
+            batches: queue.Queue = queue.Queue(maxsize=settings.PIPELINE_QUEUE_SIZE)
+            analyze_counts = {'created': 0, 'updated': 0, 'unchanged': 0, 'errors': 0}
+            write_counts = dict(analyze_counts)
+            failed: set = set()
+            last_pages = {source: page - 1 for source, page in start_pages.items()}
+
+            # A page is checkpointed once every listing queued up to and including it is written.
+            # A source with a failed batch is not checkpointed again, so it resumes before that batch
+            page_marks: deque = deque()
+
+            def checkpoint_written(written: int) -> None:
+                while page_marks and page_marks[0][0] <= written:
+                    _, source, page = page_marks.popleft()
+                    if source not in failed:
+                        self._checkpoint(source, city_id, page)
+
+            fetcher = threading.Thread(target=self._fetch_stage,
+                                       args=(city_ar, max_pages, known_ids, start_pages, failed, pages),
+                                       name=f"fetch-{city_info['slug']}", daemon=True)
+            writer = threading.Thread(target=self._write_stage,
+                                      args=(batches, write_counts, checkpoint_written, failed),
+                                      name=f"write-{city_info['slug']}", daemon=True)
+            fetcher.start()
+            writer.start()
+
+            seen_ids = set()
+            pending: List[Dict[str, Any]] = []
+            queued = 0
+            try:
+                while True:
+                    item = pages.get()
+                    if item is None:
+                        break
+                    source, page, page_listings = item
+                    fresh = [listing for listing in page_listings if listing['external_id'] not in seen_ids]
+                    seen_ids.update(listing['external_id'] for listing in fresh)
+                    result['found'] += len(fresh)
+                    try:
+                        ready = self.analyze_listings(fresh, city_id, city_avg, analyze_counts)
+                    except Exception as e:
+                        logger.error(f"Error analyzing {source} page for {city_ar}: {e}")
+                        analyze_counts['errors'] += len(fresh)
+                        ready = []
+                    pending.extend(ready)
+                    queued += len(ready)
+                    page_marks.append((queued, source, page))
+                    last_pages[source] = max(last_pages[source], page)
+                    while len(pending) >= settings.DB_BATCH_SIZE:
+                        batches.put(pending[:settings.DB_BATCH_SIZE])
+                        pending = pending[settings.DB_BATCH_SIZE:]
+                if pending:
+                    batches.put(pending)
+            finally:
+                batches.put(None)
+                writer.join()
+
+            checkpoint_written(queued)
+            for source in start_pages:
+                if source not in failed:
+                    self._checkpoint(source, city_id, last_pages[source], done=True)
+            for key in analyze_counts:
+                result[key] += analyze_counts[key] + write_counts[key]
+            self._close_city(result, city_id)
 
         except Exception as e:
             logger.error(f"Critical error scraping {city_ar}: {e}")
@@ -171,7 +465,134 @@ class ScraperRunner:
 
         return result
 
-    def run_all_cities(self, max_pages: int = 2, specific_cities: List[str] = None) -> List[Dict[str, Any]]:
+    def scrape_cities_parallel(self, cities: Dict[str, Dict], max_pages: int, workers: int) -> List[Dict[str, Any]]:
+        """Scrape every (source, city) pair on a bounded worker pool.
+
+        Each source gets its own lane of threads, so a slow or failing site
+        only holds up its own work, and at most `workers` pairs run at once
+        across all lanes. Results are merged per city as sources finish; the
+        scraper job is logged when the last source for a city is done.
+        """
+        scrapers = self.multi_scraper.scrapers
+        lane_width = max(1, -(-workers // len(scrapers)))
+        slots = threading.BoundedSemaphore(workers)
+        lock = threading.Lock()
+        known_ids = db_manager.fingerprints if settings.INCREMENTAL_CRAWL else None
+
+        results: Dict[str, Dict[str, Any]] = {}
+        contexts: Dict[str, Tuple[str, float]] = {}
+        pending: Dict[str, int] = {}
+        for city_ar, city_info in cities.items():
+            results[city_ar] = self._new_result(city_ar, city_info)
+            try:
+                context = self._open_city(city_ar, city_info)
+            except Exception as e:
+                logger.error(f"Critical error preparing {city_ar}: {e}")
+                context = None
+            if context:
+                contexts[city_ar] = context
+                pending[city_ar] = len(scrapers)
+            else:
+                results[city_ar]['errors'] += 1
+
+        def scrape_pair(source: str, city_ar: str) -> None:
+            city_id, city_avg = contexts[city_ar]
+            counts = {'found': 0, 'created': 0, 'updated': 0, 'unchanged': 0, 'errors': 0}
+            status, last_page = self.checkpoints.get((source, city_id), (None, 0))
+            if status == 'done':
+                logger.info(f"Skipping {source} for {city_ar}: already scraped this interval")
+            else:
+                with slots:
+                    page = last_page
+                    seen_ids = set()
+                    try:
+                        for page, page_listings in scrapers[source].iter_city_pages(
+                                city_ar, max_pages=max_pages, known_ids=known_ids, start_page=last_page + 1):
+                            fresh = [listing for listing in page_listings if listing['external_id'] not in seen_ids]
+                            seen_ids.update(listing['external_id'] for listing in fresh)
+                            counts['found'] += len(fresh)
+                            for key, value in self.save_listings(fresh, city_id, city_avg).items():
+                                counts[key] += value
+                            self._checkpoint(source, city_id, page)
+                        logger.info(f"{source}: {counts['found']} for {city_ar}")
+                        # Only paging that ran out normally finishes the pair; a failed fetch leaves it to resume
+                        self._checkpoint(source, city_id, page, done=True)
+                    except Exception as e:
+                        logger.error(f"Error scraping {source} for {city_ar}: {e}")
+                        counts['errors'] += 1
+
+            with lock:
+                result = results[city_ar]
+                for key, value in counts.items():
+                    result[key] += value
+                pending[city_ar] -= 1
+                finished = pending[city_ar] == 0
+            if finished:
+                try:
+                    self._close_city(result, city_id)
+                except Exception as e:
+                    logger.error(f"Error logging scraper job for {city_ar}: {e}")
+
+        logger.info(f"Parallel scrape: {workers} workers, {len(scrapers)} source lanes of {lane_width}")
+        lanes = [ThreadPoolExecutor(max_workers=lane_width, thread_name_prefix=f"lane-{source}")
+                 for source in scrapers]
+        try:
+            for lane, source in zip(lanes, scrapers):
+                for city_ar in contexts:
+                    lane.submit(scrape_pair, source, city_ar)
+        finally:
+            for lane in lanes:
+                lane.shutdown(wait=True)
+
+        return [results[city_ar] for city_ar in cities]
+
+    def begin_checkpointed_run(self, fresh: bool = False) -> None:
+        """Resume an unfinished run from this interval, or start a new one, and load its frontier"""
+        self.run_id, self.checkpoints = None, {}
+        if not settings.CRAWL_CHECKPOINTS:
+            return
+        window = 0 if fresh else self.resume_window_hours
+        self.run_id, resumed = db_manager.start_scraper_run(window)
+        if not self.run_id:
+            return
+        self.checkpoints = db_manager.load_checkpoints(self.run_id, window)
+        done = sum(1 for status, _ in self.checkpoints.values() if status == 'done')
+        if resumed:
+            logger.info(f"Resuming run {self.run_id}: {done} source/city pairs done, "
+                        f"{len(self.checkpoints) - done} part-way")
+        elif done:
+            logger.info(f"Run {self.run_id}: skipping {done} source/city pairs scraped earlier this interval")
+
+    def scrape_from_queue(self, cities: Dict[str, Dict], max_pages: int, workers: int,
+                          fresh: bool = False) -> Tuple[List[Dict[str, Any]], bool]:
+        """Work this interval's shared run as one node of a multi-node scrape.
+        Returns per-city results and whether this node completed the run; the node
+        that completes it gets the whole run's results, summed over every node's tasks."""
+        self.checkpoints = {}
+        self.run_id, created = db_manager.join_queue_run(0 if fresh else self.resume_window_hours)
+        if not self.run_id:
+            logger.info("This interval's run is already complete, nothing to do")
+            return [], False
+        worker = QueueWorker(self, cities, workers)
+        queued = worker.enqueue(self.run_id, max_pages)
+        logger.info(f"{'Started' if created else 'Joined'} run {self.run_id} with {len(worker.worker_ids)} "
+                    f"queue workers ({queued} tasks queued)")
+        worker.run(self.run_id)
+        for result in worker.results.values():
+            context = worker.contexts.get(result['city'])
+            if context:
+                self._close_city(result, context[0])
+        if not worker.completed_run:
+            return list(worker.results.values()), False
+
+        results = []
+        for city_ar, counts in db_manager.load_run_results(self.run_id).items():
+            city_info = self.cities.get(city_ar)
+            results.append({'city': city_ar, 'city_en': city_info['en'] if city_info else city_ar, **counts})
+        return results, True
+
+    def run_all_cities(self, max_pages: int = 2, specific_cities: List[str] = None,
+                       workers: int = 1, fresh: bool = False, use_queue: bool = False) -> List[Dict[str, Any]]:
         results = []
 
         cities_to_scrape = {}
@@ -183,21 +604,48 @@ class ScraperRunner:
             cities_to_scrape = self.cities
 
         logger.info(f"Scraping {len(cities_to_scrape)} cities from {len(self.multi_scraper.scrapers)} sources")
+        self.multi_scraper.begin_run()
+        db_manager.dimensions.clear()
+        try:
+            db_manager.dimensions.preload_cities()
+            db_manager.dimensions.preload_property_types()
+        except Exception as e:
+            logger.error(f"Error preloading dimension cache: {e}")
+        db_manager.load_fingerprints()
+        market_index.load()
+        comps_index.load()
+
+        if use_queue:
+            results, completed_run = self.scrape_from_queue(cities_to_scrape, max_pages, workers, fresh)
+        elif workers > 1:
+            self.begin_checkpointed_run(fresh)
+            results = self.scrape_cities_parallel(cities_to_scrape, max_pages, workers)
+        else:
+            self.begin_checkpointed_run(fresh)
+            for city_ar, city_info in cities_to_scrape.items():
+                try:
+                    result = self.scrape_city(city_ar, city_info, max_pages=max_pages)
+                    results.append(result)
+                except Exception as e:
+                    logger.error(f"Critical error for {city_ar}: {e}")
+                    results.append({'city': city_ar, 'city_en': city_info['en'], 'found': 0, 'errors': 1})
+        self.multi_scraper.end_run()
+        http_clients.save_cookies()
 
-        for city_ar, city_info in cities_to_scrape.items():
-            try:
-                result = self.scrape_city(city_ar, city_info, max_pages=max_pages)
-                results.append(result)
-                time.sleep(5)
-            except Exception as e:
-                logger.error(f"Critical error for {city_ar}: {e}")
-                results.append({'city': city_ar, 'city_en': city_info['en'], 'found': 0, 'errors': 1})
+        if use_queue and not completed_run:
+            # The node that completes the run refreshes averages and sends the run-wide summary
+            return results
 
         try:
+            db_manager.reconcile_market_aggregates(settings.MARKET_RECONCILE_HOURS)
             db_manager.update_district_averages()
+            market_index.invalidate()
         except Exception as e:
             logger.error(f"Error updating averages: {e}")
 
+        if self.run_id and not use_queue:
+            db_manager.complete_scraper_run(self.run_id)
+
         try:
             self.notifier.send_scrape_summary(results)
         except Exception as e:
@@ -205,11 +653,12 @@ class ScraperRunner:
 
         return results
 
-    def run_continuous(self, interval_hours: int = 4):
+    def run_continuous(self, interval_hours: int = 4, workers: int = 1, use_queue: bool = False):
         import schedule
         logger.info(f"Starting continuous scraper (interval: {interval_hours}h)")
-        self.run_all_cities()
-        schedule.every(interval_hours).hours.do(self.run_all_cities)
+        self.resume_window_hours = interval_hours
+        self.run_all_cities(workers=workers, use_queue=use_queue)
+        schedule.every(interval_hours).hours.do(self.run_all_cities, workers=workers, use_queue=use_queue)
         while True:
             try:
                 schedule.run_pending()
@@ -229,8 +678,18 @@ def main():
     parser.add_argument('--pages', type=int, default=2, help='Max pages per city per source')
     parser.add_argument('--continuous', action='store_true', help='Run continuously')
     parser.add_argument('--interval', type=int, default=4, help='Hours between runs')
+    parser.add_argument('--workers', type=int, default=1,
+                        help='Scrape sources and cities in parallel on this many workers')
+    parser.add_argument('--fresh', action='store_true',
+                        help='Ignore crawl checkpoints and scrape every city from page 1')
+    parser.add_argument('--queue', action='store_true',
+                        help='Claim work from the shared Postgres task queue (run on every scraper node)')
+    parser.add_argument('--details', action='store_true',
+                        help='Enrich listings from their detail pages (see DETAIL_* settings)')
 
     args = parser.parse_args()
+    if args.details:
+        settings.SCRAPE_DETAILS = True
 
     logger.info("=" * 60)
     logger.info("KingdomScout Multi-Source Property Scraper")
@@ -243,14 +702,16 @@ def main():
     if args.city:
         if args.city in SAUDI_CITIES:
             result = runner.scrape_city(args.city, SAUDI_CITIES[args.city], max_pages=args.pages)
+            runner.multi_scraper.end_run()
             print(f"\nResults for {args.city}: {result['found']} found, {result['errors']} errors")
         else:
             print(f"Unknown city: {args.city}")
             print(f"Available: {', '.join(SAUDI_CITIES.keys())}")
     elif args.continuous:
-        runner.run_continuous(interval_hours=args.interval)
+        runner.run_continuous(interval_hours=args.interval, workers=args.workers, use_queue=args.queue)
     else:
-        results = runner.run_all_cities(max_pages=args.pages)
+        results = runner.run_all_cities(max_pages=args.pages, workers=args.workers, fresh=args.fresh,
+                                         use_queue=args.queue)
 
         print("\n" + "=" * 60)
         print("SCRAPE SUMMARY")
@@ -267,6 +728,8 @@ def main():
         print(f"  Total: {total_found} found, {total_errors} errors")
         print("=" * 60)
 
+    http_clients.close()
+
 
 if __name__ == '__main__':
     main()
@@ -0,0 +1,168 @@
+import time
+import threading
+from collections import OrderedDict
+from dataclasses import dataclass
+from decimal import Decimal
+from typing import Optional, Dict, Tuple
+
+from config import settings, logger
+from database import db_manager
+from quantile_sketch import QuantileSketch
+
+# (city_id, district_id, property_type_id); None marks a level rolled up:
+# (city, None, type) is a city, (None, None, type) national, (None, None, None) every type nationwide
+MarketKey = Tuple[Optional[str], Optional[str], Optional[str]]
+
+
+@dataclass
+class MarketMetrics:
+    avg_price_per_sqm: Decimal
+    median_price_per_sqm: Decimal
+    min_price_per_sqm: Decimal
+    max_price_per_sqm: Decimal
+    sample_size: int
+    p10_price_per_sqm: Optional[Decimal] = None
+    p90_price_per_sqm: Optional[Decimal] = None
+
+
+def _price(value: float) -> Decimal:
+    return round(Decimal(str(value)), 2)
+
+
+def _metrics(sketch: QuantileSketch) -> Optional[MarketMetrics]:
+    """Metrics of a sketch; quantiles, min and max are within the sketch's relative accuracy"""
+    if not sketch.count:
+        return None
+    return MarketMetrics(
+        avg_price_per_sqm=_price(sketch.mean),
+        median_price_per_sqm=_price(sketch.quantile(0.5)),
+        min_price_per_sqm=_price(sketch.min),
+        max_price_per_sqm=_price(sketch.max),
+        sample_size=sketch.count,
+        p10_price_per_sqm=_price(sketch.quantile(0.1)),
+        p90_price_per_sqm=_price(sketch.quantile(0.9)),
+    )
+
+
+def _rollup_keys(city_id: str, district_id: str, property_type_id: str) -> Tuple[MarketKey, ...]:
+    """Every group a stored sketch (keyed with '' for no district / type) counts towards"""
+    district_id, property_type_id = district_id or None, property_type_id or None
+    keys = [(city_id, None, property_type_id), (None, None, None)]
+    if district_id:
+        keys.append((city_id, district_id, property_type_id))
+    if property_type_id:
+        keys.append((None, None, property_type_id))
+    return tuple(keys)
+
+
+class MarketIndex:
+    """Price-per-sqm metrics of active listings by district, city and nationwide, per property type.
+
+    Groups are merged from the per-district quantile sketches that saving
+    listings keeps up to date, so no query aggregates the properties table.
+    load() reads every sketch at the start of a run; lookups are then
+    answered from memory. Entries expire after ttl_seconds
+    and the least recently used are evicted beyond max_entries; a key that is
+    not in memory is read through by merging just its sketches. Lookups fall
+    back district -> city -> national while a group has fewer than
+    min_samples listings.
+    """
+
+    def __init__(self, ttl_seconds: int, max_entries: int, min_samples: int):
+        self.ttl_seconds = ttl_seconds
+        self.max_entries = max_entries
+        self.min_samples = min_samples
+        self._entries: 'OrderedDict[MarketKey, Tuple[float, Optional[MarketMetrics]]]' = OrderedDict()
+        # While the last load is fresh and nothing was evicted, a key it did not return has no listings
+        self._loaded_at: Optional[float] = None
+        self._complete = False
+        self._lock = threading.Lock()
+
+    def load(self) -> int:
+        """Replace the index with every group merged from the stored sketches. Returns the number of groups.
+        Sketches are backfilled from the properties table if there are none yet."""
+        try:
+            rows = db_manager.load_market_sketches()
+            if not rows and db_manager.rebuild_market_sketches():
+                rows = db_manager.load_market_sketches()
+        except Exception as e:
+            logger.error(f"Error loading market sketches: {e}")
+            return 0
+        groups: Dict[MarketKey, QuantileSketch] = {}
+        for row in rows:
+            sketch = QuantileSketch.from_bytes(row['sketch'])
+            for key in _rollup_keys(row['city_id'], row['district_id'], row['property_type_id']):
+                groups.setdefault(key, QuantileSketch()).merge(sketch)
+        now = time.monotonic()
+        with self._lock:
+            self._entries.clear()
+            for key, sketch in groups.items():
+                self._entries[key] = (now, _metrics(sketch))
+            self._loaded_at = now
+            self._complete = True
+            self._evict()
+        logger.info(f"Loaded market metrics for {len(groups)} groups from {len(rows)} sketches")
+        return len(groups)
+
+    def invalidate(self) -> None:
+        """Forget everything, e.g. once new listings have changed the averages"""
+        with self._lock:
+            self._entries.clear()
+            self._loaded_at = None
+            self._complete = False
+
+    def _evict(self) -> None:
+        while len(self._entries) > self.max_entries:
+            self._entries.popitem(last=False)
+            self._complete = False
+
+    def _get(self, key: MarketKey) -> Optional[MarketMetrics]:
+        now = time.monotonic()
+        with self._lock:
+            entry = self._entries.get(key)
+            if entry is not None and now - entry[0] < self.ttl_seconds:
+                self._entries.move_to_end(key)
+                return entry[1]
+            if (entry is None and self._complete and self._loaded_at is not None
+                    and now - self._loaded_at < self.ttl_seconds):
+                return None
+        city_id, district_id, property_type_id = key
+        try:
+            # Below the national level a missing type is its own group ('') rather than "any type"
+            rows = db_manager.load_market_sketches(
+                city_id, district_id, property_type_id or ('' if city_id else None))
+        except Exception as e:
+            logger.error(f"Error reading market sketches for {key}: {e}")
+            return None
+        metrics = _metrics(QuantileSketch.merged(QuantileSketch.from_bytes(row['sketch']) for row in rows))
+        with self._lock:
+            self._entries[key] = (now, metrics)
+            self._entries.move_to_end(key)
+            self._evict()
+        return metrics
+
+    def lookup(self, city_id: Optional[str], district_id: Optional[str] = None,
+               property_type_id: Optional[str] = None) -> Optional[MarketMetrics]:
+        """Metrics of the narrowest group with enough samples (or the widest group that has any)"""
+        keys = []
+        if city_id and district_id:
+            keys.append((city_id, district_id, property_type_id))
+        if city_id:
+            keys.append((city_id, None, property_type_id))
+        if property_type_id:
+            keys.append((None, None, property_type_id))
+        keys.append((None, None, None))
+
+        fallback = None
+        for key in keys:
+            metrics = self._get(key)
+            if metrics is None:
+                continue
+            if metrics.sample_size >= self.min_samples:
+                return metrics
+            fallback = metrics
+        return fallback
+
+
+market_index = MarketIndex(settings.MARKET_INDEX_TTL_SECONDS, settings.MARKET_INDEX_MAX_ENTRIES,
+                           settings.MARKET_MIN_SAMPLES)
@@ -56,6 +56,7 @@ class PropertyAnalysis(BaseModel):
     property_id: str
     price_per_sqm: Optional[Decimal] = None
     district_avg_price_per_sqm: Optional[Decimal] = None
+    comps_avg_price_per_sqm: Optional[Decimal] = None
     price_vs_market_percent: Optional[Decimal] = None
     
     investment_score: int = Field(ge=0, le=100)
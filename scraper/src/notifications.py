@@ -3,9 +3,8 @@ import json
 from typing import List, Dict, Any, Optional
 from datetime import datetime
 
-import requests
-
 from config import settings, logger
+from http_client import http_clients
 
 class NotificationManager:
     def __init__(self):
@@ -28,7 +27,7 @@ class NotificationManager:
                 'disable_web_page_preview': False
             }
             
-            response = requests.post(url, json=payload, timeout=30)
+            response = http_clients.session('telegram').post(url, json=payload, timeout=30)
             response.raise_for_status()
             
             return True
@@ -0,0 +1,54 @@
+import threading
+import multiprocessing
+from concurrent.futures import ProcessPoolExecutor
+from typing import Optional
+
+from config import settings, logger
+
+
+class ParsePool:
+    """Lazily started process pool that runs page parsers off the fetching threads.
+
+    Parsing (json decoding, lxml, BeautifulSoup fallbacks) holds the GIL, so
+    with threads or coroutines fetching it tops out at one core. Handing raw
+    page bodies to worker processes lets parsing scale with the machine.
+
+    Workers are spawned, not forked: the pool starts on first use, when
+    fetching threads may hold locks (logging, the DB pool, aiohttp) that a
+    forked child would inherit held forever.
+    """
+
+    def __init__(self, processes: int):
+        self.processes = processes
+        self._executor: Optional[ProcessPoolExecutor] = None
+        self._lock = threading.Lock()
+
+    @property
+    def enabled(self) -> bool:
+        return self.processes > 0
+
+    def executor(self) -> Optional[ProcessPoolExecutor]:
+        if not self.enabled:
+            return None
+        with self._lock:
+            if self._executor is None:
+                self._executor = ProcessPoolExecutor(max_workers=self.processes,
+                                                     mp_context=multiprocessing.get_context('spawn'))
+                logger.info(f"Started parse pool with {self.processes} processes")
+            return self._executor
+
+    def reset(self) -> None:
+        """Drop a broken pool; the next executor() call starts a fresh one"""
+        with self._lock:
+            executor, self._executor = self._executor, None
+        if executor is not None:
+            executor.shutdown(wait=False, cancel_futures=True)
+
+    def shutdown(self) -> None:
+        with self._lock:
+            executor, self._executor = self._executor, None
+        if executor is not None:
+            executor.shutdown(wait=True)
+
+
+parse_pool = ParsePool(settings.PARSE_PROCESSES)
@@ -0,0 +1,124 @@
+import re
+import json
+import hashlib
+from typing import Optional, Any, List, Iterable, Pattern
+
+import lxml.html
+from lxml import etree
+
+_decoder = json.JSONDecoder()
+_WHITESPACE = ' \t\n\r'
+
+
+def _skip_ws(text: str, pos: int) -> int:
+    while pos < len(text) and text[pos] in _WHITESPACE:
+        pos += 1
+    return pos
+
+
+def extract_assigned_json(html: str, marker: str) -> Optional[Any]:
+    """Decode the object assigned to `marker`, e.g. `window.__APOLLO_STATE__ = {...}`.
+
+    Scans for the marker with str.find and decodes in place with
+    JSONDecoder.raw_decode, so the document is never regex-scanned or copied.
+    """
+    pos = html.find(marker)
+    while pos != -1:
+        i = _skip_ws(html, pos + len(marker))
+        if i < len(html) and html[i] == '=':
+            i = _skip_ws(html, i + 1)
+            if i < len(html) and html[i] == '{':
+                try:
+                    return _decoder.raw_decode(html, i)[0]
+                except json.JSONDecodeError:
+                    pass
+        pos = html.find(marker, pos + len(marker))
+    return None
+
+
+_SCRIPT_ID_RE = {}
+
+
+def extract_script_json(html: str, script_id: str) -> Optional[Any]:
+    """Decode the JSON body of `<script id="script_id">` without building a DOM"""
+    pattern = _SCRIPT_ID_RE.get(script_id)
+    if pattern is None:
+        pattern = _SCRIPT_ID_RE[script_id] = re.compile(
+            r'<script\b[^>]*\bid\s*=\s*["\']?' + re.escape(script_id) + r'["\'\s>]'
+        )
+    match = pattern.search(html)
+    if not match:
+        return None
+    close = html.find('>', match.end() - 1)
+    if close == -1:
+        return None
+    i = _skip_ws(html, close + 1)
+    if i >= len(html) or html[i] not in '{[':
+        return None
+    try:
+        return _decoder.raw_decode(html, i)[0]
+    except json.JSONDecodeError:
+        return None
+
+
+def parse_html(html: str) -> Optional[etree._Element]:
+    """Build an lxml tree; None if the document is empty or unparseable"""
+    try:
+        return lxml.html.document_fromstring(html)
+    except (etree.ParserError, ValueError):
+        return None
+
+
+def script_texts(tree: etree._Element, script_type: str) -> List[Optional[str]]:
+    """Text of every <script type=script_type>, like BeautifulSoup's script.string"""
+    return [script.text for script in tree.iter('script') if script.get('type') == script_type]
+
+
+def find_by_class(tree: etree._Element, tags: Iterable[str], class_re: Pattern) -> List[etree._Element]:
+    """Elements with one of `tags` whose class list matches class_re, in document order.
+
+    Same matching rule as BeautifulSoup's find_all(tags, class_=class_re).
+    """
+    tags = set(tags)
+    return [
+        el for el in tree.iter(*tags)
+        if el.get('class') and any(class_re.search(c) for c in el.get('class').split())
+    ]
+
+
+_SKIP_TEXT_TAGS = {'script', 'style', 'template'}
+
+
+def _strings(el: etree._Element, out: List[str]) -> None:
+    keep = el.tag not in _SKIP_TEXT_TAGS
+    if keep and el.text:
+        out.append(el.text)
+    for child in el:
+        if isinstance(child.tag, str):
+            _strings(child, out)
+        if keep and child.tail:
+            out.append(child.tail)
+
+
+def element_text(el: etree._Element, separator: str = '', strip: bool = False) -> str:
+    """BeautifulSoup-compatible get_text(): skips comments and script/style/template bodies"""
+    strings: List[str] = []
+    _strings(el, strings)
+    if strip:
+        strings = [text.strip() for text in strings]
+        strings = [text for text in strings if text]
+    return separator.join(strings)
+
+
+def first_descendant(el: etree._Element, tag: str, attr: str) -> Optional[etree._Element]:
+    """First descendant <tag> carrying `attr`, like soup.find(tag, attr=True)"""
+    for child in el.iterdescendants(tag):
+        if child.get(attr) is not None:
+            return child
+    return None
+
+
+def payload_fingerprint(payload: Any) -> bytes:
+    """Stable digest of a decoded JSON payload, independent of key order"""
+    data = json.dumps(payload, sort_keys=True, separators=(',', ':'), ensure_ascii=False, default=str)
+    return hashlib.blake2b(data.encode('utf-8'), digest_size=16).digest()
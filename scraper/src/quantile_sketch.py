@@ -0,0 +1,119 @@
+import math
+import struct
+from typing import Dict, Iterable, Optional
+
+# Quantiles are within this relative error of the true value
+RELATIVE_ACCURACY = 0.01
+_GAMMA = (1 + RELATIVE_ACCURACY) / (1 - RELATIVE_ACCURACY)
+_LOG_GAMMA = math.log(_GAMMA)
+_FORMAT_VERSION = 1
+_HEADER = struct.Struct('<BdI')  # version, sum of values, number of buckets
+
+
+class QuantileSketch:
+    """Mergeable quantile sketch of positive values (DDSketch-style log buckets).
+
+    Value x lands in bucket ceil(log_gamma(x)), so every quantile is
+    answered within RELATIVE_ACCURACY whatever the distribution. Unlike
+    t-digest or KLL, bucket counts can be decremented, so a listing that
+    changes price or goes inactive is taken out exactly. Sketches built
+    with the same accuracy merge by adding bucket counts. Serialized form
+    is 6 bytes per occupied bucket; prices per sqm of one district fill
+    a few dozen to a few hundred.
+    """
+
+    __slots__ = ('buckets', 'count', 'sum')
+
+    def __init__(self):
+        self.buckets: Dict[int, int] = {}
+        self.count = 0
+        self.sum = 0.0
+
+    @staticmethod
+    def _bucket(value: float) -> int:
+        return math.ceil(math.log(value) / _LOG_GAMMA)
+
+    @staticmethod
+    def _value(bucket: int) -> float:
+        return 2 * _GAMMA ** bucket / (_GAMMA + 1)
+
+    def add(self, value: float) -> None:
+        if value > 0:
+            bucket = self._bucket(value)
+            self.buckets[bucket] = self.buckets.get(bucket, 0) + 1
+            self.count += 1
+            self.sum += value
+
+    def remove(self, value: float) -> bool:
+        """Take out a value added earlier. Returns False if its bucket was already empty (drift)."""
+        if value <= 0:
+            return True
+        bucket = self._bucket(value)
+        held = self.buckets.get(bucket, 0)
+        if held <= 0:
+            return False
+        if held == 1:
+            del self.buckets[bucket]
+        else:
+            self.buckets[bucket] = held - 1
+        self.count -= 1
+        self.sum = self.sum - value if self.count else 0.0
+        return True
+
+    def merge(self, other: 'QuantileSketch') -> None:
+        for bucket, count in other.buckets.items():
+            self.buckets[bucket] = self.buckets.get(bucket, 0) + count
+        self.count += other.count
+        self.sum += other.sum
+
+    @classmethod
+    def merged(cls, sketches: Iterable['QuantileSketch']) -> 'QuantileSketch':
+        result = cls()
+        for sketch in sketches:
+            result.merge(sketch)
+        return result
+
+    def quantile(self, q: float) -> Optional[float]:
+        if not self.count:
+            return None
+        rank = q * (self.count - 1)
+        seen = 0
+        for bucket in sorted(self.buckets):
+            seen += self.buckets[bucket]
+            if seen > rank:
+                return self._value(bucket)
+        return self._value(max(self.buckets))
+
+    @property
+    def mean(self) -> Optional[float]:
+        return self.sum / self.count if self.count else None
+
+    @property
+    def min(self) -> Optional[float]:
+        return self._value(min(self.buckets)) if self.buckets else None
+
+    @property
+    def max(self) -> Optional[float]:
+        return self._value(max(self.buckets)) if self.buckets else None
+
+    def to_bytes(self) -> bytes:
+        buckets = sorted(self.buckets)
+        return (_HEADER.pack(_FORMAT_VERSION, self.sum, len(buckets))
+                + struct.pack(f'<{len(buckets)}h', *buckets)
+                + struct.pack(f'<{len(buckets)}I', *(self.buckets[b] for b in buckets)))
+
+    @classmethod
+    def from_bytes(cls, data: Optional[bytes]) -> 'QuantileSketch':
+        sketch = cls()
+        if not data:
+            return sketch
+        version, total, size = _HEADER.unpack_from(data)
+        if version != _FORMAT_VERSION:
+            raise ValueError(f"Unknown sketch format {version}")
+        offset = _HEADER.size
+        buckets = struct.unpack_from(f'<{size}h', data, offset)
+        counts = struct.unpack_from(f'<{size}I', data, offset + 2 * size)
+        sketch.buckets = dict(zip(buckets, counts))
+        sketch.count = sum(counts)
+        sketch.sum = total
+        return sketch
@@ -0,0 +1,79 @@
+import time
+import asyncio
+import threading
+from typing import Dict, Optional
+from urllib.parse import urlparse
+
+from config import settings
+
+
+class TokenBucket:
+    """Token bucket that hands out start times at a fixed rate.
+
+    reserve() takes a token immediately and returns how long the caller must
+    wait before using it. Tokens may go negative, so concurrent callers queue
+    up behind each other and the long-run rate never exceeds `rate`.
+    """
+
+    def __init__(self, rate: float, burst: int = 1):
+        self.rate = rate
+        self.burst = max(1, burst)
+        self.tokens = float(self.burst)
+        self.updated_at = time.monotonic()
+        self._lock = threading.Lock()
+
+    def reserve(self) -> float:
+        with self._lock:
+            now = time.monotonic()
+            self.tokens = min(self.burst, self.tokens + (now - self.updated_at) * self.rate)
+            self.updated_at = now
+            self.tokens -= 1
+            if self.tokens >= 0:
+                return 0.0
+            return -self.tokens / self.rate
+
+
+class RateLimiter:
+    """Per-domain token buckets shared by every scraper in the process"""
+
+    def __init__(self, default_rate: float, burst: int = 1, overrides: Optional[Dict[str, float]] = None):
+        self.default_rate = default_rate
+        self.burst = burst
+        self.overrides = overrides or {}
+        self._buckets: Dict[str, TokenBucket] = {}
+        self._lock = threading.Lock()
+
+    @staticmethod
+    def _domain(url_or_domain: str) -> str:
+        if '://' in url_or_domain:
+            return urlparse(url_or_domain).netloc
+        return url_or_domain
+
+    def bucket(self, url_or_domain: str) -> TokenBucket:
+        domain = self._domain(url_or_domain)
+        with self._lock:
+            bucket = self._buckets.get(domain)
+            if bucket is None:
+                rate = self.overrides.get(domain, self.default_rate)
+                bucket = self._buckets[domain] = TokenBucket(rate, self.burst)
+            return bucket
+
+    def acquire(self, url_or_domain: str) -> float:
+        """Block until a request to this domain may start. Returns seconds waited."""
+        wait = self.bucket(url_or_domain).reserve()
+        if wait > 0:
+            time.sleep(wait)
+        return wait
+
+    async def acquire_async(self, url_or_domain: str) -> float:
+        wait = self.bucket(url_or_domain).reserve()
+        if wait > 0:
+            await asyncio.sleep(wait)
+        return wait
+
+
+rate_limiter = RateLimiter(
+    default_rate=1.0 / settings.REQUEST_DELAY_SECONDS,
+    burst=settings.RATE_LIMIT_BURST,
+    overrides=settings.RATE_LIMITS,
+)
@@ -0,0 +1,176 @@
+import time
+import random
+import threading
+from collections import deque
+from datetime import datetime, timezone
+from email.utils import parsedate_to_datetime
+from typing import Dict, Optional, Mapping
+from urllib.parse import urlparse
+
+from config import settings, logger
+
+# Statuses worth retrying; anything else >= 400 is a permanent answer for this URL
+RETRY_STATUSES = {408, 429, 500, 502, 503, 504}
+
+
+def parse_retry_after(value: Optional[str]) -> Optional[float]:
+    """Seconds to wait from a Retry-After header (delta-seconds or HTTP-date)"""
+    if not value:
+        return None
+    value = value.strip()
+    if value.isdigit():
+        return float(value)
+    try:
+        when = parsedate_to_datetime(value)
+    except (TypeError, ValueError):
+        return None
+    if when.tzinfo is None:
+        when = when.replace(tzinfo=timezone.utc)
+    return max(0.0, (when - datetime.now(timezone.utc)).total_seconds())
+
+
+class CircuitBreaker:
+    """Closed -> open after `threshold` consecutive failures -> half-open probe after a cooldown.
+
+    While open every request is refused at once. After the cooldown one probe
+    request is let through: success closes the breaker, failure reopens it
+    with a doubled cooldown (up to max_cooldown).
+    """
+
+    CLOSED, OPEN, HALF_OPEN = 'closed', 'open', 'half-open'
+
+    def __init__(self, threshold: int, cooldown: float, max_cooldown: float):
+        self.threshold = threshold
+        self.base_cooldown = cooldown
+        self.max_cooldown = max_cooldown
+        self.cooldown = cooldown
+        self.state = self.CLOSED
+        self.failures = 0
+        self.opened_at = 0.0
+        self.probe_started: Optional[float] = None
+
+    def allow(self, now: float) -> bool:
+        if self.state == self.CLOSED:
+            return True
+        if self.state == self.OPEN:
+            if now - self.opened_at < self.cooldown:
+                return False
+            self.state = self.HALF_OPEN
+            self.probe_started = None
+        # Half-open: a single probe at a time; a probe that never reported back is replaced
+        if self.probe_started is not None and now - self.probe_started < self.cooldown:
+            return False
+        self.probe_started = now
+        return True
+
+    def success(self) -> bool:
+        """Returns True if this closed an open breaker"""
+        recovered = self.state != self.CLOSED
+        self.state = self.CLOSED
+        self.failures = 0
+        self.cooldown = self.base_cooldown
+        self.probe_started = None
+        return recovered
+
+    def failure(self, now: float) -> bool:
+        """Returns True if this opened the breaker"""
+        self.failures += 1
+        if self.state == self.HALF_OPEN:
+            self.cooldown = min(self.cooldown * 2, self.max_cooldown)
+        elif self.failures < self.threshold:
+            return False
+        was_open = self.state == self.OPEN
+        self.state = self.OPEN
+        self.opened_at = now
+        self.probe_started = None
+        return not was_open
+
+
+class HostPolicy:
+    """Latency samples, Retry-After pause and circuit breaker of one host"""
+
+    def __init__(self):
+        self.latencies: deque = deque(maxlen=settings.REQUEST_LATENCY_WINDOW)
+        self.paused_until = 0.0
+        self.breaker = CircuitBreaker(settings.CIRCUIT_FAILURE_THRESHOLD, settings.CIRCUIT_COOLDOWN_SECONDS,
+                                      settings.CIRCUIT_MAX_COOLDOWN_SECONDS)
+
+
+class RequestPolicy:
+    """Adaptive retry, timeout and circuit-breaking decisions, per host.
+
+    Every source lives on its own host, so the per-host breaker is the
+    per-source breaker. Callers ask allow() before each attempt, sleep for
+    pause(), use timeout() for the request, and report the outcome with
+    record(), which says how long to wait before retrying, or not to.
+    """
+
+    def __init__(self):
+        self._hosts: Dict[str, HostPolicy] = {}
+        self._lock = threading.Lock()
+
+    def _host(self, url: str) -> HostPolicy:
+        host = urlparse(url).netloc
+        with self._lock:
+            policy = self._hosts.get(host)
+            if policy is None:
+                policy = self._hosts[host] = HostPolicy()
+            return policy
+
+    def allow(self, url: str) -> bool:
+        policy = self._host(url)
+        with self._lock:
+            return policy.breaker.allow(time.monotonic())
+
+    def pause(self, url: str) -> float:
+        """Seconds left on a Retry-After the host asked for"""
+        return max(0.0, self._host(url).paused_until - time.monotonic())
+
+    def timeout(self, url: str) -> float:
+        """A multiple of the host's recent latency percentile, within [min, TIMEOUT_SECONDS]"""
+        policy = self._host(url)
+        with self._lock:
+            samples = sorted(policy.latencies)
+        if len(samples) < settings.REQUEST_LATENCY_MIN_SAMPLES:
+            return float(settings.TIMEOUT_SECONDS)
+        index = min(len(samples) - 1, int(len(samples) * settings.REQUEST_TIMEOUT_PERCENTILE / 100))
+        timeout = samples[index] * settings.REQUEST_TIMEOUT_MULTIPLIER
+        return min(float(settings.TIMEOUT_SECONDS), max(settings.REQUEST_TIMEOUT_MIN_SECONDS, timeout))
+
+    def record(self, url: str, attempt: int, status: Optional[int] = None,
+               headers: Optional[Mapping[str, str]] = None, latency: Optional[float] = None) -> Optional[float]:
+        """Record one attempt (status None = connection error or timeout).
+        Returns seconds to wait before retrying, or None if retrying is pointless."""
+        policy = self._host(url)
+        now = time.monotonic()
+        host = urlparse(url).netloc
+        with self._lock:
+            if status is not None and status not in RETRY_STATUSES:
+                # The host answered; a 404 says nothing about its health
+                if latency is not None:
+                    policy.latencies.append(latency)
+                if policy.breaker.success():
+                    logger.info(f"Circuit for {host} closed, host has recovered")
+                return None
+
+            if policy.breaker.failure(now):
+                logger.warning(f"Circuit for {host} opened after {policy.breaker.failures} failures, "
+                               f"skipping it for {policy.breaker.cooldown:.0f}s")
+            retry_after = None
+            if headers:
+                retry_after = parse_retry_after(next((v for k, v in headers.items() if k.lower() == 'retry-after'), None))
+            if retry_after is not None:
+                pause = min(retry_after, settings.REQUEST_RETRY_MAX_SECONDS)
+                policy.paused_until = max(policy.paused_until, now + pause)
+                if retry_after > settings.REQUEST_RETRY_MAX_SECONDS:
+                    return None
+            if policy.breaker.state != CircuitBreaker.CLOSED:
+                return None
+            if retry_after is not None:
+                return retry_after
+        # Exponential backoff with full jitter
+        return random.uniform(0, min(settings.REQUEST_RETRY_MAX_SECONDS,
+                                     settings.REQUEST_RETRY_BASE_SECONDS * 2 ** (attempt + 1)))
+
+
+request_policy = RequestPolicy()
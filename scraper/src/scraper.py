@@ -1,15 +1,31 @@
 import re
 import time
 import random
+import asyncio
 import logging
 import json
-from typing import Optional, List, Dict, Any
+import threading
+from dataclasses import dataclass, field
+from typing import Optional, List, Dict, Any, Container, Tuple, Iterator, AsyncIterator, Callable
 from decimal import Decimal, InvalidOperation
 from datetime import datetime
+from concurrent.futures.process import BrokenProcessPool
+import aiohttp
 import requests
 from bs4 import BeautifulSoup
 from urllib.parse import urljoin, urlparse, quote
 
+from config import settings
+from parsing import (
+    extract_assigned_json, extract_script_json, payload_fingerprint, parse_html, script_texts,
+    find_by_class, first_descendant, element_text,
+)
+from rate_limiter import rate_limiter
+from request_policy import request_policy
+from http_cache import CachedPage, response_cache, detail_cache
+from parse_pool import parse_pool
+from http_client import http_clients
+
 logging.basicConfig(
     level=logging.INFO,
     format='%(asctime)s - %(name)s - %(levelname)s - %(message)s'
@@ -17,12 +33,93 @@ logging.basicConfig(
 logger = logging.getLogger(__name__)
 
 
+class PageFetchError(Exception):
+    """A listings page could not be fetched: the request failed or the host's circuit is open"""
+
+
+@dataclass
+class AsyncResponse:
+    """Body and metadata of a completed aiohttp request"""
+    url: str
+    status_code: int
+    text: str
+    headers: Dict[str, str] = field(default_factory=dict)
+
+
+class AsyncFetcher:
+    """Shared aiohttp session with a per-host cap on requests in flight"""
+
+    def __init__(self, per_host_limit: int = None):
+        self.per_host_limit = per_host_limit or settings.MAX_CONCURRENT_REQUESTS_PER_HOST
+        self.session: Optional[aiohttp.ClientSession] = None
+        self._host_slots: Dict[str, asyncio.Semaphore] = {}
+
+    async def __aenter__(self) -> 'AsyncFetcher':
+        self.session = http_clients.async_session(self.per_host_limit)
+        return self
+
+    async def __aexit__(self, exc_type, exc, tb) -> None:
+        if self.session:
+            await self.session.close()
+            self.session = None
+
+    def host_slot(self, url: str) -> asyncio.Semaphore:
+        host = urlparse(url).netloc
+        if host not in self._host_slots:
+            self._host_slots[host] = asyncio.Semaphore(self.per_host_limit)
+        return self._host_slots[host]
+
+
+# One parser instance per scraper class in each parse-pool worker process
+_worker_scrapers: Dict[type, 'BaseScraper'] = {}
+
+
+def _parse_page_in_worker(scraper_cls: type, html: str, city: str, previous_digest: Optional[bytes]):
+    """Parse-pool entry point: run scraper_cls._parse_page on a raw page body"""
+    scraper = _worker_scrapers.get(scraper_cls)
+    if scraper is None:
+        scraper = _worker_scrapers[scraper_cls] = scraper_cls()
+    return scraper._parse_page(html, city, previous_digest)
+
+
+# Listing fields a detail page can fill in; a listing missing a core field is enriched first
+DETAIL_FIELDS = (
+    'price', 'size_sqm', 'district', 'bedrooms', 'bathrooms', 'latitude', 'longitude', 'full_address',
+    'description', 'main_image_url', 'image_urls', 'contact_name', 'contact_phone', 'floor',
+    'building_age_years', 'furnished',
+)
+DETAIL_CORE_FIELDS = ('price', 'size_sqm', 'district')
+
+
+def _missing(value: Any) -> bool:
+    return value is None or value == '' or value == []
+
+
+def merge_details(listing: Dict[str, Any], details: Dict[str, Any]) -> bool:
+    """Fill fields the search page left empty. Returns True if anything was added."""
+    added = False
+    for key in DETAIL_FIELDS:
+        if _missing(listing.get(key)) and not _missing(details.get(key)):
+            listing[key] = details[key]
+            added = True
+    return added
+
+
 class BaseScraper:
     """Base scraper with common utilities"""
 
     def __init__(self):
-        self.session = requests.Session()
         self.source_name = "unknown"
+        # (city, page) -> payload fingerprint and the listings parsed from it, kept across runs
+        self._page_payloads: Dict[Tuple[Optional[str], int], Tuple[bytes, List[Dict[str, Any]]]] = {}
+        # Detail pages this source may still fetch in the current run (cache hits are free)
+        self._detail_budget = settings.DETAIL_BUDGET_PER_HOST
+        self._detail_lock = threading.Lock()
+
+    @property
+    def session(self) -> requests.Session:
+        """This source's session from the shared client pool (own cookie jar, shared connections)"""
+        return http_clients.session(self.source_name)
 
     def _get_random_user_agent(self) -> str:
         user_agents = [
@@ -58,31 +155,444 @@ class BaseScraper:
             logger.warning(f"Failed to parse price: {price_text} - {e}")
             return None
 
-    def _safe_request(self, url: str, method: str = 'GET', retries: int = 3,
+    def _safe_request(self, url: str, method: str = 'GET', retries: int = None,
                       headers: Dict = None, json_data: Dict = None,
-                      timeout: int = 30) -> Optional[requests.Response]:
+                      timeout: float = None) -> Optional[requests.Response]:
+        """Request with the adaptive policy: latency-based timeouts, backoff or
+        Retry-After between attempts, and no attempts while the host's circuit is open"""
+        retries = retries or settings.MAX_RETRIES
         for attempt in range(retries):
+            if not request_policy.allow(url):
+                logger.info(f"{self.source_name}: circuit open, skipping {url}")
+                return None
+            req_headers = {
+                'User-Agent': self._get_random_user_agent(),
+                'Accept-Language': 'ar-SA,ar;q=0.9,en;q=0.8',
+            }
+            if headers:
+                req_headers.update(headers)
+            request_timeout = timeout or request_policy.timeout(url)
+            time.sleep(request_policy.pause(url))
+            rate_limiter.acquire(url)
+            started = time.monotonic()
             try:
-                req_headers = {
-                    'User-Agent': self._get_random_user_agent(),
-                    'Accept-Language': 'ar-SA,ar;q=0.9,en;q=0.8',
-                }
-                if headers:
-                    req_headers.update(headers)
                 if method == 'POST':
-                    response = self.session.post(url, headers=req_headers, json=json_data, timeout=timeout)
+                    response = self.session.post(url, headers=req_headers, json=json_data, timeout=request_timeout)
                 else:
-                    response = self.session.get(url, headers=req_headers, timeout=timeout)
-                response.raise_for_status()
-                return response
+                    response = self.session.get(url, headers=req_headers, timeout=request_timeout)
             except requests.exceptions.RequestException as e:
-                wait_time = (attempt + 1) * 2 + random.uniform(0, 2)
-                logger.warning(f"Request failed (attempt {attempt + 1}/{retries}): {url} - {e}")
-                if attempt < retries - 1:
-                    time.sleep(wait_time)
+                response, error = None, e
+            else:
+                error = f"HTTP {response.status_code}"
+            delay = request_policy.record(url, attempt, response.status_code if response is not None else None,
+                                          response.headers if response is not None else None,
+                                          time.monotonic() - started)
+            if response is not None and response.ok:
+                return response
+            logger.warning(f"Request failed (attempt {attempt + 1}/{retries}): {url} - {error}")
+            if delay is None:
+                return None
+            if attempt < retries - 1:
+                time.sleep(delay)
         logger.error(f"All {retries} attempts failed for: {url}")
         return None
 
+    async def _async_safe_request(self, fetcher: AsyncFetcher, url: str, method: str = 'GET',
+                                  retries: int = None, headers: Dict = None, json_data: Dict = None,
+                                  timeout: float = None) -> Optional[AsyncResponse]:
+        """Async sibling of _safe_request, bounded by the fetcher's per-host cap"""
+        retries = retries or settings.MAX_RETRIES
+        for attempt in range(retries):
+            if not request_policy.allow(url):
+                logger.info(f"{self.source_name}: circuit open, skipping {url}")
+                return None
+            req_headers = dict(self.session.headers)
+            req_headers.update({
+                'User-Agent': self._get_random_user_agent(),
+                'Accept-Language': 'ar-SA,ar;q=0.9,en;q=0.8',
+            })
+            if headers:
+                req_headers.update(headers)
+            cookie = http_clients.cookie_header(self.source_name, url)
+            if cookie:
+                req_headers['Cookie'] = cookie
+            status, resp_headers, result = None, None, None
+            async with fetcher.host_slot(url):
+                await asyncio.sleep(request_policy.pause(url))
+                await rate_limiter.acquire_async(url)
+                started = time.monotonic()
+                try:
+                    async with fetcher.session.request(
+                        method, url, headers=req_headers, json=json_data,
+                        timeout=aiohttp.ClientTimeout(total=timeout or request_policy.timeout(url)),
+                    ) as response:
+                        status, resp_headers = response.status, dict(response.headers)
+                        http_clients.extract_cookies(self.source_name, str(response.url),
+                                                     response.headers.getall('Set-Cookie', []))
+                        if response.ok:
+                            text = await response.text()
+                            result = AsyncResponse(str(response.url), response.status, text, resp_headers)
+                    error = f"HTTP {status}"
+                except (aiohttp.ClientError, asyncio.TimeoutError) as e:
+                    status, error = None, e
+            delay = request_policy.record(url, attempt, status, resp_headers, time.monotonic() - started)
+            if result is not None:
+                return result
+            logger.warning(f"Request failed (attempt {attempt + 1}/{retries}): {url} - {error}")
+            if delay is None:
+                return None
+            if attempt < retries - 1:
+                await asyncio.sleep(delay)
+        logger.error(f"All {retries} attempts failed for: {url}")
+        return None
+
+    def reset_run_state(self) -> None:
+        """Drop any per-run state before a new scrape run starts"""
+        with self._detail_lock:
+            self._detail_budget = settings.DETAIL_BUDGET_PER_HOST
+
+    def queue_targets(self, cities: List[str], max_pages: int) -> List[Tuple[Optional[str], int]]:
+        """(city, max pages) units this source is scraped in on the work queue; None is a source-wide feed"""
+        return [(city, max_pages) for city in cities]
+
+    def _listings_url(self, city: str, page: int) -> str:
+        raise NotImplementedError
+
+    def _listings_headers(self) -> Optional[Dict]:
+        return None
+
+    def _extract_payload(self, html: str) -> Optional[Any]:
+        """Structured listings payload embedded in the page, if the source has one"""
+        return None
+
+    def _parse_listings(self, html: str, payload: Optional[Any], city: str) -> List[Dict[str, Any]]:
+        raise NotImplementedError
+
+    def _parse_listings_html(self, html: str, city: str) -> List[Dict[str, Any]]:
+        return self._parse_listings(html, self._extract_payload(html), city)
+
+    def _cached_listings_page(self, url: str) -> Tuple[Optional[CachedPage], Optional[Dict]]:
+        """Cache entry for url (if any) and the request headers to fetch or revalidate it"""
+        headers = self._listings_headers()
+        if response_cache is None:
+            return None, headers
+        cached = response_cache.get(url)
+        if cached is not None:
+            headers = {**(headers or {}), **cached.conditional_headers()}
+        return cached, headers
+
+    def _reuse_listings(self, listings: List[Dict[str, Any]], page: int, reason: str) -> List[Dict[str, Any]]:
+        """Serve a page's earlier parse result, flagged so the runner skips DB work for it"""
+        logger.info(f"{self.source_name}: page {page} {reason}, reusing {len(listings)} listings")
+        return [{**listing, 'page_unchanged': True} for listing in listings]
+
+    def _parse_page(self, html: str, city: str,
+                    previous_digest: Optional[bytes]) -> Tuple[Optional[bytes], Optional[List[Dict[str, Any]]]]:
+        """Extract, fingerprint and parse one page body.
+
+        Returns (payload digest, listings); listings is None when the payload
+        matches previous_digest and parsing was skipped.
+        """
+        payload = self._extract_payload(html)
+        digest = payload_fingerprint(payload) if payload is not None else None
+        if digest is not None and digest == previous_digest:
+            return digest, None
+        return digest, self._parse_listings(html, payload, city)
+
+    def _parse_body(self, html: str, city: str, previous_digest: Optional[bytes]):
+        """_parse_page, in the parse pool when one is configured"""
+        executor = parse_pool.executor()
+        if executor is None:
+            return self._parse_page(html, city, previous_digest)
+        try:
+            return executor.submit(_parse_page_in_worker, type(self), html, city, previous_digest).result()
+        except BrokenProcessPool:
+            logger.warning(f"{self.source_name}: parse pool broke, parsing in process")
+            parse_pool.reset()
+            return self._parse_page(html, city, previous_digest)
+
+    async def _parse_body_async(self, html: str, city: str, previous_digest: Optional[bytes]):
+        executor = parse_pool.executor()
+        if executor is None:
+            return self._parse_page(html, city, previous_digest)
+        try:
+            return await asyncio.get_running_loop().run_in_executor(
+                executor, _parse_page_in_worker, type(self), html, city, previous_digest
+            )
+        except BrokenProcessPool:
+            logger.warning(f"{self.source_name}: parse pool broke, parsing in process")
+            parse_pool.reset()
+            return self._parse_page(html, city, previous_digest)
+
+    def _not_modified(self, url: str, page: int, headers: Dict[str, str],
+                      cached: CachedPage) -> List[Dict[str, Any]]:
+        response_cache.revalidated(url, cached, headers)
+        return self._reuse_listings(cached.listings, page, 'not modified')
+
+    def _store_parsed(self, url: str, city: str, page: int, headers: Dict[str, str],
+                      previous: Optional[Tuple[bytes, List[Dict[str, Any]]]], digest: Optional[bytes],
+                      listings: Optional[List[Dict[str, Any]]]) -> List[Dict[str, Any]]:
+        """Record a parsed page (payload fingerprint, response cache) and return its listings"""
+        if listings is None:
+            if response_cache is not None:
+                response_cache.put(url, headers, previous[1])
+            return self._reuse_listings(previous[1], page, 'payload unchanged')
+
+        # Only remember payloads that produced the listings; empty ones fell back to the HTML
+        if digest is not None and listings:
+            self._page_payloads[(city, page)] = (digest, [dict(listing) for listing in listings])
+        if response_cache is not None:
+            response_cache.put(url, headers, listings)
+        logger.info(f"{self.source_name}: {len(listings)} listings from page {page}")
+        return listings
+
+    def fetch_listings_page(self, city: str, page: int = 1) -> List[Dict[str, Any]]:
+        """Listings of one page; raises PageFetchError if the page could not be fetched"""
+        url = self._listings_url(city, page)
+        cached, headers = self._cached_listings_page(url)
+        if cached is not None and response_cache.is_fresh(cached):
+            return self._reuse_listings(cached.listings, page, 'cached')
+
+        logger.info(f"Scraping {self.source_name}: {url}")
+        response = self._safe_request(url, headers=headers)
+        if not response:
+            raise PageFetchError(f"no response for {url}")
+
+        if response.status_code == 304 and cached is not None:
+            return self._not_modified(url, page, response.headers, cached)
+        previous = self._page_payloads.get((city, page))
+        digest, parsed = self._parse_body(response.text, city, previous[0] if previous else None)
+        return self._store_parsed(url, city, page, response.headers, previous, digest, parsed)
+
+    async def fetch_listings_page_async(self, fetcher: AsyncFetcher, city: str,
+                                        page: int = 1) -> List[Dict[str, Any]]:
+        url = self._listings_url(city, page)
+        cached, headers = self._cached_listings_page(url)
+        if cached is not None and response_cache.is_fresh(cached):
+            return self._reuse_listings(cached.listings, page, 'cached')
+
+        logger.info(f"Scraping {self.source_name}: {url}")
+        response = await self._async_safe_request(fetcher, url, headers=headers)
+        if not response:
+            raise PageFetchError(f"no response for {url}")
+
+        if response.status_code == 304 and cached is not None:
+            return self._not_modified(url, page, response.headers, cached)
+        previous = self._page_payloads.get((city, page))
+        digest, parsed = await self._parse_body_async(response.text, city, previous[0] if previous else None)
+        return self._store_parsed(url, city, page, response.headers, previous, digest, parsed)
+
+    def scrape_listings_page(self, city: str, page: int = 1) -> List[Dict[str, Any]]:
+        """fetch_listings_page, with errors logged and an empty page returned instead"""
+        try:
+            return self.fetch_listings_page(city, page)
+        except Exception as e:
+            logger.error(f"Error scraping {self.source_name} page: {e}")
+            return []
+
+    async def scrape_listings_page_async(self, fetcher: AsyncFetcher, city: str,
+                                         page: int = 1) -> List[Dict[str, Any]]:
+        try:
+            return await self.fetch_listings_page_async(fetcher, city, page)
+        except Exception as e:
+            logger.error(f"Error scraping {self.source_name} page: {e}")
+            return []
+
+    def _continue_paging(self, page_listings: List[Dict[str, Any]], page: int, max_pages: int,
+                         known_ids: Optional[Container[str]] = None, city: str = None) -> bool:
+        """Decide whether to fetch the page after `page`.
+
+        Without known_ids this is a plain crawl of max_pages. With known_ids
+        (incremental mode) paging stops once a page is mostly listings we
+        already have, and continues past max_pages, up to
+        INCREMENTAL_MAX_PAGE_FACTOR times deeper, while pages stay mostly new.
+        """
+        if not page_listings:
+            return False
+        if known_ids is None:
+            return page < max_pages
+
+        known = sum(1 for listing in page_listings if listing['external_id'] in known_ids)
+        known_ratio = known / len(page_listings)
+        if known_ratio >= settings.INCREMENTAL_STOP_KNOWN_RATIO:
+            logger.info(f"{self.source_name}: page {page} for {city} is {known_ratio:.0%} known, stopping")
+            return False
+        if page < max_pages:
+            return True
+        if 1 - known_ratio >= settings.INCREMENTAL_DEEP_NEW_RATIO and \
+                page < max_pages * settings.INCREMENTAL_MAX_PAGE_FACTOR:
+            logger.info(f"{self.source_name}: page {page} for {city} is {1 - known_ratio:.0%} new, paging deeper")
+            return True
+        return False
+
+    def iter_city_pages(self, city: str, max_pages: int = 3, known_ids: Optional[Container[str]] = None,
+                        start_page: int = 1) -> Iterator[Tuple[int, List[Dict[str, Any]]]]:
+        """Yield (page, listings) for each listings page of a city as soon as it is parsed.
+
+        A page that cannot be fetched or parsed ends the iteration with its
+        error, so callers can tell a failed crawl from one that ran out of pages.
+        """
+        logger.info(f"{self.source_name}: Starting scrape for: {city}")
+        if known_ids is None and start_page > max_pages:
+            return  # A plain crawl resumed past its last page has nothing left to fetch
+        page = start_page
+        while True:
+            page_listings = self.fetch_listings_page(city, page=page)
+            if page_listings:
+                yield page, page_listings
+            if not self._continue_paging(page_listings, page, max_pages, known_ids, city):
+                break
+            page += 1
+
+    async def iter_city_pages_async(self, fetcher: AsyncFetcher, city: str, max_pages: int = 3,
+                                    known_ids: Optional[Container[str]] = None,
+                                    start_page: int = 1) -> AsyncIterator[Tuple[int, List[Dict[str, Any]]]]:
+        """Fetch pages in waves of the per-host cap and yield them in page order,
+        applying the same stop rules as iter_city_pages"""
+        logger.info(f"{self.source_name}: Starting async scrape for: {city}")
+        if known_ids is None and start_page > max_pages:
+            return
+        page = start_page
+        paging = True
+        while paging:
+            # Never fetch speculatively past max_pages. Deeper pages go one at a time, each only
+            # after _continue_paging found the page before it new enough (as in iter_city_pages)
+            wave = range(page, min(page + fetcher.per_host_limit, max_pages + 1)) if page <= max_pages \
+                else range(page, page + 1)
+            results = await asyncio.gather(*(self.fetch_listings_page_async(fetcher, city, p) for p in wave),
+                                           return_exceptions=True)
+            for p, page_listings in zip(wave, results):
+                if isinstance(page_listings, BaseException):
+                    raise page_listings
+                if page_listings:
+                    yield p, page_listings
+                if not self._continue_paging(page_listings, p, max_pages, known_ids, city):
+                    paging = False
+                    break
+            page += len(wave)
+
+    def scrape_city(self, city: str, max_pages: int = 3, scrape_details: bool = False,
+                    known_ids: Optional[Container[str]] = None, start_page: int = 1) -> List[Dict[str, Any]]:
+        all_listings = []
+        seen_ids = set()
+        try:
+            for _, page_listings in self.iter_city_pages(city, max_pages, known_ids, start_page):
+                for listing in page_listings:
+                    if listing['external_id'] not in seen_ids:
+                        seen_ids.add(listing['external_id'])
+                        all_listings.append(listing)
+        except Exception as e:
+            logger.error(f"Error scraping {self.source_name} page: {e}")
+
+        if scrape_details:
+            self.enrich_listings(all_listings)
+        logger.info(f"{self.source_name}: Total for {city}: {len(all_listings)}")
+        return all_listings
+
+    async def scrape_city_async(self, city: str, max_pages: int = 3, scrape_details: bool = False,
+                                fetcher: AsyncFetcher = None,
+                                known_ids: Optional[Container[str]] = None) -> List[Dict[str, Any]]:
+        if fetcher is None:
+            async with AsyncFetcher() as own_fetcher:
+                return await self.scrape_city_async(city, max_pages, scrape_details,
+                                                    fetcher=own_fetcher, known_ids=known_ids)
+
+        all_listings = []
+        seen_ids = set()
+        try:
+            async for _, page_listings in self.iter_city_pages_async(fetcher, city, max_pages, known_ids):
+                for listing in page_listings:
+                    if listing['external_id'] not in seen_ids:
+                        seen_ids.add(listing['external_id'])
+                        all_listings.append(listing)
+        except Exception as e:
+            logger.error(f"Error scraping {self.source_name} page: {e}")
+
+        if scrape_details:
+            await self.enrich_listings_async(fetcher, all_listings)
+        logger.info(f"{self.source_name}: Total for {city}: {len(all_listings)}")
+        return all_listings
+
+    def _parse_detail(self, html: str, listing: Dict[str, Any]) -> Dict[str, Any]:
+        """Listing fields from a detail page; {} for sources without a detail parser"""
+        return {}
+
+    def _take_detail_budget(self) -> bool:
+        with self._detail_lock:
+            if self._detail_budget <= 0:
+                return False
+            self._detail_budget -= 1
+            return True
+
+    async def fetch_details_async(self, fetcher: AsyncFetcher, listing: Dict[str, Any]) -> Optional[Dict[str, Any]]:
+        """Fields from a listing's detail page, served from the detail cache while fresh
+        and revalidated with a conditional request once stale"""
+        url = listing.get('source_url')
+        if not url:
+            return None
+        cached = detail_cache.get(url) if detail_cache is not None else None
+        if cached is not None and detail_cache.is_fresh(cached):
+            return cached.listings[0] if cached.listings else {}
+        if not self._take_detail_budget():
+            return None
+
+        headers = dict(self._listings_headers() or {})
+        if cached is not None:
+            headers.update(cached.conditional_headers())
+        response = await self._async_safe_request(fetcher, url, headers=headers)
+        if not response:
+            return None
+        if response.status_code == 304 and cached is not None:
+            detail_cache.revalidated(url, cached, response.headers)
+            return cached.listings[0] if cached.listings else {}
+        try:
+            details = self._parse_detail(response.text, listing)
+        except Exception as e:
+            logger.warning(f"{self.source_name}: detail parse failed for {url}: {e}")
+            return None
+        if detail_cache is not None:
+            detail_cache.put(url, response.headers, [details])
+        return details
+
+    def _detail_candidates(self, listings: List[Dict[str, Any]],
+                           score: Optional[Callable[[Dict[str, Any]], float]] = None) -> List[Dict[str, Any]]:
+        """Listings worth a detail page, most valuable first: missing core fields, then
+        high preliminary scores. Complete listings below DETAIL_MIN_SCORE are left alone."""
+        ranked = []
+        for listing in listings:
+            if listing.get('page_unchanged') or not listing.get('source_url'):
+                continue
+            missing = sum(1 for key in DETAIL_CORE_FIELDS if _missing(listing.get(key)))
+            preliminary = score(listing) if score else 0
+            if missing or preliminary >= settings.DETAIL_MIN_SCORE:
+                ranked.append((-missing, -preliminary, len(ranked), listing))
+        ranked.sort(key=lambda item: item[:3])
+        return [item[3] for item in ranked]
+
+    async def enrich_listings_async(self, fetcher: AsyncFetcher, listings: List[Dict[str, Any]],
+                                    score: Optional[Callable[[Dict[str, Any]], float]] = None) -> int:
+        """Fill in listings from their detail pages. Returns how many gained fields.
+
+        Requests go out in priority order through the fetcher's per-host cap,
+        so once the run's budget is spent only the best candidates got one.
+        """
+        candidates = self._detail_candidates(listings, score)
+        if not candidates:
+            return 0
+        results = await asyncio.gather(*(self.fetch_details_async(fetcher, listing) for listing in candidates),
+                                       return_exceptions=True)
+        enriched = sum(1 for listing, details in zip(candidates, results)
+                       if isinstance(details, dict) and merge_details(listing, details))
+        logger.info(f"{self.source_name}: enriched {enriched}/{len(candidates)} listings from detail pages")
+        return enriched
+
+    def enrich_listings(self, listings: List[Dict[str, Any]],
+                        score: Optional[Callable[[Dict[str, Any]], float]] = None) -> int:
+        async def run() -> int:
+            async with AsyncFetcher(settings.DETAIL_CONCURRENCY_PER_HOST) as fetcher:
+                return await self.enrich_listings_async(fetcher, listings, score)
+        return asyncio.run(run())
+
 
 class AqarScraper(BaseScraper):
     """Scraper for sa.aqar.fm - uses Apollo GraphQL state extraction"""
@@ -101,9 +611,9 @@ class AqarScraper(BaseScraper):
         """Extract structured data from page HTML (__APOLLO_STATE__ or __NEXT_DATA__)"""
         try:
             # Pattern 1: __APOLLO_STATE__ as global var
-            match = re.search(r'__APOLLO_STATE__\s*=\s*({.*?});?\s*</script>', html, re.DOTALL)
-            if match:
-                return json.loads(match.group(1))
+            apollo = extract_assigned_json(html, '__APOLLO_STATE__')
+            if isinstance(apollo, dict):
+                return apollo
 
             # Helper to extract apollo state from __NEXT_DATA__
             def _extract_from_next_data(next_data):
@@ -119,18 +629,17 @@ class AqarScraper(BaseScraper):
                 return page_props or None
 
             # Pattern 2: __NEXT_DATA__ inline
-            match2 = re.search(r'__NEXT_DATA__\s*=\s*({.*?})\s*</script>', html, re.DOTALL)
-            if match2:
-                return _extract_from_next_data(json.loads(match2.group(1)))
+            next_data = extract_assigned_json(html, '__NEXT_DATA__')
+            if isinstance(next_data, dict):
+                return _extract_from_next_data(next_data)
 
             # Pattern 3: script tag with id
-            soup = BeautifulSoup(html, 'html.parser')
-            script = soup.find('script', id='__NEXT_DATA__')
-            if script and script.string:
-                return _extract_from_next_data(json.loads(script.string))
+            next_data = extract_script_json(html, '__NEXT_DATA__')
+            if isinstance(next_data, dict):
+                return _extract_from_next_data(next_data)
 
             return None
-        except (json.JSONDecodeError, AttributeError) as e:
+        except AttributeError as e:
             logger.warning(f"Failed to extract page data: {e}")
             return None
 
@@ -198,6 +707,19 @@ class AqarScraper(BaseScraper):
             logger.warning(f"Error parsing aqar listing: {e}")
             return None
 
+    def _parse_detail(self, html: str, listing: Dict[str, Any]) -> Dict[str, Any]:
+        """The listing's own entry in the detail page's Apollo/Next.js state"""
+        page_data = self._extract_page_data(html)
+        if not isinstance(page_data, dict):
+            return {}
+        listing_id = listing['external_id'].split('-', 1)[-1]
+        candidates = [value for value in page_data.values() if isinstance(value, dict)]
+        candidates.append(page_data.get('listing'))
+        for data in candidates:
+            if isinstance(data, dict) and str(data.get('id', '')) == listing_id:
+                return self._parse_listing(data, listing['city']) or {}
+        return {}
+
     def _detect_property_type(self, title: str) -> str:
         type_map = {
             'شقة': 'apartment', 'شقق': 'apartment',
@@ -216,50 +738,43 @@ class AqarScraper(BaseScraper):
                 return en
         return 'apartment'
 
-    def scrape_listings_page(self, city: str, page: int = 1) -> List[Dict[str, Any]]:
+    def _listings_url(self, city: str, page: int) -> str:
+        url = f"{self.base_url}/%D8%B9%D9%82%D8%A7%D8%B1%D8%A7%D8%AA/{quote(city, safe='')}"
+        if page > 1:
+            url += f"/{page}"
+        return url
+
+    def _extract_payload(self, html: str) -> Optional[Any]:
+        return self._extract_page_data(html)
+
+    def _parse_listings(self, html: str, page_data: Optional[Dict], city: str) -> List[Dict[str, Any]]:
         listings = []
-        try:
-            url = f"{self.base_url}/%D8%B9%D9%82%D8%A7%D8%B1%D8%A7%D8%AA/{quote(city, safe='')}"
-            if page > 1:
-                url += f"/{page}"
-
-            logger.info(f"Scraping aqar.fm: {url}")
-            response = self._safe_request(url)
-            if not response:
-                return listings
-
-            page_data = self._extract_page_data(response.text)
-            if page_data:
-                # Check for Apollo-style cache entries
-                for key, value in page_data.items():
-                    if isinstance(value, dict) and value.get('__typename') == 'ElasticWebListing':
-                        listing = self._parse_listing(value, city)
-                        if listing:
-                            listings.append(listing)
-
-                # Check for listings array in page props
-                if not listings:
-                    for key in ['listings', 'data']:
-                        items = page_data.get(key, [])
-                        if isinstance(items, dict):
-                            items = items.get('listings', [])
-                        if isinstance(items, list):
-                            for item in items:
-                                if isinstance(item, dict):
-                                    listing = self._parse_listing(item, city)
-                                    if listing:
-                                        listings.append(listing)
-                            if listings:
-                                break
-
-            # Fallback: JSON-LD + link parsing
+        if page_data:
+            # Check for Apollo-style cache entries
+            for key, value in page_data.items():
+                if isinstance(value, dict) and value.get('__typename') == 'ElasticWebListing':
+                    listing = self._parse_listing(value, city)
+                    if listing:
+                        listings.append(listing)
+
+            # Check for listings array in page props
             if not listings:
-                listings = self._fallback_parse(response.text, city)
+                for key in ['listings', 'data']:
+                    items = page_data.get(key, [])
+                    if isinstance(items, dict):
+                        items = items.get('listings', [])
+                    if isinstance(items, list):
+                        for item in items:
+                            if isinstance(item, dict):
+                                listing = self._parse_listing(item, city)
+                                if listing:
+                                    listings.append(listing)
+                        if listings:
+                            break
 
-            logger.info(f"aqar.fm: {len(listings)} listings from page {page}")
-            time.sleep(random.uniform(1.5, 3))
-        except Exception as e:
-            logger.error(f"Error scraping aqar.fm page: {e}")
+        # Fallback: JSON-LD + link parsing
+        if not listings:
+            listings = self._fallback_parse(html, city)
         return listings
 
     def _fallback_parse(self, html: str, city: str) -> List[Dict[str, Any]]:
@@ -317,23 +832,6 @@ class AqarScraper(BaseScraper):
             logger.warning(f"Fallback parse failed: {e}")
         return listings
 
-    def scrape_city(self, city: str, max_pages: int = 3, scrape_details: bool = False) -> List[Dict[str, Any]]:
-        all_listings = []
-        seen_ids = set()
-
-        logger.info(f"aqar.fm: Starting scrape for: {city}")
-        for page in range(1, max_pages + 1):
-            page_listings = self.scrape_listings_page(city, page=page)
-            if not page_listings:
-                break
-            for listing in page_listings:
-                if listing['external_id'] not in seen_ids:
-                    seen_ids.add(listing['external_id'])
-                    all_listings.append(listing)
-
-        logger.info(f"aqar.fm: Total for {city}: {len(all_listings)}")
-        return all_listings
-
 
 class BayutScraper(BaseScraper):
     """Scraper for bayut.sa"""
@@ -351,58 +849,77 @@ class BayutScraper(BaseScraper):
         'الجبيل': 'jubail', 'القطيف': 'qatif', 'خميس-مشيط': 'khamis-mushait',
     }
 
-    def scrape_listings_page(self, city: str, page: int = 1) -> List[Dict[str, Any]]:
-        listings = []
+    def _listings_url(self, city: str, page: int) -> str:
         city_slug = self.CITY_SLUGS.get(city, city.lower())
+        url = f"{self.base_url}/for-sale/property/{city_slug}/"
+        if page > 1:
+            url += f"page-{page}/"
+        return url
+
+    def _listings_headers(self) -> Optional[Dict]:
+        return {
+            'Accept': 'text/html,application/xhtml+xml',
+            'Referer': self.base_url,
+        }
 
-        try:
-            url = f"{self.base_url}/for-sale/property/{city_slug}/"
-            if page > 1:
-                url += f"page-{page}/"
-
-            logger.info(f"Scraping bayut.sa: {url}")
-            response = self._safe_request(url, headers={
-                'Accept': 'text/html,application/xhtml+xml',
-                'Referer': self.base_url,
-            })
-            if not response:
-                return listings
+    def _extract_payload(self, html: str) -> Optional[Any]:
+        """Search hits from __NEXT_DATA__, decoded in place without a DOM"""
+        next_data = extract_script_json(html, '__NEXT_DATA__')
+        if isinstance(next_data, dict):
+            return next_data.get('props', {}).get('pageProps', {}).get('hits', [])
+        return None
 
-            soup = BeautifulSoup(response.text, 'html.parser')
+    def _parse_listings(self, html: str, hits: Optional[List], city: str) -> List[Dict[str, Any]]:
+        listings = []
 
-            # __NEXT_DATA__
-            script = soup.find('script', id='__NEXT_DATA__')
-            if script and script.string:
+        if hits is not None:
+            for hit in hits:
+                listing = self._parse_hit(hit, city)
+                if listing:
+                    listings.append(listing)
+
+        # Fallback: JSON-LD
+        if not listings:
+            tree = parse_html(html)
+            for text in (script_texts(tree, 'application/ld+json') if tree is not None else []):
+                if not text:
+                    continue
                 try:
-                    next_data = json.loads(script.string)
-                    hits = next_data.get('props', {}).get('pageProps', {}).get('hits', [])
-                    for hit in hits:
-                        listing = self._parse_hit(hit, city)
-                        if listing:
-                            listings.append(listing)
-                except json.JSONDecodeError as e:
-                    logger.warning(f"bayut.sa: JSON parse error: {e}")
-
-            # Fallback: JSON-LD
-            if not listings:
-                for s in soup.find_all('script', type='application/ld+json'):
-                    try:
-                        data = json.loads(s.string)
-                        items = data if isinstance(data, list) else [data]
-                        for item in items:
-                            if isinstance(item, dict) and item.get('@type') in ['Product', 'RealEstateListing', 'Residence']:
-                                listing = self._parse_jsonld(item, city)
-                                if listing:
-                                    listings.append(listing)
-                    except json.JSONDecodeError:
-                        continue
-
-            logger.info(f"bayut.sa: {len(listings)} listings from page {page}")
-            time.sleep(random.uniform(2, 4))
-        except Exception as e:
-            logger.error(f"Error scraping bayut.sa: {e}")
+                    data = json.loads(text)
+                    items = data if isinstance(data, list) else [data]
+                    for item in items:
+                        if isinstance(item, dict) and item.get('@type') in ['Product', 'RealEstateListing', 'Residence']:
+                            listing = self._parse_jsonld(item, city)
+                            if listing:
+                                listings.append(listing)
+                except json.JSONDecodeError:
+                    continue
         return listings
 
+    def _parse_detail(self, html: str, listing: Dict[str, Any]) -> Dict[str, Any]:
+        """Property object from the detail page's __NEXT_DATA__, else its JSON-LD"""
+        next_data = extract_script_json(html, '__NEXT_DATA__')
+        if isinstance(next_data, dict):
+            page_props = next_data.get('props', {}).get('pageProps', {})
+            for key in ('property', 'propertyData', 'listing', 'hit'):
+                data = page_props.get(key)
+                if isinstance(data, dict):
+                    parsed = self._parse_hit(data, listing['city'])
+                    if parsed:
+                        return parsed
+        tree = parse_html(html)
+        for text in (script_texts(tree, 'application/ld+json') if tree is not None else []):
+            try:
+                data = json.loads(text) if text else None
+            except json.JSONDecodeError:
+                continue
+            for item in (data if isinstance(data, list) else [data]):
+                if isinstance(item, dict) and item.get('@type') in ['Product', 'RealEstateListing', 'Residence']:
+                    parsed = self._parse_jsonld(item, listing['city'])
+                    if parsed:
+                        return parsed
+        return {}
+
     def _parse_hit(self, hit: Dict, city: str) -> Optional[Dict[str, Any]]:
         try:
             ext_id = str(hit.get('id', hit.get('externalID', '')))
@@ -501,96 +1018,304 @@ class BayutScraper(BaseScraper):
                 return ptype
         return 'apartment'
 
-    def scrape_city(self, city: str, max_pages: int = 3, scrape_details: bool = False) -> List[Dict[str, Any]]:
-        all_listings = []
-        seen_ids = set()
-        logger.info(f"bayut.sa: Starting scrape for: {city}")
-        for page in range(1, max_pages + 1):
-            page_listings = self.scrape_listings_page(city, page=page)
-            if not page_listings:
-                break
-            for listing in page_listings:
-                if listing['external_id'] not in seen_ids:
-                    seen_ids.add(listing['external_id'])
-                    all_listings.append(listing)
-        logger.info(f"bayut.sa: Total for {city}: {len(all_listings)}")
-        return all_listings
-
 
 class HarajScraper(BaseScraper):
-    """Scraper for haraj.com.sa"""
+    """Scraper for haraj.com.sa
+
+    Haraj has no per-city listing pages: every city shares one real-estate
+    feed. In feed mode the feed is fetched once per run and each post is
+    routed to a city from its own location fields or, failing that, its text.
+    """
+
+    # Keys match the city names used by ScraperRunner
+    CITY_ALIASES = {
+        'الرياض': ['الرياض', 'riyadh'],
+        'جدة': ['جدة', 'جده', 'jeddah'],
+        'مكة': ['مكة', 'مكه', 'مكة المكرمة', 'makkah', 'mecca'],
+        'المدينة': ['المدينة المنورة', 'المدينة', 'madinah', 'medina'],
+        'الدمام': ['الدمام', 'dammam'],
+        'الخبر': ['الخبر', 'khobar'],
+        'تبوك': ['تبوك', 'tabuk'],
+        'بريدة': ['بريدة', 'buraidah'],
+        'طائف': ['الطائف', 'طائف', 'taif'],
+        'أبها': ['أبها', 'abha'],
+        'نجران': ['نجران', 'najran'],
+        'حائل': ['حائل', 'حايل', 'hail'],
+        'الجبيل': ['الجبيل', 'jubail'],
+        'القطيف': ['القطيف', 'qatif'],
+        'خميس-مشيط': ['خميس مشيط', 'khamis mushait'],
+        'ينبع': ['ينبع', 'yanbu'],
+        'الظهران': ['الظهران', 'dhahran'],
+        'الأحساء': ['الأحساء', 'الاحساء', 'الهفوف', 'al ahsa'],
+        'جازان': ['جازان', 'جيزان', 'jazan'],
+        'الباحة': ['الباحة', 'al baha'],
+    }
+    # Too generic to trust when they only appear in free text
+    AMBIGUOUS_TEXT_ALIASES = {'المدينة'}
+    CARD_CLASS_RE = re.compile('post|item|card')
 
     def __init__(self):
         super().__init__()
         self.source_name = "haraj.com.sa"
         self.base_url = "https://haraj.com.sa"
+        self._alias_lookup: Dict[str, str] = {}
+        text_aliases = []
+        for city, aliases in self.CITY_ALIASES.items():
+            for alias in aliases:
+                norm = self._normalize_city(alias)
+                self._alias_lookup[norm] = city
+                if alias not in self.AMBIGUOUS_TEXT_ALIASES:
+                    text_aliases.append(norm)
+        text_aliases.sort(key=len, reverse=True)
+        self._city_text_re = re.compile(
+            r'(?<!\w)[وبلف]?(' + '|'.join(re.escape(a) for a in text_aliases) + r')(?!\w)'
+        )
+        self._feed: Optional[Dict[str, List[Dict[str, Any]]]] = None
+        self._feed_lock = threading.Lock()
+        self._feed_task: Optional[asyncio.Task] = None
+
+    @staticmethod
+    def _normalize_city(text: str) -> str:
+        text = text.lower().replace('ـ', '').replace('-', ' ')
+        text = re.sub('[أإآ]', 'ا', text)
+        return text.replace('ة', 'ه').replace('ى', 'ي').strip()
+
+    def _route_city(self, post: Dict, text: str) -> Optional[str]:
+        """Resolve the city a post belongs to: its location fields first, then its text"""
+        for key in ('city', 'cityName', 'geoCity', 'location'):
+            value = post.get(key)
+            if isinstance(value, dict):
+                value = value.get('city') or value.get('name')
+            if isinstance(value, str) and value.strip():
+                city = self._alias_lookup.get(self._normalize_city(value))
+                if city:
+                    return city
+        match = self._city_text_re.search(self._normalize_city(text))
+        if match:
+            return self._alias_lookup[match.group(1)]
+        return None
 
-    def scrape_listings_page(self, city: str, page: int = 1) -> List[Dict[str, Any]]:
-        listings = []
+    def queue_targets(self, cities: List[str], max_pages: int) -> List[Tuple[Optional[str], int]]:
+        if settings.HARAJ_FEED_MODE:
+            return [(None, settings.HARAJ_FEED_MAX_PAGES)]
+        return super().queue_targets(cities, max_pages)
+
+    def reset_run_state(self) -> None:
+        super().reset_run_state()
+        with self._feed_lock:
+            self._feed = None
+            self._feed_task = None
+
+    def _group_feed(self, listings: List[Dict[str, Any]]) -> Dict[str, List[Dict[str, Any]]]:
+        feed: Dict[str, List[Dict[str, Any]]] = {}
+        for listing in listings:
+            feed.setdefault(listing['city'], []).append(listing)
+        logger.info(f"haraj.com.sa: feed routed {len(listings)} posts to {len(feed)} cities")
+        return feed
+
+    def load_feed(self, known_ids: Optional[Container[str]] = None) -> Dict[str, List[Dict[str, Any]]]:
+        """Fetch the shared real-estate feed once per run, grouped by city.
+
+        A feed page that fails raises its PageFetchError and nothing is
+        cached, so a partial feed is never served and the next call retries.
+        """
+        with self._feed_lock:
+            if self._feed is None:
+                listings: Dict[str, Dict[str, Any]] = {}
+                for _, page_listings in super().iter_city_pages(None, max_pages=settings.HARAJ_FEED_MAX_PAGES,
+                                                                known_ids=known_ids):
+                    for listing in page_listings:
+                        listings.setdefault(listing['external_id'], listing)
+                self._feed = self._group_feed(list(listings.values()))
+            return self._feed
+
+    async def _fetch_feed_async(self, fetcher: AsyncFetcher,
+                                known_ids: Optional[Container[str]] = None) -> List[Dict[str, Any]]:
+        listings: Dict[str, Dict[str, Any]] = {}
+        async for _, page_listings in super().iter_city_pages_async(fetcher, None, settings.HARAJ_FEED_MAX_PAGES,
+                                                                    known_ids):
+            for listing in page_listings:
+                listings.setdefault(listing['external_id'], listing)
+        return list(listings.values())
+
+    async def load_feed_async(self, fetcher: AsyncFetcher,
+                              known_ids: Optional[Container[str]] = None) -> Dict[str, List[Dict[str, Any]]]:
+        if self._feed is not None:
+            return self._feed
+        task = self._feed_task
+        if task is None or task.get_loop() is not asyncio.get_running_loop():
+            task = self._feed_task = asyncio.ensure_future(self._fetch_feed_async(fetcher, known_ids))
         try:
-            url = f"{self.base_url}/tags/%D8%B9%D9%82%D8%A7%D8%B1%D8%A7%D8%AA"
-            if page > 1:
-                url += f"?page={page}"
-
-            logger.info(f"Scraping haraj.com.sa: {url}")
-            response = self._safe_request(url, headers={
-                'Accept': 'text/html,application/xhtml+xml',
-                'Referer': self.base_url,
-            })
-            if not response:
-                return listings
+            listings = await task
+        except Exception:
+            if self._feed_task is task:
+                self._feed_task = None  # Let the next city retry the feed
+            raise
+        if self._feed is None:
+            self._feed = self._group_feed(listings)
+        return self._feed
+
+    def iter_city_pages(self, city: str, max_pages: int = 2, known_ids: Optional[Container[str]] = None,
+                        start_page: int = 1) -> Iterator[Tuple[int, List[Dict[str, Any]]]]:
+        # city=None is the feed itself; a city's slice of the feed counts as its page 1
+        if not settings.HARAJ_FEED_MODE or city is None:
+            yield from super().iter_city_pages(city, max_pages, known_ids, start_page)
+            return
+        listings = self.load_feed(known_ids).get(city, [])
+        if listings and start_page <= 1:
+            yield 1, listings
+
+    async def iter_city_pages_async(self, fetcher: AsyncFetcher, city: str, max_pages: int = 2,
+                                    known_ids: Optional[Container[str]] = None,
+                                    start_page: int = 1) -> AsyncIterator[Tuple[int, List[Dict[str, Any]]]]:
+        if not settings.HARAJ_FEED_MODE or city is None:
+            async for item in super().iter_city_pages_async(fetcher, city, max_pages, known_ids, start_page):
+                yield item
+            return
+        feed = await self.load_feed_async(fetcher, known_ids)
+        listings = feed.get(city, [])
+        if listings and start_page <= 1:
+            yield 1, listings
+
+    def scrape_city(self, city: str, max_pages: int = 2, scrape_details: bool = False,
+                    known_ids: Optional[Container[str]] = None, start_page: int = 1) -> List[Dict[str, Any]]:
+        if not settings.HARAJ_FEED_MODE:
+            return super().scrape_city(city, max_pages, scrape_details, known_ids=known_ids, start_page=start_page)
+        try:
+            listings = self.load_feed(known_ids).get(city, [])
+        except Exception as e:
+            logger.error(f"Error scraping haraj.com.sa feed: {e}")
+            listings = []
+        if scrape_details:
+            self.enrich_listings(listings)
+        logger.info(f"haraj.com.sa: Total for {city}: {len(listings)}")
+        return listings
 
-            soup = BeautifulSoup(response.text, 'html.parser')
+    async def scrape_city_async(self, city: str, max_pages: int = 2, scrape_details: bool = False,
+                                fetcher: AsyncFetcher = None,
+                                known_ids: Optional[Container[str]] = None) -> List[Dict[str, Any]]:
+        if not settings.HARAJ_FEED_MODE:
+            return await super().scrape_city_async(city, max_pages, scrape_details,
+                                                   fetcher=fetcher, known_ids=known_ids)
+        if fetcher is None:
+            async with AsyncFetcher() as own_fetcher:
+                return await self.scrape_city_async(city, max_pages, scrape_details,
+                                                    fetcher=own_fetcher, known_ids=known_ids)
+        try:
+            listings = (await self.load_feed_async(fetcher, known_ids)).get(city, [])
+        except Exception as e:
+            logger.error(f"Error scraping haraj.com.sa feed: {e}")
+            listings = []
+        if scrape_details:
+            await self.enrich_listings_async(fetcher, listings)
+        logger.info(f"haraj.com.sa: Total for {city}: {len(listings)}")
+        return listings
 
-            # __NEXT_DATA__
-            script = soup.find('script', id='__NEXT_DATA__')
-            if script and script.string:
-                try:
-                    next_data = json.loads(script.string)
-                    page_props = next_data.get('props', {}).get('pageProps', {})
-                    posts = page_props.get('posts', page_props.get('data', {}).get('posts', []))
-                    if isinstance(posts, list):
-                        for post in posts:
-                            listing = self._parse_post(post, city)
-                            if listing:
-                                listings.append(listing)
-                except json.JSONDecodeError:
-                    pass
+    def _listings_url(self, city: str, page: int) -> str:
+        url = f"{self.base_url}/tags/%D8%B9%D9%82%D8%A7%D8%B1%D8%A7%D8%AA"
+        if page > 1:
+            url += f"?page={page}"
+        return url
 
-            # Fallback: HTML
-            if not listings:
-                for card in soup.find_all(['div', 'article'], class_=re.compile('post|item|card'))[:30]:
-                    link = card.find('a', href=True)
-                    if not link:
-                        continue
-                    href = link.get('href', '')
-                    title = link.get_text(strip=True)
-                    re_keywords = ['شقة', 'فيلا', 'أرض', 'عمارة', 'بيت', 'دور', 'عقار', 'للبيع']
-                    if not any(kw in title for kw in re_keywords):
-                        continue
-                    price = None
-                    pm = re.search(r'([\d,]+)\s*(ريال|SAR)', card.get_text())
-                    if pm:
-                        price = self._parse_price(pm.group(1))
-                    ext_id = href.rstrip('/').split('/')[-1]
-                    listings.append({
-                        'external_id': f"haraj-{ext_id}",
-                        'source': 'haraj.com.sa',
-                        'source_url': href if href.startswith('http') else f"{self.base_url}{href}",
-                        'title': title[:200],
-                        'price': price,
-                        'city': city,
-                        'district': '',
-                        'property_type': self._detect_type(title),
-                        'scraped_at': datetime.now(),
-                    })
+    def _listings_headers(self) -> Optional[Dict]:
+        return {
+            'Accept': 'text/html,application/xhtml+xml',
+            'Referer': self.base_url,
+        }
 
-            logger.info(f"haraj.com.sa: {len(listings)} listings from page {page}")
-            time.sleep(random.uniform(2, 4))
-        except Exception as e:
-            logger.error(f"Error scraping haraj.com.sa: {e}")
+    def _extract_payload(self, html: str) -> Optional[Any]:
+        """Posts from __NEXT_DATA__, decoded in place without a DOM"""
+        next_data = extract_script_json(html, '__NEXT_DATA__')
+        if isinstance(next_data, dict):
+            page_props = next_data.get('props', {}).get('pageProps', {})
+            posts = page_props.get('posts', page_props.get('data', {}).get('posts', []))
+            if isinstance(posts, list):
+                return posts
+        return None
+
+    def _parse_listings(self, html: str, posts: Optional[List], city: str) -> List[Dict[str, Any]]:
+        listings = []
+
+        if posts is not None:
+            for post in posts:
+                post_city = city
+                if post_city is None and isinstance(post, dict):
+                    text = f"{post.get('title', post.get('postTitle', ''))} {post.get('body', post.get('postText', ''))}"
+                    post_city = self._route_city(post, text)
+                    if not post_city:
+                        continue
+                listing = self._parse_post(post, post_city)
+                if listing:
+                    listings.append(listing)
+
+        # Fallback: HTML
+        if not listings:
+            tree = parse_html(html)
+            cards = find_by_class(tree, ['div', 'article'], self.CARD_CLASS_RE)[:30] if tree is not None else []
+            for card in cards:
+                link = first_descendant(card, 'a', 'href')
+                if link is None:
+                    continue
+                href = link.get('href', '')
+                title = element_text(link, strip=True)
+                re_keywords = ['شقة', 'فيلا', 'أرض', 'عمارة', 'بيت', 'دور', 'عقار', 'للبيع']
+                if not any(kw in title for kw in re_keywords):
+                    continue
+                card_city = city or self._route_city({}, element_text(card, ' '))
+                if not card_city:
+                    continue
+                price = None
+                pm = re.search(r'([\d,]+)\s*(ريال|SAR)', element_text(card))
+                if pm:
+                    price = self._parse_price(pm.group(1))
+                ext_id = href.rstrip('/').split('/')[-1]
+                listings.append({
+                    'external_id': f"haraj-{ext_id}",
+                    'source': 'haraj.com.sa',
+                    'source_url': href if href.startswith('http') else f"{self.base_url}{href}",
+                    'title': title[:200],
+                    'price': price,
+                    'city': card_city,
+                    'district': '',
+                    'property_type': self._detect_type(title),
+                    'scraped_at': datetime.now(),
+                })
         return listings
 
+    SIZE_RE = re.compile(r'(?:المساحة|المساحه|مساحة|مساحه)\s*:?\s*([\d,.]+)|([\d,.]+)\s*(?:م2|م²|متر مربع|متر)')
+    DISTRICT_RE = re.compile(r'(?<!\w)(?:حي|بحي)\s+((?:الملك|الأمير|الامير)\s+\S+|[^\s،,.]+)')
+
+    def _parse_detail(self, html: str, listing: Dict[str, Any]) -> Dict[str, Any]:
+        """Full post from the detail page, plus size and district read from its text"""
+        details: Dict[str, Any] = {}
+        text = ''
+        next_data = extract_script_json(html, '__NEXT_DATA__')
+        if isinstance(next_data, dict):
+            page_props = next_data.get('props', {}).get('pageProps', {})
+            post = page_props.get('post', page_props.get('data', {}).get('post'))
+            if isinstance(post, dict):
+                details = self._parse_post(post, listing['city']) or {}
+                text = f"{post.get('title', post.get('postTitle', ''))} {post.get('body', post.get('postText', ''))}"
+        if not text:
+            tree = parse_html(html)
+            text = element_text(tree, ' ') if tree is not None else ''
+            if details.get('price') is None:
+                match = re.search(r'([\d,]+)\s*(?:ريال|SAR|ر\.س)', text)
+                details['price'] = self._parse_price(match.group(1)) if match else None
+        text = self._parse_arabic_number(text) or ''
+
+        match = self.SIZE_RE.search(text)
+        if match:
+            try:
+                size = Decimal((match.group(1) or match.group(2)).replace(',', '').rstrip('.'))
+                details['size_sqm'] = size if size > 0 else None
+            except InvalidOperation:
+                pass
+        match = self.DISTRICT_RE.search(text)
+        if match:
+            details['district'] = match.group(1)
+        return details
+
     def _parse_post(self, post: Dict, city: str) -> Optional[Dict[str, Any]]:
         try:
             post_id = str(post.get('id', post.get('postId', '')))
@@ -652,21 +1377,6 @@ class HarajScraper(BaseScraper):
                 return en
         return 'apartment'
 
-    def scrape_city(self, city: str, max_pages: int = 2, scrape_details: bool = False) -> List[Dict[str, Any]]:
-        all_listings = []
-        seen_ids = set()
-        logger.info(f"haraj.com.sa: Starting scrape for: {city}")
-        for page in range(1, max_pages + 1):
-            page_listings = self.scrape_listings_page(city, page=page)
-            if not page_listings:
-                break
-            for listing in page_listings:
-                if listing['external_id'] not in seen_ids:
-                    seen_ids.add(listing['external_id'])
-                    all_listings.append(listing)
-        logger.info(f"haraj.com.sa: Total for {city}: {len(all_listings)}")
-        return all_listings
-
 
 class MultiSourceScraper:
     """Orchestrates scraping from multiple sources"""
@@ -681,23 +1391,160 @@ class MultiSourceScraper:
         if 'haraj.com.sa' in enabled:
             self.scrapers['haraj.com.sa'] = HarajScraper()
         logger.info(f"MultiSourceScraper: {list(self.scrapers.keys())}")
-
-    def scrape_city(self, city: str, max_pages: int = 3) -> List[Dict[str, Any]]:
+        # Detail fetches of a run share one fetcher, on an event loop thread of their own
+        self._detail_lock = threading.Lock()
+        self._detail_loop: Optional[asyncio.AbstractEventLoop] = None
+        self._detail_thread: Optional[threading.Thread] = None
+        self._detail_fetcher: Optional[AsyncFetcher] = None
+
+    async def enrich_async(self, listings: List[Dict[str, Any]],
+                           score: Optional[Callable[[Dict[str, Any]], float]] = None,
+                           fetcher: AsyncFetcher = None) -> int:
+        """Enrich listings of every source at once, each source bounded by its own per-host cap and budget"""
+        if fetcher is None:
+            async with AsyncFetcher(settings.DETAIL_CONCURRENCY_PER_HOST) as own_fetcher:
+                return await self.enrich_async(listings, score, own_fetcher)
+
+        by_source: Dict[str, List[Dict[str, Any]]] = {}
+        for listing in listings:
+            by_source.setdefault(listing.get('source'), []).append(listing)
+        counts = await asyncio.gather(*(self.scrapers[source].enrich_listings_async(fetcher, group, score)
+                                        for source, group in by_source.items() if source in self.scrapers))
+        return sum(counts)
+
+    def _detail_session(self) -> Tuple[asyncio.AbstractEventLoop, AsyncFetcher]:
+        with self._detail_lock:
+            if self._detail_loop is None:
+                loop = asyncio.new_event_loop()
+                thread = threading.Thread(target=loop.run_forever, name='detail-fetch', daemon=True)
+                thread.start()
+                fetcher = AsyncFetcher(settings.DETAIL_CONCURRENCY_PER_HOST)
+                asyncio.run_coroutine_threadsafe(fetcher.__aenter__(), loop).result()
+                self._detail_loop, self._detail_thread, self._detail_fetcher = loop, thread, fetcher
+            return self._detail_loop, self._detail_fetcher
+
+    def enrich(self, listings: List[Dict[str, Any]],
+               score: Optional[Callable[[Dict[str, Any]], float]] = None) -> int:
+        """enrich_async over the run's detail fetcher; safe to call from any thread"""
+        loop, fetcher = self._detail_session()
+        return asyncio.run_coroutine_threadsafe(self.enrich_async(listings, score, fetcher), loop).result()
+
+    def begin_run(self) -> None:
+        """Reset per-run scraper state (e.g. the Haraj feed) before a new run"""
+        for scraper in self.scrapers.values():
+            scraper.reset_run_state()
+
+    def end_run(self) -> None:
+        """Close the run's detail fetcher and stop its event loop"""
+        with self._detail_lock:
+            loop, thread, fetcher = self._detail_loop, self._detail_thread, self._detail_fetcher
+            self._detail_loop = self._detail_thread = self._detail_fetcher = None
+        if loop is None:
+            return
+        try:
+            asyncio.run_coroutine_threadsafe(fetcher.__aexit__(None, None, None), loop).result()
+        finally:
+            loop.call_soon_threadsafe(loop.stop)
+            thread.join()
+            loop.close()
+
+    def _merge_sources(self, city: str, by_source: Dict[str, List[Dict[str, Any]]]) -> List[Dict[str, Any]]:
+        """Concatenate per-source listings in source order, dropping repeated external ids"""
         all_listings = []
         seen_ids = set()
+        for name, listings in by_source.items():
+            for listing in listings:
+                if listing['external_id'] not in seen_ids:
+                    seen_ids.add(listing['external_id'])
+                    all_listings.append(listing)
+            logger.info(f"{name}: {len(listings)} for {city}")
+        logger.info(f"All sources: {len(all_listings)} total for {city}")
+        return all_listings
+
+    def scrape_city(self, city: str, max_pages: int = 3, known_ids: Optional[Container[str]] = None,
+                    start_pages: Optional[Dict[str, int]] = None, failed: Optional[set] = None,
+                    last_pages: Optional[Dict[str, int]] = None) -> List[Dict[str, Any]]:
+        """All listings of a city, from iter_city_pages.
+
+        start_pages and failed are as for iter_city_pages; last_pages, if
+        given, is updated with the last page fetched from each source.
+        """
+        by_source: Dict[str, List[Dict[str, Any]]] = {name: [] for name in self.scrapers
+                                                      if start_pages is None or name in start_pages}
+        for name, page, page_listings in self.iter_city_pages(city, max_pages, known_ids, start_pages, failed):
+            by_source[name].extend(page_listings)
+            if last_pages is not None:
+                last_pages[name] = max(last_pages.get(name, 0), page)
+        return self._merge_sources(city, by_source)
+
+    def iter_city_pages(self, city: str, max_pages: int = 3, known_ids: Optional[Container[str]] = None,
+                        start_pages: Optional[Dict[str, int]] = None, failed: Optional[set] = None
+                        ) -> Iterator[Tuple[str, int, List[Dict[str, Any]]]]:
+        """Yield (source, page, listings) from each source in turn.
+
+        start_pages maps source name to its first page; sources left out of it
+        are skipped. Sources that raise are logged and added to `failed`.
+        """
         for name, scraper in self.scrapers.items():
+            start_page = 1 if start_pages is None else start_pages.get(name)
+            if start_page is None:
+                continue
             try:
-                listings = scraper.scrape_city(city, max_pages=max_pages)
-                for listing in listings:
-                    if listing['external_id'] not in seen_ids:
-                        seen_ids.add(listing['external_id'])
-                        all_listings.append(listing)
-                logger.info(f"{name}: {len(listings)} for {city}")
-                time.sleep(random.uniform(2, 4))
+                for page, page_listings in scraper.iter_city_pages(city, max_pages=max_pages, known_ids=known_ids,
+                                                                   start_page=start_page):
+                    yield name, page, page_listings
             except Exception as e:
                 logger.error(f"Error scraping {name} for {city}: {e}")
-        logger.info(f"All sources: {len(all_listings)} total for {city}")
-        return all_listings
+                if failed is not None:
+                    failed.add(name)
+
+    async def iter_city_pages_async(self, city: str, max_pages: int = 3, fetcher: AsyncFetcher = None,
+                                    known_ids: Optional[Container[str]] = None,
+                                    start_pages: Optional[Dict[str, int]] = None, failed: Optional[set] = None
+                                    ) -> AsyncIterator[Tuple[str, int, List[Dict[str, Any]]]]:
+        """Yield (source, page, listings) as pages arrive from all sources concurrently.
+
+        Sources push into a bounded queue, so a slow consumer pauses fetching
+        instead of letting parsed pages pile up.
+        """
+        if fetcher is None:
+            async with AsyncFetcher() as own_fetcher:
+                async for item in self.iter_city_pages_async(city, max_pages, own_fetcher, known_ids,
+                                                             start_pages, failed):
+                    yield item
+            return
+
+        queue: asyncio.Queue = asyncio.Queue(maxsize=settings.PIPELINE_QUEUE_SIZE)
+        done = object()
+
+        async def pump(name: str, scraper: BaseScraper, start_page: int) -> None:
+            try:
+                async for page, page_listings in scraper.iter_city_pages_async(fetcher, city, max_pages,
+                                                                               known_ids, start_page):
+                    await queue.put((name, page, page_listings))
+            except Exception as e:
+                logger.error(f"Error scraping {name} for {city}: {e}")
+                if failed is not None:
+                    failed.add(name)
+            finally:
+                await queue.put((name, 0, done))
+
+        tasks = []
+        for name, scraper in self.scrapers.items():
+            start_page = 1 if start_pages is None else start_pages.get(name)
+            if start_page is not None:
+                tasks.append(asyncio.ensure_future(pump(name, scraper, start_page)))
+        remaining = len(tasks)
+        try:
+            while remaining:
+                name, page, item = await queue.get()
+                if item is done:
+                    remaining -= 1
+                    continue
+                yield name, page, item
+        finally:
+            for task in tasks:
+                task.cancel()
 
     def scrape_multiple_cities(self, cities: List[str], max_pages: int = 2) -> Dict[str, List[Dict[str, Any]]]:
         results = {}
@@ -707,13 +1554,46 @@ class MultiSourceScraper:
             except Exception as e:
                 logger.error(f"Error scraping city {city}: {e}")
                 results[city] = []
-            time.sleep(random.uniform(3, 5))
         return results
 
+    async def scrape_city_async(self, city: str, max_pages: int = 3, fetcher: AsyncFetcher = None,
+                                known_ids: Optional[Container[str]] = None,
+                                start_pages: Optional[Dict[str, int]] = None, failed: Optional[set] = None,
+                                last_pages: Optional[Dict[str, int]] = None) -> List[Dict[str, Any]]:
+        """scrape_city with all sources fetched concurrently over one shared fetcher"""
+        by_source: Dict[str, List[Dict[str, Any]]] = {name: [] for name in self.scrapers
+                                                      if start_pages is None or name in start_pages}
+        async for name, page, page_listings in self.iter_city_pages_async(city, max_pages, fetcher, known_ids,
+                                                                          start_pages, failed):
+            by_source[name].extend(page_listings)
+            if last_pages is not None:
+                last_pages[name] = max(last_pages.get(name, 0), page)
+        return self._merge_sources(city, by_source)
+
+    async def scrape_multiple_cities_async(self, cities: List[str],
+                                           max_pages: int = 2) -> Dict[str, List[Dict[str, Any]]]:
+        """Scrape several cities at once; the per-host cap still bounds each site"""
+        async with AsyncFetcher() as fetcher:
+            results = await asyncio.gather(
+                *(self.scrape_city_async(city, max_pages=max_pages, fetcher=fetcher) for city in cities),
+                return_exceptions=True,
+            )
+        out = {}
+        for city, listings in zip(cities, results):
+            if isinstance(listings, Exception):
+                logger.error(f"Error scraping city {city}: {listings}")
+                listings = []
+            out[city] = listings
+        return out
+
 
 if __name__ == '__main__':
     scraper = MultiSourceScraper()
-    results = scraper.scrape_multiple_cities(['الرياض', 'جدة'], max_pages=1)
+    scraper.begin_run()
+    if settings.ASYNC_FETCH:
+        results = asyncio.run(scraper.scrape_multiple_cities_async(['الرياض', 'جدة'], max_pages=1))
+    else:
+        results = scraper.scrape_multiple_cities(['الرياض', 'جدة'], max_pages=1)
     for city, listings in results.items():
         print(f"\n{city}: {len(listings)} total")
         for listing in listings[:5]:
@@ -0,0 +1,144 @@
+import os
+import time
+import socket
+import threading
+from typing import Optional, List, Dict, Any, Tuple
+
+from config import settings, logger
+from database import db_manager
+
+
+class QueueWorker:
+    """One node of a multi-node scrape, fed from the shared scrape_tasks table.
+
+    Every node joins the same run and enqueues its first page range for each
+    (source, city); duplicates are ignored, so it does not matter which node
+    gets there first. Worker threads then claim tasks with FOR UPDATE SKIP
+    LOCKED, so no two workers ever hold the same pages. A claim is a lease:
+    a heartbeat thread keeps it alive, and when a node dies its leases lapse
+    and other workers take the tasks over from the last page it recorded.
+    Finishing a range that should keep paging queues the next range.
+    """
+
+    def __init__(self, runner, cities: Dict[str, Dict], workers: int = 1):
+        self.runner = runner
+        self.cities = cities
+        node = f"{socket.gethostname()}:{os.getpid()}"
+        self.worker_ids = [f"{node}:{i}" for i in range(max(1, workers))]
+        self.results: Dict[str, Dict[str, Any]] = {}
+        self.completed_run = False
+        self.contexts: Dict[str, Optional[Tuple[str, float]]] = {}
+        self._lock = threading.Lock()
+        self._stop = threading.Event()
+
+    def enqueue(self, run_id: str, max_pages: int) -> int:
+        tasks = []
+        for source, scraper in self.runner.multi_scraper.scrapers.items():
+            for city, pages in scraper.queue_targets(list(self.cities), max_pages):
+                tasks.append((source, city or '', 1, min(settings.QUEUE_TASK_PAGES, pages), pages))
+        return db_manager.enqueue_scrape_tasks(run_id, tasks)
+
+    def run(self, run_id: str) -> None:
+        """Work the queue until the run is complete"""
+        heartbeat = threading.Thread(target=self._heartbeat, name='queue-heartbeat', daemon=True)
+        heartbeat.start()
+        threads = [threading.Thread(target=self._work, args=(run_id, worker_id), name=f"queue-{i}")
+                   for i, worker_id in enumerate(self.worker_ids)]
+        for thread in threads:
+            thread.start()
+        for thread in threads:
+            thread.join()
+        self._stop.set()
+        heartbeat.join()
+
+    def _heartbeat(self) -> None:
+        while not self._stop.wait(settings.QUEUE_HEARTBEAT_SECONDS):
+            db_manager.renew_scrape_leases(self.worker_ids, settings.QUEUE_LEASE_SECONDS)
+
+    def _work(self, run_id: str, worker_id: str) -> None:
+        sources = list(self.runner.multi_scraper.scrapers)
+        while True:
+            task = db_manager.claim_scrape_task(run_id, worker_id, sources,
+                                                settings.QUEUE_LEASE_SECONDS, settings.QUEUE_MAX_ATTEMPTS)
+            if task:
+                self._run_task(task, worker_id)
+                continue
+            # Nothing claimable: the run is over once no other worker holds a lease
+            status, completed = db_manager.finish_queue_run(run_id, settings.QUEUE_MAX_ATTEMPTS)
+            if completed:
+                logger.info(f"Run {run_id} complete")
+                self.completed_run = True
+            if status != 'running':
+                return
+            time.sleep(settings.QUEUE_POLL_SECONDS)
+
+    def _run_task(self, task: Dict[str, Any], worker_id: str) -> None:
+        source = task['source']
+        scraper = self.runner.multi_scraper.scrapers[source]
+        city = task['city'] or None
+        end_page = task['end_page']
+        start_page = max(task['start_page'], task['last_page'] + 1)
+        label = f"{source} {city or 'feed'} pages {task['start_page']}-{end_page}"
+        if start_page > task['start_page']:
+            logger.info(f"Taking over {label} from page {start_page} (attempt {task['attempts']})")
+        known_ids = db_manager.fingerprints if settings.INCREMENTAL_CRAWL else None
+        # Per-city counts of every attempt at this task, kept on the task so the run summary covers all nodes
+        results: Dict[str, Dict[str, int]] = task['results'] or {}
+
+        more = True
+        try:
+            for page in range(start_page, end_page + 1):
+                listings = scraper.fetch_listings_page(city, page=page)
+                self._save(city, listings, results)
+                if not db_manager.record_task_progress(task['id'], worker_id, page, settings.QUEUE_LEASE_SECONDS,
+                                                       results):
+                    logger.warning(f"Lost the lease on {label}; another worker has taken it over")
+                    return
+                more = scraper._continue_paging(listings, page, task['max_pages'], known_ids, city)
+                if not more:
+                    break
+            next_task = None
+            if more:
+                next_task = (source, task['city'], end_page + 1, end_page + settings.QUEUE_TASK_PAGES,
+                             task['max_pages'])
+            if not db_manager.complete_scrape_task(task['id'], worker_id, results, next_task):
+                logger.warning(f"Could not complete {label}; its lease had lapsed")
+        except Exception as e:
+            logger.error(f"Error running task {label}: {e}")
+            db_manager.release_scrape_task(task['id'], worker_id, settings.QUEUE_MAX_ATTEMPTS, results)
+
+    def _save(self, city: Optional[str], listings: List[Dict[str, Any]],
+              task_results: Dict[str, Dict[str, int]]) -> None:
+        """Analyze and write a page; feed pages are split by the city each post was routed to.
+        Counts are added to this node's results and to the task's task_results."""
+        by_city: Dict[str, List[Dict[str, Any]]] = {}
+        for listing in listings:
+            by_city.setdefault(city or listing.get('city'), []).append(listing)
+        for city_ar, city_listings in by_city.items():
+            if city_ar not in self.cities:
+                continue
+            result, context = self._city(city_ar)
+            if context is None:
+                continue
+            city_id, city_avg = context
+            counts = self.runner.save_listings(city_listings, city_id, city_avg)
+            counts['found'] = len(city_listings)
+            task_counts = task_results.setdefault(city_ar, dict.fromkeys(counts, 0))
+            with self._lock:
+                for key, value in counts.items():
+                    result[key] += value
+                    task_counts[key] += value
+
+    def _city(self, city_ar: str) -> Tuple[Dict[str, Any], Optional[Tuple[str, float]]]:
+        with self._lock:
+            if city_ar not in self.results:
+                city_info = self.cities[city_ar]
+                self.results[city_ar] = self.runner._new_result(city_ar, city_info)
+                try:
+                    self.contexts[city_ar] = self.runner._open_city(city_ar, city_info)
+                except Exception as e:
+                    logger.error(f"Critical error preparing {city_ar}: {e}")
+                    self.contexts[city_ar] = None
+                if self.contexts[city_ar] is None:
+                    self.results[city_ar]['errors'] += 1
+            return self.results[city_ar], self.contexts[city_ar]